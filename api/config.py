@@ -0,0 +1,120 @@
+"""
+The parsed mm27.properties, shared by Constants, CropType and TileType.
+
+Parsing the properties file with configparser is the slowest part of importing the bot, and it used
+to happen once per Constants instance and once per CropType member. The parsed keys are now kept in
+memory for the life of the process and in a marshal snapshot in the repository's .cache directory,
+so later runs skip configparser entirely. The snapshot records the size and modification time of the
+file it was built from and is rebuilt whenever the properties file changes. Its name carries the
+snapshot version, so checkouts with different layouts do not overwrite each other's snapshot.
+
+MM27_PROPERTIES points the bot at another properties file than resources/mm27.properties.
+"""
+from typing import Dict, Optional
+
+import marshal
+import os
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROPERTIES_PATH = os.path.join(ROOT, "resources", "mm27.properties")
+# Set to play under another properties file, the one the engine was started with, e.g. by tools.sweep
+ENV_PROPERTIES = "MM27_PROPERTIES"
+PROPERTIES_PATH = os.path.abspath(os.environ.get(ENV_PROPERTIES) or DEFAULT_PROPERTIES_PATH)
+CACHE_DIR = os.path.join(ROOT, ".cache")
+
+# Bump when the layout of the snapshot changes
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path_for(path: str) -> str:
+    """
+    Returns where the snapshot of a properties file is kept. Files other than the default one are told
+    apart by a hash of their path, so bots playing under different files do not keep rebuilding one snapshot.
+    """
+    name = f"mm27.properties.v{SNAPSHOT_VERSION}"
+    if os.path.abspath(path) != DEFAULT_PROPERTIES_PATH:
+        name += f".{zlib.crc32(os.path.abspath(path).encode()):08x}"
+    return os.path.join(CACHE_DIR, name + ".snapshot")
+
+
+SNAPSHOT_PATH = snapshot_path_for(PROPERTIES_PATH)
+
+_config: Optional[Dict[str, str]] = None
+
+
+def parse_properties(path: str = PROPERTIES_PATH) -> Dict[str, str]:
+    """
+    Parses a properties file the way the engine config is read everywhere else
+    :param path: Properties file
+    :return: Dict of lowercased keys to raw string values
+    """
+    import configparser
+
+    with open(path) as f:
+        file_content = '[dummy_section]\n' + f.read()
+    config_parser = configparser.RawConfigParser()
+    config_parser.read_string(file_content)
+    return dict(config_parser['dummy_section'])
+
+
+def _file_key(path: str) -> tuple:
+    stat = os.stat(path)
+    return SNAPSHOT_VERSION, stat.st_size, stat.st_mtime_ns
+
+
+def read_snapshot(path: str = PROPERTIES_PATH, snapshot_path: str = SNAPSHOT_PATH) -> Optional[Dict[str, str]]:
+    """
+    Returns the snapshotted config, or None if there is no snapshot or it is out of date
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            key, config = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return config if key == _file_key(path) else None
+
+
+def write_snapshot(config: Dict[str, str], path: str = PROPERTIES_PATH, snapshot_path: str = SNAPSHOT_PATH) -> bool:
+    """
+    Saves config as the snapshot of path. A read-only checkout just keeps parsing on every start.
+    :return: Whether the snapshot was written
+    """
+    temp_path = f"{snapshot_path}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        with open(temp_path, "wb") as f:
+            marshal.dump((_file_key(path), config), f)
+        # Replace in one step so a bot starting at the same time never reads half a snapshot
+        os.replace(temp_path, snapshot_path)
+        return True
+    except OSError:
+        return False
+
+
+def load_config() -> Dict[str, str]:
+    """
+    Returns the engine config, parsed at most once per process and once per change of the properties file
+    :return: Dict of lowercased keys to raw string values
+    """
+    global _config
+    if _config is None:
+        config = read_snapshot()
+        if config is None:
+            config = parse_properties()
+            write_snapshot(config)
+        _config = config
+    return _config
+
+
+def clear_cache(remove_snapshot: bool = False) -> None:
+    """
+    Forgets the in-process config, and optionally the snapshot, so the next load_config parses again
+    """
+    global _config
+    _config = None
+    if remove_snapshot:
+        try:
+            os.remove(SNAPSHOT_PATH)
+        except OSError:
+            pass
@@ -1,16 +1,10 @@
-from pathlib import Path
-import configparser
-import os
+from api.config import load_config
 
 
 class Constants:
     def __init__(self) -> None:
-        with open(Path(os.path.dirname(os.path.dirname(__file__))) / "resources" / "mm27.properties") as f:
-            file_content = '[dummy_section]\n' + f.read()
-        config_parser = configparser.RawConfigParser()
-        config_parser.read_string(file_content)
-        config = config_parser['dummy_section']
-        
+        config = load_config()
+
         self.BOARD_WIDTH                            = int(config['board.width'])
         self.BOARD_HEIGHT                           = int(config['board.height'])
         self.GRASS_ROWS                             = int(config['board.grass.rows'])
@@ -0,0 +1,274 @@
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from model.crop_type import CropType
+from model.game_state import GameState
+from model.position import Position
+
+import heapq
+
+# Turns a tile we sent a PlantDecision for stays claimed while we wait for its crop to show up. Crops
+# that show up elsewhere, or later, are taken to be the opponent's unless the engine's feedback
+# confirms the planting (see confirm_planted).
+PLANTED_WINDOW = 2
+
+
+class CropOwner(Enum):
+    ME = 1
+    OPPONENT = 2
+
+    def __str__(self) -> str:
+        return f"{self.name}"
+
+
+class IndexedCrop:
+    def __init__(self, position: Position, crop_type: CropType, owner: CropOwner, ready_turn: int, value: float) -> None:
+        self.position = position
+        self.crop_type = crop_type
+        self.owner = owner
+        self.ready_turn = ready_turn
+        self.value = value
+
+    def is_ready(self, turn: int) -> bool:
+        return self.ready_turn <= turn
+
+    def __str__(self) -> str:
+        return f"IndexedCrop({self.crop_type}@{self.position},{self.owner},ready={self.ready_turn})"
+
+
+class CropIndex:
+    """
+    Index of every crop on the board, kept up to date from the game state each turn.
+
+    Crops are bucketed by owner, type and the turn they become harvestable. Radius queries go
+    through a coarse grid of buckets so only nearby crops are looked at, and the next crop to
+    mature is kept at the top of a heap per owner. Entries are only touched when the tile
+    they sit on changes.
+    """
+
+    def __init__(self, bucket_size: int = 4) -> None:
+        self.bucket_size = bucket_size
+        self.turn = 0
+        self.crops: Dict[Position, IndexedCrop] = {}
+        self.by_owner: Dict[CropOwner, Set[Position]] = {owner: set() for owner in CropOwner}
+        self.by_type: Dict[CropType, Set[Position]] = {}
+        self.by_ready_turn: Dict[int, Set[Position]] = {}
+        self._grid: Dict[Tuple[int, int], Set[Position]] = {}
+        self._heaps: Dict[CropOwner, list] = {owner: [] for owner in CropOwner}
+        self._pending: Dict[Position, int] = {}
+        # Owners of crops we sent a HarvestDecision for, until the next game state shows whether it worked
+        self._harvesting: Dict[Position, CropOwner] = {}
+        self._counter = 0
+        # Crops that have shown up on the board, and crops that went away without being discarded
+        # (harvested by the other player, or destroyed), per owner
+        self.planted: Dict[CropOwner, int] = {owner: 0 for owner in CropOwner}
+        self.lost: Dict[CropOwner, int] = {owner: 0 for owner in CropOwner}
+
+    def mark_planted(self, positions: Iterable[Position]) -> None:
+        """
+        Records tiles we just sent a PlantDecision for, so the crops that show up there are ours
+        :param positions: Tiles that were planted on
+        """
+        for pos in positions:
+            self._pending[Position(pos.x, pos.y)] = self.turn
+            crop = self.crops.get(pos)
+            if crop is not None:
+                self._move_owner(crop, CropOwner.ME)
+
+    def confirm_planted(self, positions: Iterable[Position]) -> None:
+        """
+        Records plantings the engine confirmed in its feedback. Crops already on those tiles become ours,
+        and so do crops that show up there in the next PLANTED_WINDOW turns.
+        :param positions: Tiles that were planted on
+        """
+        for pos in positions:
+            crop = self.crops.get(pos)
+            if crop is not None:
+                self._move_owner(crop, CropOwner.ME)
+            else:
+                self._pending[Position(pos.x, pos.y)] = self.turn
+
+    def cancel_planted(self, positions: Iterable[Position]) -> None:
+        """
+        Forgets plantings the engine rejected
+        :param positions: Tiles that were not planted on
+        """
+        for pos in positions:
+            self._pending.pop(pos, None)
+
+    def update(self, game_state: GameState) -> None:
+        """
+        Brings the index in line with the tiles of a new game state. Only the TileMap's special tiles
+        are read, since every crop is one, and a crop whose type and ready turn have not changed only
+        gets its value updated.
+        :param game_state: GameState containing information for the game
+        """
+        self.turn = game_state.turn
+        for pos, planted_turn in list(self._pending.items()):
+            if self.turn - planted_turn > PLANTED_WINDOW:
+                del self._pending[pos]
+        special_tiles = game_state.tile_map.special_tiles
+        for pos in [pos for pos in self.crops if (pos.x, pos.y) not in special_tiles]:
+            self.lost[self.crops[pos].owner] += 1
+            self._remove(pos)
+        for (x, y), tile in special_tiles.items():
+            crop = tile.crop
+            if crop.type == "NONE":
+                pos = Position(x, y)
+                if pos in self.crops:
+                    self.lost[self.crops[pos].owner] += 1
+                    self._remove(pos)
+                continue
+            self._update_tile(Position(x, y), CropType[crop.type], self.turn + crop.growth_timer, crop.value)
+        for pos in [pos for pos in self._pending if pos in self.crops]:
+            del self._pending[pos]
+        self._harvesting.clear()
+
+    def discard(self, positions: Iterable[Position]) -> None:
+        """
+        Drops crops that are about to be harvested without waiting for the next game state. A crop that is
+        still there in the next game state, because the harvest failed, comes back with its owner.
+        :param positions: Tiles to forget
+        """
+        for pos in positions:
+            crop = self.crops.get(pos)
+            if crop is not None:
+                self._harvesting[Position(pos.x, pos.y)] = crop.owner
+                self._remove(pos)
+
+    def confirm_harvested(self, positions: Iterable[Position]) -> None:
+        """
+        Records harvests of ours the engine confirmed in its feedback
+        :param positions: Tiles that were harvested
+        """
+        for pos in positions:
+            self._harvesting.pop(pos, None)
+            if pos in self.crops:
+                self._remove(pos)
+
+    def lose(self, positions: Iterable[Position]) -> None:
+        """
+        Drops crops the opponent harvested, counting them as lost
+        :param positions: Tiles the opponent harvested
+        """
+        for pos in positions:
+            crop = self.crops.get(pos)
+            if crop is not None:
+                self.lost[crop.owner] += 1
+                self._remove(pos)
+
+    def ready_within(self, center: Position, radius: int, owner: Optional[CropOwner] = None) -> List[Position]:
+        """
+        Returns the harvestable crops within Manhattan distance radius of center
+        :param center: Position to search around
+        :param radius: Manhattan radius, inclusive
+        :param owner: Only return crops of this owner, or every crop if None
+        :return: List of positions of ready crops
+        """
+        res = []
+        for pos in self._within(center, radius):
+            crop = self.crops[pos]
+            if crop.ready_turn <= self.turn and (owner is None or crop.owner == owner):
+                res.append(pos)
+        return res
+
+    def crops_within(self, center: Position, radius: int) -> List[IndexedCrop]:
+        """
+        Returns every indexed crop within Manhattan distance radius of center, ready or not
+        """
+        return [self.crops[pos] for pos in self._within(center, radius)]
+
+    def next_to_mature(self, owner: CropOwner = CropOwner.ME) -> Optional[IndexedCrop]:
+        """
+        Returns the crop of the given owner with the lowest ready turn, ready crops included
+        :param owner: Owner to look at
+        :return: The IndexedCrop, or None if the owner has no crops
+        """
+        heap = self._heaps[owner]
+        while heap:
+            ready_turn, _, pos = heap[0]
+            crop = self.crops.get(pos)
+            if crop is not None and crop.owner == owner and crop.ready_turn == ready_turn:
+                return crop
+            heapq.heappop(heap)
+        return None
+
+    def crops_of(self, owner: CropOwner = CropOwner.ME) -> List[IndexedCrop]:
+        return [self.crops[pos] for pos in self.by_owner[owner]]
+
+    def ready_crops(self, owner: CropOwner = CropOwner.ME) -> List[IndexedCrop]:
+        return [self.crops[pos] for pos in self.by_owner[owner] if self.crops[pos].ready_turn <= self.turn]
+
+    def count(self, owner: CropOwner = CropOwner.ME) -> int:
+        return len(self.by_owner[owner])
+
+    def _within(self, center: Position, radius: int) -> List[Position]:
+        size = self.bucket_size
+        res = []
+        for bx in range((center.x - radius) // size, (center.x + radius) // size + 1):
+            for by in range((center.y - radius) // size, (center.y + radius) // size + 1):
+                bucket = self._grid.get((bx, by))
+                if not bucket:
+                    continue
+                for pos in bucket:
+                    if abs(pos.x - center.x) + abs(pos.y - center.y) <= radius:
+                        res.append(pos)
+        return res
+
+    def _update_tile(self, pos: Position, crop_type: CropType, ready_turn: int, value: float) -> None:
+        crop = self.crops.get(pos)
+        if crop is not None and crop.crop_type == crop_type:
+            crop.value = value
+            if crop.ready_turn != ready_turn:
+                self._bucket_remove(self.by_ready_turn, crop.ready_turn, pos)
+                crop.ready_turn = ready_turn
+                self.by_ready_turn.setdefault(ready_turn, set()).add(pos)
+                self._push(crop)
+            return
+        if crop is not None:
+            self.lost[crop.owner] += 1
+            self._remove(pos)
+        owner = self._harvesting.pop(pos, None)
+        if owner is None:
+            owner = CropOwner.ME if pos in self._pending else CropOwner.OPPONENT
+            self.planted[owner] += 1
+        crop = IndexedCrop(pos, crop_type, owner, ready_turn, value)
+        self.crops[pos] = crop
+        self.by_owner[owner].add(pos)
+        self.by_type.setdefault(crop_type, set()).add(pos)
+        self.by_ready_turn.setdefault(ready_turn, set()).add(pos)
+        self._grid.setdefault(self._bucket_key(pos), set()).add(pos)
+        self._push(crop)
+
+    def _remove(self, pos: Position) -> None:
+        crop = self.crops.pop(pos)
+        self.by_owner[crop.owner].discard(pos)
+        self._bucket_remove(self.by_type, crop.crop_type, pos)
+        self._bucket_remove(self.by_ready_turn, crop.ready_turn, pos)
+        self._bucket_remove(self._grid, self._bucket_key(pos), pos)
+
+    def _move_owner(self, crop: IndexedCrop, owner: CropOwner) -> None:
+        if crop.owner == owner:
+            return
+        self.by_owner[crop.owner].discard(crop.position)
+        self.planted[crop.owner] -= 1
+        self.planted[owner] += 1
+        crop.owner = owner
+        self.by_owner[owner].add(crop.position)
+        self._push(crop)
+
+    def _push(self, crop: IndexedCrop) -> None:
+        # Stale heap entries are skipped lazily in next_to_mature
+        self._counter += 1
+        heapq.heappush(self._heaps[crop.owner], (crop.ready_turn, self._counter, crop.position))
+
+    def _bucket_key(self, pos: Position) -> Tuple[int, int]:
+        return pos.x // self.bucket_size, pos.y // self.bucket_size
+
+    @staticmethod
+    def _bucket_remove(buckets: dict, key, pos: Position) -> None:
+        bucket = buckets.get(key)
+        if bucket is None:
+            return
+        bucket.discard(pos)
+        if not bucket:
+            del buckets[key]
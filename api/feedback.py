@@ -0,0 +1,212 @@
+from typing import Callable, Dict, Iterable, List, Optional, Type, Union
+from api.crop_index import CropOwner
+from model.crop_type import CropType
+from model.game_state import GameState
+from model.position import Position
+
+import re
+
+
+POSITION_PATTERN = re.compile(r"\(\s*(-?\d+)\s*,\s*(-?\d+)\s*\)|\bx\s*=\s*(-?\d+)\s*,?\s*y\s*=\s*(-?\d+)")
+CROP_PATTERN = re.compile(r"\b(" + "|".join(sorted((c.name for c in CropType if c != CropType.NONE), key=len, reverse=True)) + r")\b", re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r"\b(\d+)\b")
+# Feedback about the other player's actions names them, feedback about ours does not
+OPPONENT_PATTERN = re.compile(r"\b(?:opponent|enemy|other player)\b", re.IGNORECASE)
+
+
+def _positions(message: str) -> List[Position]:
+    res = []
+    for match in POSITION_PATTERN.finditer(message):
+        x, y = (match.group(1), match.group(2)) if match.group(1) is not None else (match.group(3), match.group(4))
+        res.append(Position(int(x), int(y)))
+    return res
+
+
+def _crop_types(message: str) -> List[CropType]:
+    return [CropType[name.upper()] for name in CROP_PATTERN.findall(message)]
+
+
+class FeedbackEvent:
+    """
+    A single line of engine feedback. is_invalid is set on events for decisions the engine rejected.
+    """
+    is_invalid = False
+
+    def __init__(self, turn: int, message: str) -> None:
+        self.turn = turn
+        self.message = message
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}(turn={self.turn},{self.message!r})"
+
+
+class HarvestEvent(FeedbackEvent):
+    def __init__(self, turn: int, message: str) -> None:
+        super().__init__(turn, message)
+        self.positions = _positions(message)
+        self.crop_types = _crop_types(message)
+        self.harvester = CropOwner.OPPONENT if OPPONENT_PATTERN.search(message) else CropOwner.ME
+
+
+class PlantEvent(FeedbackEvent):
+    def __init__(self, turn: int, message: str) -> None:
+        super().__init__(turn, message)
+        self.positions = _positions(message)
+        self.crop_types = _crop_types(message)
+
+
+class PlantFailedEvent(PlantEvent):
+    is_invalid = True
+
+
+class BuyEvent(FeedbackEvent):
+    def __init__(self, turn: int, message: str) -> None:
+        super().__init__(turn, message)
+        crop_types = _crop_types(message)
+        numbers = NUMBER_PATTERN.findall(message)
+        self.crop_type = crop_types[0] if crop_types else CropType.NONE
+        self.quantity = int(numbers[0]) if numbers else 0
+
+
+class BuyFailedEvent(BuyEvent):
+    is_invalid = True
+
+
+class SaleEvent(FeedbackEvent):
+    def __init__(self, turn: int, message: str) -> None:
+        super().__init__(turn, message)
+        amounts = re.findall(r"-?\d+(?:\.\d+)?", message)
+        self.amount = float(amounts[-1]) if amounts else 0.0
+
+
+class InvalidDecisionEvent(FeedbackEvent):
+    is_invalid = True
+
+
+class UnknownEvent(FeedbackEvent):
+    pass
+
+
+# Checked in order, first match wins, so failures have to come before the matching success
+FAILURE = r"(?:unable|failed|fail|cannot|can't|could not|not enough|insufficient|invalid)"
+EVENT_PATTERNS = [
+    (re.compile(FAILURE + r".*\bplant|\bplant\w*\b.*" + FAILURE, re.IGNORECASE), PlantFailedEvent),
+    (re.compile(FAILURE + r".*\b(?:buy|purchase)|\b(?:buy|bought|purchase)\w*\b.*" + FAILURE, re.IGNORECASE), BuyFailedEvent),
+    (re.compile(FAILURE + r"|\berror\b|\bignored\b", re.IGNORECASE), InvalidDecisionEvent),
+    (re.compile(r"\bharvest", re.IGNORECASE), HarvestEvent),
+    (re.compile(r"\bplant", re.IGNORECASE), PlantEvent),
+    (re.compile(r"\b(?:bought|buy|purchased)\b", re.IGNORECASE), BuyEvent),
+    (re.compile(r"\b(?:sold|sell|earned)\b", re.IGNORECASE), SaleEvent),
+]
+
+
+def split_feedback(feedback: Union[str, List, None]) -> List[str]:
+    """
+    Breaks the raw feedback field into individual non-empty messages
+    :param feedback: GameState.feedback, either a string or a list of strings
+    :return: List of messages
+    """
+    if not feedback:
+        return []
+    if isinstance(feedback, str):
+        lines = feedback.splitlines()
+    else:
+        lines = [str(line) for line in feedback]
+    return [line.strip() for line in lines if line.strip()]
+
+
+def parse_feedback(feedback: Union[str, List, None], turn: int = 0) -> List[FeedbackEvent]:
+    """
+    Turns the raw feedback field of a GameState into typed events
+    :param feedback: GameState.feedback
+    :param turn: Turn the feedback was received on
+    :return: List of FeedbackEvent, one per message
+    """
+    events = []
+    for message in split_feedback(feedback):
+        for pattern, event_type in EVENT_PATTERNS:
+            if pattern.search(message):
+                events.append(event_type(turn, message))
+                break
+        else:
+            events.append(UnknownEvent(turn, message))
+    return events
+
+
+class FeedbackStream:
+    """
+    Parses the feedback of every incoming GameState once and hands the events to subscribers.
+
+    Subscribers are registered per event type and also receive subclasses, so subscribing to
+    FeedbackEvent gets everything.
+    """
+
+    def __init__(self, history_length: int = 256) -> None:
+        self.history_length = history_length
+        self.history: List[FeedbackEvent] = []
+        self.invalid_decisions = 0
+        self.invalid_by_type: Dict[str, int] = {}
+        self.last_turn_invalid = 0
+        self._subscribers: Dict[Type[FeedbackEvent], List[Callable[[FeedbackEvent], None]]] = {}
+        self._last_feedback = None
+
+    def subscribe(self, event_type: Type[FeedbackEvent], callback: Callable[[FeedbackEvent], None]) -> None:
+        self._subscribers.setdefault(event_type, []).append(callback)
+
+    def consume(self, game_state: GameState) -> List[FeedbackEvent]:
+        """
+        Parses and dispatches the feedback of a game state. The same feedback is not dispatched twice
+        when both phases of a turn carry it.
+        :param game_state: GameState containing information for the game
+        :return: The events that were dispatched
+        """
+        key = (game_state.turn, str(game_state.feedback))
+        if key == self._last_feedback:
+            return []
+        self._last_feedback = key
+        events = parse_feedback(game_state.feedback, game_state.turn)
+        self.dispatch(events)
+        return events
+
+    def dispatch(self, events: Iterable[FeedbackEvent]) -> None:
+        self.last_turn_invalid = 0
+        for event in events:
+            if event.is_invalid:
+                self.invalid_decisions += 1
+                self.last_turn_invalid += 1
+                name = type(event).__name__
+                self.invalid_by_type[name] = self.invalid_by_type.get(name, 0) + 1
+            self.history.append(event)
+            for event_type in type(event).__mro__:
+                for callback in self._subscribers.get(event_type, ()):
+                    callback(event)
+        if len(self.history) > self.history_length:
+            del self.history[:len(self.history) - self.history_length]
+
+    def last_event(self, event_type: Type[FeedbackEvent]) -> Optional[FeedbackEvent]:
+        for event in reversed(self.history):
+            if isinstance(event, event_type):
+                return event
+        return None
+
+
+class MoneyLedger:
+    """
+    Running totals of money spent and earned, built from feedback events.
+    """
+
+    def __init__(self, stream: FeedbackStream) -> None:
+        self.seeds_bought: Dict[CropType, int] = {}
+        self.spent = 0.0
+        self.earned = 0.0
+        stream.subscribe(BuyEvent, self.on_buy)
+        stream.subscribe(SaleEvent, self.on_sale)
+
+    def on_buy(self, event: BuyEvent) -> None:
+        if event.is_invalid or event.crop_type == CropType.NONE:
+            return
+        self.seeds_bought[event.crop_type] = self.seeds_bought.get(event.crop_type, 0) + event.quantity
+        self.spent += event.quantity * event.crop_type.get_seed_price()
+
+    def on_sale(self, event: SaleEvent) -> None:
+        self.earned += event.amount
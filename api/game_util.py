@@ -1,10 +1,12 @@
 from typing import List
+from model.crop_type import CropType
 from model.tile_type import TileType
 from model.game_state import GameState
 from model.player import Player
 from model.position import Position
 from api.constants import Constants
 
+from functools import lru_cache
 import sys
 
 constants = Constants()
@@ -104,8 +106,8 @@ def tile_type_on_turn(turn: int, game_state: GameState, coord: Position) -> Tile
     :param coord: Coordinate to check at
     :return: TileType corresponding to the tile type of the tile given by coord
     """
-    shifts = (turn - 1 - constants.F_BAND_INIT_DELAY) / \
-        constants.F_BAND_MOVE_DELAY
+    shifts = (turn - 1 - constants.FBAND_INIT_DELAY) / \
+        constants.FBAND_MOVE_DELAY
     shifts = max(0, shifts)
 
     row = coord.y
@@ -114,23 +116,23 @@ def tile_type_on_turn(turn: int, game_state: GameState, coord: Position) -> Tile
     # Offset records how far into the fertility zone a row is (negative indicates below)
     # Init position indicates the first row that will * become * part of a band after the first shift
     # e.g. 0 = > fertility band starts off the map while 1 = > fertility band starts with 1 row on the map int
-    offset = shifts - row - 1 + constants.F_BAND_INIT_POSITION
+    offset = shifts - row - 1 + constants.FBAND_INIT_POSITION
     if (offset < 0):
         # Below fertility band
         newType = TileType.SOIL
-    elif offset < constants.F_BAND_OUTER_HEIGHT:
+    elif offset < constants.FBAND_OUTER_HEIGHT:
         # Within first outer band
         newType = TileType.F_BAND_OUTER
-    elif offset < constants.F_BAND_OUTER_HEIGHT + constants.F_BAND_MID_HEIGHT:
+    elif offset < constants.FBAND_OUTER_HEIGHT + constants.FBAND_MID_HEIGHT:
         # Within first mid band
         newType = TileType.F_BAND_MID
-    elif offset < constants.F_BAND_OUTER_HEIGHT + constants.F_BAND_MID_HEIGHT + constants.F_BAND_INNER_HEIGHT:
+    elif offset < constants.FBAND_OUTER_HEIGHT + constants.FBAND_MID_HEIGHT + constants.FBAND_INNER_HEIGHT:
         # Within inner band
         newType = TileType.F_BAND_INNER
-    elif offset < constants.F_BAND_OUTER_HEIGHT + 2 * constants.F_BAND_MID_HEIGHT + constants.F_BAND_INNER_HEIGHT:
+    elif offset < constants.FBAND_OUTER_HEIGHT + 2 * constants.FBAND_MID_HEIGHT + constants.FBAND_INNER_HEIGHT:
         # Within second mid band
         newType = TileType.F_BAND_MID
-    elif offset < 2 * constants.F_BAND_OUTER_HEIGHT + 2 * constants.F_BAND_MID_HEIGHT + constants.F_BAND_INNER_HEIGHT:
+    elif offset < 2 * constants.FBAND_OUTER_HEIGHT + 2 * constants.FBAND_MID_HEIGHT + constants.FBAND_INNER_HEIGHT:
         # Within second outer band
         newType = TileType.F_BAND_OUTER
     else:
@@ -138,3 +140,38 @@ def tile_type_on_turn(turn: int, game_state: GameState, coord: Position) -> Tile
         newType = TileType.ARID
 
     return newType
+
+
+@lru_cache(maxsize=256)
+def fertility_band_forecast(turn: int) -> List[TileType]:
+    """
+    Get the type of every row on a given turn, as tile_type_on_turn would give it. Results are cached,
+    so forecasting a turn ahead of time makes the lookup free once that turn comes.
+    :param turn: Turn to check for
+    :return: TileType of each row, indexed by y. Do not modify it, it is shared between callers.
+    """
+    return [tile_type_on_turn(turn, None, Position(0, y)) for y in range(constants.BOARD_HEIGHT)]
+
+
+def crop_value_per_turn(crop_type: CropType, fertility: float) -> float:
+    """
+    Estimates how much value a crop gains in a turn of growth. Growth scales with the tile's fertility
+    raised to the crop's fertility sensitivity, so crops with no sensitivity grow the same anywhere.
+    :param crop_type: Crop growing
+    :param fertility: Fertility of the tile it grows on
+    :return: Value gained per turn
+    """
+    return crop_type.get_growth_value() * fertility ** crop_type.get_fertility_sensitivity()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Returns the value below which fraction of values fall, as the nearest entry of the sorted values
+    :param values: Samples, e.g. decision latencies
+    :param fraction: Between 0 and 1, 0.95 for the 95th percentile
+    :return: The percentile, or 0.0 if there are no values
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
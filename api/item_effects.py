@@ -0,0 +1,161 @@
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from api import game_util
+from api.constants import Constants
+from api.crop_index import CropIndex, CropOwner, IndexedCrop
+from api.threat_map import ThreatMap
+from model.game_state import GameState
+from model.item_type import ItemType
+from model.position import Position
+
+import math
+
+constants = Constants()
+
+# Items that act on the tiles around where they are used, and the radius they act on
+EFFECT_RADIUS: Dict[ItemType, int] = {
+    ItemType.RAIN_TOTEM: constants.RAIN_TOTEM_EFFECT_RADIUS,
+    ItemType.FERTILITY_IDOL: constants.FERTILITY_IDOL_EFFECT_RADIUS,
+    ItemType.PESTICIDE: constants.PESTICIDE_EFFECT_RADIUS,
+    ItemType.SCARECROW: constants.SCARECROW_EFFECT_RADIUS,
+}
+
+
+@lru_cache(maxsize=None)
+def radius_mask(radius: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Returns the tiles within a Manhattan radius as (dy, half width) rows
+    """
+    return tuple((dy, radius - abs(dy)) for dy in range(-radius, radius + 1))
+
+
+class ItemEffects:
+    """
+    Per-tile score maps for using each positional item.
+
+    Every crop on the board gets a weight for each item: how much using the item on a tile within
+    the item's radius of that crop would be worth. The score of a tile is the sum of the weights of
+    the crops within the radius, i.e. the weight grid convolved with the item's radius mask, which
+    is done from the side of the crops, as they are sparse.
+
+    Scores are in crop value:
+        RAIN_TOTEM      value our growing crops gain from the turns of growth the totem saves them
+        FERTILITY_IDOL  extra value our growing crops gain from the doubled fertility
+        PESTICIDE       opponent crop value destroyed, minus our own, as grown by the turn it is used
+        SCARECROW       value of our crops the opponent could reach by the time they are ready
+    The coffee thermos and the delivery drone do not depend on where they are used and have no map.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.turn = 0
+        self._crops: List[IndexedCrop] = []
+        self._fertility: Dict[Position, float] = {}
+        self._threat_map: Optional[ThreatMap] = None
+        self._maps: Dict[Tuple[ItemType, int], List[List[float]]] = {}
+
+    def update(self, game_state: GameState, crop_index: CropIndex, threat_map: ThreatMap) -> None:
+        """
+        Takes in a new game state, invalidating the maps of the previous one
+        :param game_state: GameState containing information for the game
+        :param crop_index: Index of the crops on the board, already updated for game_state
+        :param threat_map: Threat map, already updated for game_state
+        """
+        self.turn = game_state.turn
+        self.width, self.height = game_state.tile_map.map_width, game_state.tile_map.map_height
+        self._crops = crop_index.crops_of(CropOwner.ME) + crop_index.crops_of(CropOwner.OPPONENT)
+        tile_map = game_state.tile_map
+        self._fertility = {crop.position: tile_map.get_tile(crop.position).type.get_fertility() for crop in self._crops}
+        self._threat_map = threat_map
+        self._maps = {}
+
+    def weight(self, item: ItemType, crop: IndexedCrop, turn: int) -> float:
+        """
+        Returns what using item within its radius of crop on turn is worth
+        """
+        turns_left = crop.ready_turn - turn
+        fertility = self._fertility.get(crop.position, 0.0)
+        if item == ItemType.PESTICIDE:
+            # The crop keeps growing until the pesticide is used, so using it later destroys more
+            grown = max(0, min(turn, crop.ready_turn) - self.turn)
+            value = crop.value + grown * game_util.crop_value_per_turn(crop.crop_type, fertility)
+            loss = constants.PESTICIDE_CROP_VALUE_DECREASE * value
+            return loss if crop.owner == CropOwner.OPPONENT else -loss
+        if crop.owner != CropOwner.ME:
+            return 0.0
+        if item == ItemType.SCARECROW:
+            # At risk if the opponent could be there to harvest it by the time it is ready
+            if self._threat_map is None or not self._threat_map.is_at_risk(crop, max(turn, crop.ready_turn) + 1):
+                return 0.0
+            return crop.value + max(0, turns_left) * game_util.crop_value_per_turn(crop.crop_type, fertility)
+        if turns_left <= 0:
+            return 0.0
+        if item == ItemType.RAIN_TOTEM:
+            multiplier = constants.RAIN_TOTEM_GROWTH_MULTIPLIER
+            saved = turns_left - math.ceil(turns_left / multiplier)
+            return saved * game_util.crop_value_per_turn(crop.crop_type, fertility)
+        if item == ItemType.FERTILITY_IDOL:
+            boosted = fertility * constants.FERTILITY_IDOL_FERTILITY_MULTIPLIER
+            gain = (game_util.crop_value_per_turn(crop.crop_type, boosted) -
+                    game_util.crop_value_per_turn(crop.crop_type, fertility))
+            return turns_left * gain
+        return 0.0
+
+    def score_map(self, item: ItemType, turn: Optional[int] = None) -> List[List[float]]:
+        """
+        Returns the score of using item on each tile, indexed [y][x]. Do not modify it, it is cached
+        until the next update.
+        :param item: One of the items in EFFECT_RADIUS
+        :param turn: Turn the item would be used on, defaults to the current one. Later turns assume the
+        crops we know of now are still there.
+        """
+        if item not in EFFECT_RADIUS:
+            raise ValueError(f"{item} does not depend on where it is used")
+        turn = self.turn if turn is None else turn
+        key = (item, turn)
+        grid = self._maps.get(key)
+        if grid is not None:
+            return grid
+        width, height = self.width, self.height
+        grid = [[0.0] * width for _ in range(height)]
+        mask = radius_mask(EFFECT_RADIUS[item])
+        for crop in self._crops:
+            weight = self.weight(item, crop, turn)
+            if weight == 0:
+                continue
+            cx, cy = crop.position.x, crop.position.y
+            for dy, span in mask:
+                y = cy + dy
+                if 0 <= y < height:
+                    row = grid[y]
+                    lo, hi = max(0, cx - span), min(width, cx + span + 1)
+                    row[lo:hi] = [score + weight for score in row[lo:hi]]
+        self._maps[key] = grid
+        return grid
+
+    def best_activation(self, item: ItemType, candidates: Optional[Iterable[Position]] = None,
+                        horizon: int = 0) -> Tuple[int, Optional[Position], float]:
+        """
+        Returns the best turn and tile to use an item on
+        :param item: One of the items in EFFECT_RADIUS
+        :param candidates: Tiles to consider, e.g. where we can move to, defaults to the whole board
+        :param horizon: How many turns after the current one to also consider, the same candidates being
+        used for every turn
+        :return: (turn, position, score), position is None if there were no candidates. Ties go to the
+        earliest turn.
+        """
+        candidates = None if candidates is None else list(candidates)
+        best = (self.turn, None, -math.inf)
+        for turn in range(self.turn, self.turn + horizon + 1):
+            grid = self.score_map(item, turn)
+            if candidates is None:
+                for y, row in enumerate(grid):
+                    x = max(range(self.width), key=row.__getitem__)
+                    if row[x] > best[2]:
+                        best = (turn, Position(x, y), row[x])
+            else:
+                for pos in candidates:
+                    if grid[pos.y][pos.x] > best[2]:
+                        best = (turn, pos, grid[pos.y][pos.x])
+        return best
@@ -0,0 +1,201 @@
+from enum import Enum
+from typing import List, Optional
+from api.threat_map import opponent_reach
+from model.game_state import GameState
+from model.position import Position
+
+import heapq
+
+
+class OpponentBehavior(Enum):
+    UNKNOWN = 0
+    CHASER = 1
+    FARMER = 2
+    IDLE = 3
+
+    def __str__(self) -> str:
+        return f"{self.name}"
+
+
+class OpponentHistory:
+    """
+    Fixed-size ring buffer of what the opponent looked like on each of the last capacity turns.
+    """
+
+    def __init__(self, capacity: int = 32) -> None:
+        self.capacity = capacity
+        self.size = 0
+        self._head = 0
+        self.turns = [0] * capacity
+        self.xs = [0] * capacity
+        self.ys = [0] * capacity
+        self.money = [0.0] * capacity
+        self.seeds = [0] * capacity
+        self.harvested = [0] * capacity
+        self.used_item = [False] * capacity
+
+    def append(self, turn: int, position: Position, money: float, seeds: int, harvested: int, used_item: bool) -> None:
+        i = self._head
+        self.turns[i] = turn
+        self.xs[i] = position.x
+        self.ys[i] = position.y
+        self.money[i] = money
+        self.seeds[i] = seeds
+        self.harvested[i] = harvested
+        self.used_item[i] = used_item
+        self._head = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def index(self, age: int) -> int:
+        """
+        Returns the buffer slot of the entry age turns back, 0 being the latest
+        """
+        return (self._head - 1 - age) % self.capacity
+
+    def position(self, age: int = 0) -> Position:
+        i = self.index(age)
+        return Position(self.xs[i], self.ys[i])
+
+
+class OpponentModel:
+    """
+    Tracks the opponent from every GameState and predicts where it will be.
+
+    Each update is O(1): the state is written to the ring buffer and a handful of exponential
+    moving averages (velocity, how often it closes in on us, moves at all, or changes its
+    inventory) are nudged. Behavior is classified from those averages, and predictions mix a
+    chase, a drift and a stand-still hypothesis weighted by them.
+    """
+
+    def __init__(self, capacity: int = 32, smoothing: float = 0.3) -> None:
+        self.history = OpponentHistory(capacity)
+        self.smoothing = smoothing
+        self.velocity_x = 0.0
+        self.velocity_y = 0.0
+        self.approach_rate = 0.0
+        self.moving_rate = 0.0
+        self.farming_rate = 0.0
+        self.item_used_turn: Optional[int] = None
+        self.movement = 0
+        self.target = Position(0, 0)
+        self.width = 0
+        self.height = 0
+        self._last_distance: Optional[int] = None
+
+    def update(self, game_state: GameState) -> None:
+        """
+        Records the opponent of a new game state. Calling it again for the same turn is a no-op.
+        :param game_state: GameState containing information for the game
+        """
+        history = self.history
+        if history.size > 0 and history.turns[history.index(0)] == game_state.turn:
+            return
+        opponent = game_state.get_opponent_player()
+        me = game_state.get_my_player()
+        self.width = game_state.tile_map.map_width
+        self.height = game_state.tile_map.map_height
+        self.movement = opponent_reach(opponent)
+        self.target = me.position
+        seeds = sum(opponent.seed_inventory.values())
+        harvested = len(opponent.harvested_inventory)
+        distance = opponent.position.distance(me.position)
+
+        if history.size > 0:
+            i = history.index(0)
+            a = self.smoothing
+            dx = opponent.position.x - history.xs[i]
+            dy = opponent.position.y - history.ys[i]
+            self.velocity_x += a * (dx - self.velocity_x)
+            self.velocity_y += a * (dy - self.velocity_y)
+            self.moving_rate += a * ((1.0 if dx or dy else 0.0) - self.moving_rate)
+            approached = distance <= opponent.harvest_radius or \
+                (self._last_distance is not None and distance < self._last_distance)
+            self.approach_rate += a * ((1.0 if approached else 0.0) - self.approach_rate)
+            farmed = seeds != history.seeds[i] or harvested != history.harvested[i]
+            self.farming_rate += a * ((1.0 if farmed else 0.0) - self.farming_rate)
+            if opponent.used_item and not history.used_item[i]:
+                self.item_used_turn = game_state.turn
+        self._last_distance = distance
+        history.append(game_state.turn, opponent.position, opponent.money, seeds, harvested, opponent.used_item)
+
+    def behavior(self) -> OpponentBehavior:
+        if self.history.size < 3:
+            return OpponentBehavior.UNKNOWN
+        if self.moving_rate < 0.2 and self.farming_rate < 0.2:
+            return OpponentBehavior.IDLE
+        if self.approach_rate >= 0.5 and self.approach_rate >= self.farming_rate:
+            return OpponentBehavior.CHASER
+        return OpponentBehavior.FARMER
+
+    def _weights(self):
+        # Chase, drift, stay
+        behavior = self.behavior()
+        if behavior == OpponentBehavior.CHASER:
+            return 0.7, 0.2, 0.1
+        if behavior == OpponentBehavior.IDLE:
+            return 0.1, 0.1, 0.8
+        if behavior == OpponentBehavior.FARMER:
+            return 0.1, 0.5, 0.4
+        return 1 / 3, 1 / 3, 1 / 3
+
+    def _hypotheses(self, turns: int) -> List[Position]:
+        start = self.history.position()
+        movement = max(1, self.movement)
+        to_target = self.target - start
+        steps = min(to_target.magnitude(), movement * turns)
+        chase = start if steps == 0 else (start + to_target.normalize() * steps).round()
+        drift = Position(start.x + self.velocity_x * turns, start.y + self.velocity_y * turns).round()
+        return [self._clamp(chase), self._clamp(drift), start]
+
+    def _clamp(self, pos: Position) -> Position:
+        return Position(min(max(pos.x, 0), self.width - 1), min(max(pos.y, 0), self.height - 1))
+
+    def most_likely_position(self, turns: int) -> Position:
+        """
+        Returns the single most likely opponent position turns turns from now
+        """
+        if self.history.size == 0:
+            return Position(0, 0)
+        weights = self._weights()
+        hypotheses = self._hypotheses(turns)
+        return hypotheses[max(range(len(weights)), key=lambda i: weights[i])]
+
+    def predict(self, turns: int) -> List[List[float]]:
+        """
+        Returns a probability grid indexed [y][x] of where the opponent will be turns turns from now.
+        Each hypothesis is spread evenly over a diamond that widens with the horizon.
+        :param turns: How many turns ahead to predict
+        :return: Grid of probabilities summing to 1
+        """
+        grid = [[0.0] * self.width for _ in range(self.height)]
+        if self.history.size == 0:
+            return grid
+        spread = min(turns, 3) * max(1, self.movement) // 4
+        for weight, center in zip(self._weights(), self._hypotheses(turns)):
+            cells = []
+            for y in range(max(0, center.y - spread), min(self.height, center.y + spread + 1)):
+                span = spread - abs(y - center.y)
+                for x in range(max(0, center.x - span), min(self.width, center.x + span + 1)):
+                    cells.append((x, y))
+            share = weight / len(cells)
+            for x, y in cells:
+                grid[y][x] += share
+        return grid
+
+    def predict_horizon(self, turns: int) -> List[List[List[float]]]:
+        """
+        Returns prediction grids for 1 through turns turns ahead
+        """
+        return [self.predict(k) for k in range(1, turns + 1)]
+
+    def likely_positions(self, turns: int, count: int) -> List[Position]:
+        """
+        Returns the count most probable opponent positions turns turns from now, from the predict grid.
+        Ties go to the tile closest to most_likely_position.
+        """
+        if self.history.size == 0:
+            return []
+        center = self.most_likely_position(turns)
+        cells = [(-p, abs(x - center.x) + abs(y - center.y), y, x)
+                 for y, row in enumerate(self.predict(turns)) for x, p in enumerate(row) if p > 0]
+        return [Position(x, y) for _, _, y, x in heapq.nsmallest(count, cells)]
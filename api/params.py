@@ -0,0 +1,35 @@
+"""
+Strategy parameters that can be overridden from the environment, so tools.sweep can try other values
+without editing bot.py. A parameter named BUY_CUTOFF_TURN is read from MM27_BUY_CUTOFF_TURN.
+
+This is imported before the bot sends its heartbeat, so it only uses os.
+"""
+import os
+
+ENV_PREFIX = "MM27_"
+
+# Every parameter read so far and its default
+DEFAULTS: dict[str, object] = {}
+# Every parameter read so far and the value it was read as
+VALUES: dict[str, object] = {}
+
+
+def param(name: str, default):
+    """
+    Returns the value of a strategy parameter
+    :param name: Parameter name, upper case
+    :param default: Value when the environment does not set it, its type is also the parameter's type
+    :return: The environment's value converted to the type of default, or default
+    """
+    DEFAULTS[name] = default
+    value = os.environ.get(ENV_PREFIX + name)
+    value = default if value is None else type(default)(value)
+    VALUES[name] = value
+    return value
+
+
+def env_for(values: dict) -> dict[str, str]:
+    """
+    Returns the environment variables that set values, a dict of parameter name to value
+    """
+    return {ENV_PREFIX + name: str(value) for name, value in values.items()}
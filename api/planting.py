@@ -0,0 +1,130 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from api import game_util
+from model.crop_type import CropType
+from model.position import Position
+from model.tile_map import TileMap
+from model.tile_type import TileType
+
+import math
+
+# Tiles the fertility band never reaches, their type stays what it is now
+FIXED_TYPES = (TileType.GRASS, TileType.GREEN_GROCER)
+# Gains smaller than this are rounding, not a better assignment
+EPSILON = 1e-9
+
+
+class PlantingPlan:
+    def __init__(self, crop_types: List[CropType], positions: List[Position], value: float) -> None:
+        self.crop_types = crop_types
+        self.positions = positions
+        self.value = value
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __str__(self) -> str:
+        return f"PlantingPlan({len(self.positions)} seeds, value={self.value:.1f})"
+
+
+def growth_values(crop_types: Iterable[CropType], rows: Iterable[int], turn: int) -> Dict[CropType, Dict[int, float]]:
+    """
+    Returns the value each crop type would gain over its growth time if planted in each row on turn,
+    following the fertility band forecast
+    :param crop_types: Crop types to value
+    :param rows: Rows to value them in
+    :param turn: Turn they would be planted on
+    :return: Dict of crop type to a dict of row to value
+    """
+    rows = list(rows)
+    values = {}
+    for crop_type in crop_types:
+        # Only seven tile types, so the growth rate is looked up rather than worked out per tile and turn
+        rates = {tile_type: game_util.crop_value_per_turn(crop_type, tile_type.get_fertility()) for tile_type in TileType}
+        by_row = dict.fromkeys(rows, 0.0)
+        for grow_turn in range(turn + 1, turn + crop_type.get_growth_time() + 1):
+            forecast = game_util.fertility_band_forecast(grow_turn)
+            for y in rows:
+                by_row[y] += rates[forecast[y]]
+        values[crop_type] = by_row
+    return values
+
+
+def plan_planting(seed_counts: Dict[CropType, int], positions: List[Position], tile_map: TileMap,
+                  turn: int) -> PlantingPlan:
+    """
+    Assigns seeds to tiles to maximize the value they grow to.
+
+    Seeds of a type are interchangeable, so values are only worked out per crop type and row (every
+    tile in a row sees the same band) and not per seed. The assignment is then a transportation
+    problem from the few crop types to the tiles, solved exactly as a min-cost flow by successive
+    shortest paths: each step plants one more seed along the path of greatest gain, which may move
+    planted tiles from one type to another on the way. With so few types the shortest path is a
+    Bellman-Ford over the types alone, an edge from type a to type b being a tile of b handed to a.
+    Every value is at least 0, so as many seeds are planted as there are seeds or tiles. Ties go to
+    the type first in seed_counts and the tile earliest in positions.
+    :param seed_counts: Seeds we have of each type
+    :param positions: Free tiles we can plant on, in order of preference
+    :param tile_map: Current board
+    :param turn: Turn we plant on
+    :return: The seeds to plant and where, with their estimated value
+    """
+    counts = {crop_type: count for crop_type, count in seed_counts.items() if count > 0 and crop_type != CropType.NONE}
+    if not counts or not positions:
+        return PlantingPlan([], [], 0.0)
+    values = growth_values(counts, {pos.y for pos in positions}, turn)
+
+    types = list(counts)
+    value_of: Dict[CropType, List[float]] = {crop_type: [] for crop_type in types}
+    for pos in positions:
+        tile_type = tile_map.get_tile_type_xy(pos.x, pos.y)
+        for crop_type in types:
+            if tile_type in FIXED_TYPES:
+                value = crop_type.get_growth_time() * game_util.crop_value_per_turn(crop_type, tile_type.get_fertility())
+            else:
+                value = values[crop_type][pos.y]
+            value_of[crop_type].append(value)
+
+    planted: List[Optional[CropType]] = [None] * len(positions)
+    remaining = dict(counts)
+    for _ in range(min(sum(counts.values()), len(positions))):
+        # dist is the value lost in getting a seed of each type to place: one still in the inventory costs
+        # nothing, and handing a planted tile of type b to type a gives b its seed back
+        dist = {crop_type: 0.0 if remaining[crop_type] > 0 else math.inf for crop_type in types}
+        via: Dict[CropType, Tuple[CropType, int]] = {}
+        for _ in range(len(types) - 1):
+            changed = False
+            for index, owner in enumerate(planted):
+                if owner is None:
+                    continue
+                for crop_type in types:
+                    if crop_type == owner or dist[crop_type] == math.inf:
+                        continue
+                    cost = dist[crop_type] - value_of[crop_type][index] + value_of[owner][index]
+                    if cost < dist[owner] - EPSILON:
+                        dist[owner] = cost
+                        via[owner] = (crop_type, index)
+                        changed = True
+            if not changed:
+                break
+        best = None
+        for crop_type in types:
+            if dist[crop_type] == math.inf:
+                continue
+            row = value_of[crop_type]
+            free = max((index for index, owner in enumerate(planted) if owner is None),
+                       key=lambda index: (row[index], -index))
+            cost = dist[crop_type] - row[free]
+            if best is None or cost < best[0] - EPSILON:
+                best = (cost, crop_type, free)
+        _, crop_type, index = best
+        # Walk the path back to the inventory it started from, each type taking the tile the next hands over
+        while True:
+            planted[index] = crop_type
+            if crop_type not in via:
+                remaining[crop_type] -= 1
+                break
+            crop_type, index = via[crop_type]
+
+    chosen = [index for index, crop_type in enumerate(planted) if crop_type is not None]
+    total = sum(value_of[planted[index]][index] for index in chosen)
+    return PlantingPlan([planted[index] for index in chosen], [positions[index] for index in chosen], total)
@@ -0,0 +1,246 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from api.crop_index import IndexedCrop
+from model.position import Position
+
+import time
+
+
+class HarvestSite:
+    """
+    A standing spot together with the crops it can harvest in one action.
+    """
+
+    def __init__(self, position: Position, crops: List[IndexedCrop]) -> None:
+        self.position = position
+        self.crops = crops
+        self.ready_turn = max(crop.ready_turn for crop in crops)
+        self.value = sum(crop.value for crop in crops)
+        self.load = len(crops)
+
+    def __str__(self) -> str:
+        return f"HarvestSite({self.position},{self.load} crops,ready={self.ready_turn})"
+
+
+class RouteStop:
+    def __init__(self, position: Position, turn: int, site: Optional[HarvestSite] = None) -> None:
+        self.position = position
+        self.turn = turn
+        self.site = site
+
+    def is_market(self) -> bool:
+        return self.site is None
+
+    def __str__(self) -> str:
+        if self.site is None:
+            return f"Market({self.position}@{self.turn})"
+        return f"Harvest({self.position}@{self.turn},{self.site.load} crops)"
+
+
+class HarvestRoute:
+    def __init__(self, stops: List[RouteStop], value: float, finish_turn: int) -> None:
+        self.stops = stops
+        self.value = value
+        self.finish_turn = finish_turn
+
+    def next_position(self) -> Optional[Position]:
+        return self.stops[0].position if self.stops else None
+
+    def __str__(self) -> str:
+        return f"HarvestRoute(value={self.value},finish={self.finish_turn},[{','.join(str(s) for s in self.stops)}])"
+
+
+def travel_turns(start: Position, end: Position, max_movement: int) -> int:
+    """
+    Returns how many turns it takes to walk from start to end and act there, the walk and the
+    action of the last turn happening together
+    """
+    dist = abs(start.x - end.x) + abs(start.y - end.y)
+    return max(1, (dist + max_movement - 1) // max_movement)
+
+
+def build_sites(crops: Sequence[IndexedCrop], harvest_radius: int, ready_slack: int = 1,
+                deadline: Optional[float] = None) -> List[HarvestSite]:
+    """
+    Greedily groups crops into harvest sites. Each site is seeded with the earliest uncovered crop
+    and stands on the tile of its diamond that covers the most other uncovered crops maturing within
+    ready_slack turns of it.
+    :param crops: Crops to cover
+    :param harvest_radius: Harvest radius of the player
+    :param ready_slack: How much later a crop may mature and still be grouped with the seed crop
+    :param deadline: perf_counter time after which no more sites are built
+    :return: List of HarvestSite covering every crop at most once, and every crop if the deadline was not hit.
+    Sites are built in ready order, so a list cut short by the deadline holds the earliest crops.
+    """
+    uncovered: Dict[Tuple[int, int], IndexedCrop] = {(c.position.x, c.position.y): c for c in crops}
+    reach = 2 * harvest_radius
+    sites = []
+    for seed in sorted(crops, key=lambda c: (c.ready_turn, -c.value)):
+        sx, sy = seed.position.x, seed.position.y
+        if (sx, sy) not in uncovered:
+            continue
+        if sites and deadline is not None and time.perf_counter() >= deadline:
+            break
+        horizon = seed.ready_turn + ready_slack
+        # Only crops within twice the radius of the seed share a standing tile with it; they are
+        # collected once, in row order, and every candidate tile is scored against them alone
+        nearby = []
+        for gy in range(sy - reach, sy + reach + 1):
+            gspan = reach - abs(gy - sy)
+            for gx in range(sx - gspan, sx + gspan + 1):
+                crop = uncovered.get((gx, gy))
+                if crop is not None and crop.ready_turn <= horizon:
+                    nearby.append(crop)
+        best_pos = seed.position
+        best_group: List[IndexedCrop] = [seed]
+        best_score = seed.value
+        for dy in range(-harvest_radius, harvest_radius + 1):
+            span = harvest_radius - abs(dy)
+            for dx in range(-span, span + 1):
+                cx, cy = sx + dx, sy + dy
+                group = [crop for crop in nearby
+                         if abs(crop.position.x - cx) + abs(crop.position.y - cy) <= harvest_radius]
+                score = 0.0
+                for crop in group:
+                    score += crop.value
+                if score > best_score or (score == best_score and len(group) > len(best_group)):
+                    best_pos, best_group, best_score = Position(cx, cy), group, score
+        for crop in best_group:
+            del uncovered[(crop.position.x, crop.position.y)]
+        sites.append(HarvestSite(best_pos, best_group))
+    return sites
+
+
+class HarvestRouter:
+    """
+    Plans a multi-turn harvesting tour that ends at the market.
+
+    Sites come from build_sites. A tour is an ordering of sites; it is scheduled by walking it with
+    max_movement per turn, waiting for crops that are not yet ready and detouring to the market
+    whenever the next site would overflow the carrying capacity. Orderings are built by greedy
+    insertion and then improved with 2-opt and or-opt moves until the time budget runs out.
+    """
+
+    def __init__(self, market: Callable[[Position], Position], end_turn: int, time_budget: float = 0.005) -> None:
+        """
+        :param market: Returns the market tile closest to a position
+        :param end_turn: Last turn on which crops can still be sold
+        :param time_budget: Seconds to spend improving a tour
+        """
+        self.market = market
+        self.end_turn = end_turn
+        self.time_budget = time_budget
+
+    def plan(self, start: Position, turn: int, crops: Sequence[IndexedCrop], harvest_radius: int,
+             max_movement: int, capacity: int, load: int = 0) -> HarvestRoute:
+        """
+        Returns the best tour found over the given crops
+        :param start: Current position of the player
+        :param turn: Current turn
+        :param crops: Crops to consider harvesting
+        :param harvest_radius: Harvest radius of the player
+        :param max_movement: Max movement of the player
+        :param capacity: Carrying capacity of the player
+        :param load: Crops the player is already carrying
+        :return: HarvestRoute, whose stops are empty if nothing can be harvested and sold in time
+        """
+        deadline = time.perf_counter() + self.time_budget
+        sites = [site for site in build_sites(crops, harvest_radius, deadline=deadline) if site.load <= capacity]
+        ctx = (start, turn, max_movement, capacity, load)
+        order = self._greedy_insertion(sites, ctx, deadline)
+        order = self._improve(order, ctx, deadline)
+        return self._schedule(order, ctx, build=True)
+
+    def _greedy_insertion(self, sites: List[HarvestSite], ctx, deadline: float) -> List[HarvestSite]:
+        # Sites are inserted one at a time in ready order at their best position. Once the deadline
+        # has passed the tour built so far is kept as it is and the later sites are left out.
+        order: List[HarvestSite] = []
+        best_eval = self._schedule(order, ctx)
+        for site in sorted(sites, key=lambda s: (s.ready_turn, -s.value)):
+            best = None
+            for i in range(len(order) + 1):
+                if order and time.perf_counter() >= deadline:
+                    return order
+                candidate = order[:i] + [site] + order[i:]
+                evaluation = self._schedule(candidate, ctx)
+                if self._better(evaluation, best[0] if best else best_eval):
+                    best = (evaluation, candidate)
+            if best is not None:
+                best_eval, order = best
+        return order
+
+    def _improve(self, order: List[HarvestSite], ctx, deadline: float) -> List[HarvestSite]:
+        best_eval = self._schedule(order, ctx)
+        n = len(order)
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            # 2-opt: reverse a segment
+            for i in range(n - 1):
+                for j in range(i + 1, n):
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    evaluation = self._schedule(candidate, ctx)
+                    if self._better(evaluation, best_eval):
+                        order, best_eval, improved = candidate, evaluation, True
+                if time.perf_counter() >= deadline:
+                    return order
+            # or-opt: move a segment of up to 3 sites elsewhere
+            for length in (1, 2, 3):
+                for i in range(n - length + 1):
+                    segment = order[i:i + length]
+                    rest = order[:i] + order[i + length:]
+                    for j in range(len(rest) + 1):
+                        if j == i:
+                            continue
+                        candidate = rest[:j] + segment + rest[j:]
+                        evaluation = self._schedule(candidate, ctx)
+                        if self._better(evaluation, best_eval):
+                            order, best_eval, improved = candidate, evaluation, True
+                            break
+                if time.perf_counter() >= deadline:
+                    return order
+        return order
+
+    @staticmethod
+    def _better(a: Tuple[float, int], b: Tuple[float, int]) -> bool:
+        # More value sold first, then an earlier finish
+        return a[0] > b[0] + 1e-9 or (abs(a[0] - b[0]) <= 1e-9 and a[1] < b[1])
+
+    def _schedule(self, order: List[HarvestSite], ctx, build: bool = False):
+        """
+        Walks a tour, returning (value sold, finish turn), or a HarvestRoute when build is set.
+        Sites that cannot be reached and sold by end_turn are skipped, without the market detour a full
+        load would have needed to reach them.
+        """
+        start, turn, max_movement, capacity, load = ctx
+        # t is the turn of the last action taken at pos
+        pos, t = start, turn - 1
+        value, pending = 0.0, 0.0
+        stops: List[RouteStop] = []
+        for site in order:
+            full = load + site.load > capacity
+            if full:
+                market = self.market(pos)
+                leave_pos, leave_turn = market, t + travel_turns(pos, market, max_movement)
+            else:
+                leave_pos, leave_turn = pos, t
+            harvest_turn = max(leave_turn + travel_turns(leave_pos, site.position, max_movement), site.ready_turn)
+            if harvest_turn + travel_turns(site.position, self.market(site.position), max_movement) > self.end_turn:
+                continue
+            if full:
+                if build:
+                    stops.append(RouteStop(leave_pos, leave_turn))
+                load, value, pending = 0, value + pending, 0.0
+            pos, t = site.position, harvest_turn
+            load += site.load
+            pending += site.value
+            if build:
+                stops.append(RouteStop(site.position, harvest_turn, site))
+        if pending > 0:
+            market = self.market(pos)
+            t += travel_turns(pos, market, max_movement)
+            value += pending
+            if build:
+                stops.append(RouteStop(market, t))
+        if build:
+            return HarvestRoute(stops, value, t)
+        return value, t
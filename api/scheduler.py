@@ -0,0 +1,263 @@
+"""
+Per-phase time budget for the bot's planners, with a decision that is always ready to send.
+
+A planner is a generator function taking a PlanningContext. It yields whenever it can be paused,
+and proposes decisions through the context as it finds them. A phase first runs its prerequisites,
+such as bringing the bot's state up to date, each to completion in the order they were required,
+whatever the budget. Its planners then run in the order they were registered, and each one's share
+of what is left of the phase budget is proportional to its priority. A planner that uses up its
+share is suspended at its next yield and resumed with whatever budget the others leave. Every
+planner gets to run up to its first yield, even once the budget is gone; planners still running
+after that when the budget is gone are closed.
+
+The decision sent is the last one proposed, or the phase's fallback if nothing was proposed. A
+watchdog thread sends that same decision if the phase is about to run into the engine's timeout,
+for example because a planner stopped yielding.
+"""
+from typing import Callable, Dict, Iterator, List, Optional, Union
+from model.decisions.action_decision import ActionDecision
+from model.decisions.move_decision import MoveDecision
+from model.game_state import GameState
+
+import threading
+import time
+
+Decision = Union[MoveDecision, ActionDecision]
+
+
+class PlanningContext:
+    def __init__(self, phase: str, game_state: GameState, watchdog: "Watchdog") -> None:
+        self.phase = phase
+        self.game_state = game_state
+        self._watchdog = watchdog
+        self.slice_deadline = 0.0
+        # What prerequisites worked out for the planners after them, by whatever name they agree on
+        self.results: Dict[str, object] = {}
+
+    def remaining(self) -> float:
+        """
+        Returns the seconds left in the current planner's share of the budget
+        """
+        return self.slice_deadline - time.monotonic()
+
+    def propose(self, decision: Decision) -> None:
+        """
+        Makes decision the one sent for this phase, unless another is proposed after it
+        """
+        self._watchdog.update(decision)
+
+
+Planner = Callable[[PlanningContext], Iterator[None]]
+
+
+class PlannerStats:
+    def __init__(self, name: str, prerequisite: bool = False) -> None:
+        self.name = name
+        self.prerequisite = prerequisite
+        self.phases = 0
+        self.used = 0.0
+        self.allotted = 0.0
+        self.suspensions = 0
+        self.unfinished = 0
+
+    def utilization(self) -> float:
+        return self.used / self.allotted if self.allotted > 0 else 0.0
+
+    def __str__(self) -> str:
+        if self.prerequisite:
+            return f"{self.name}: {self.phases} phases, {self.used * 1000:.1f}ms, prerequisite"
+        return (f"{self.name}: {self.phases} phases, {self.used * 1000:.1f}ms of {self.allotted * 1000:.1f}ms "
+                f"({self.utilization():.1%}), {self.suspensions} suspended, {self.unfinished} cut off")
+
+
+class Watchdog:
+    """
+    Sends exactly one decision per phase: the latest fallback, either when the scheduler is done
+    or when the deadline passes, whichever comes first.
+    """
+
+    def __init__(self, send: Callable[[str], None]) -> None:
+        """
+        :param send: Sends a decision string to the engine
+        """
+        self._send = send
+        self._wake = threading.Condition()
+        self._deadline: Optional[float] = None
+        self._fallback: Optional[Decision] = None
+        self.sent: Optional[Decision] = None
+        self.fired = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="decision-watchdog", daemon=True)
+        self._thread.start()
+
+    def arm(self, deadline: float, fallback: Decision) -> None:
+        """
+        Starts a phase
+        :param deadline: time.monotonic() by which a decision must have been sent
+        :param fallback: Decision sent if nothing better is ready by then
+        """
+        with self._wake:
+            self._deadline = deadline
+            self._fallback = fallback
+            self.sent = None
+            self._wake.notify()
+
+    def update(self, fallback: Decision) -> None:
+        with self._wake:
+            self._fallback = fallback
+
+    def send(self) -> bool:
+        """
+        Sends the latest fallback and ends the phase
+        :return: False if the deadline had already passed and the watchdog sent it
+        """
+        with self._wake:
+            if self._deadline is None:
+                return False
+            self._finish()
+            return True
+
+    def close(self) -> None:
+        """
+        Stops the watchdog thread, nothing is sent after this
+        """
+        with self._wake:
+            self._closed = True
+            self._deadline = None
+            self._wake.notify()
+        self._thread.join()
+
+    def _finish(self) -> None:
+        # Called with the lock held, so the scheduler and the watchdog can never both send
+        self._deadline = None
+        self.sent = self._fallback
+        self._send(self._fallback.engine_str())
+
+    def _run(self) -> None:
+        with self._wake:
+            while not self._closed:
+                if self._deadline is None:
+                    self._wake.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._wake.wait(remaining)
+                    continue
+                self.fired += 1
+                self._finish()
+
+
+class TurnScheduler:
+    def __init__(self, budget: float, timeout: float, send: Callable[[str], None]) -> None:
+        """
+        :param budget: Seconds of planning per phase
+        :param timeout: Seconds after the start of a phase at which the watchdog sends the fallback
+        :param send: Sends a decision string to the engine
+        """
+        self.budget = budget
+        self.timeout = timeout
+        self.watchdog = Watchdog(send)
+        self._prerequisites: Dict[str, List[tuple]] = {}
+        self._planners: Dict[str, List[tuple]] = {}
+        self.stats: Dict[str, PlannerStats] = {}
+        self.late = 0
+
+    def require(self, phase: str, name: str, planner: Planner) -> None:
+        """
+        Adds a prerequisite to a phase, run to completion before any of its planners, budget or not
+        :param phase: Phase it runs in, e.g. "move" or "action"
+        :param name: Name used in the report, unique across phases
+        :param planner: Generator function taking a PlanningContext
+        """
+        self._prerequisites.setdefault(phase, []).append((name, planner))
+        self.stats[name] = PlannerStats(name, prerequisite=True)
+
+    def register(self, phase: str, name: str, priority: float, planner: Planner) -> None:
+        """
+        Adds a planner to a phase
+        :param phase: Phase it runs in, e.g. "move" or "action"
+        :param name: Name used in the report, unique across phases
+        :param priority: Relative share of the phase budget
+        :param planner: Generator function taking a PlanningContext
+        """
+        self._planners.setdefault(phase, []).append((name, priority, planner))
+        self.stats[name] = PlannerStats(name)
+
+    def run_phase(self, phase: str, game_state: GameState, fallback: Decision) -> Decision:
+        """
+        Runs the phase's planners and sends the decision
+        :param phase: Phase to run
+        :param game_state: State the decision is for
+        :param fallback: Valid decision to send if no planner proposes one in time
+        :return: The decision that was sent
+        """
+        start = time.monotonic()
+        deadline = start + self.budget
+        self.watchdog.arm(start + self.timeout, fallback)
+        context = PlanningContext(phase, game_state, self.watchdog)
+        for name, planner in self._prerequisites.get(phase, []):
+            stats = self.stats[name]
+            stats.phases += 1
+            begin = time.monotonic()
+            context.slice_deadline = deadline
+            for _ in planner(context):
+                pass
+            stats.used += time.monotonic() - begin
+
+        pending = []
+        for name, priority, planner in self._planners.get(phase, []):
+            self.stats[name].phases += 1
+            pending.append((name, priority, planner(context)))
+
+        first_pass = True
+        while pending:
+            now = time.monotonic()
+            if now >= deadline and not first_pass:
+                break
+            shares = max(0.0, deadline - now)
+            total_priority = sum(priority for _, priority, _ in pending)
+            suspended = []
+            for name, priority, steps in pending:
+                stats = self.stats[name]
+                begin = time.monotonic()
+                share = shares * priority / total_priority
+                context.slice_deadline = min(deadline, begin + share)
+                # Utilization is measured against the planner's own share, so more than 100% means it
+                # also used time other planners left over
+                if first_pass:
+                    stats.allotted += share
+                finished = False
+                try:
+                    while True:
+                        next(steps)
+                        if time.monotonic() >= context.slice_deadline:
+                            break
+                except StopIteration:
+                    finished = True
+                stats.used += time.monotonic() - begin
+                if not finished:
+                    stats.suspensions += 1
+                    suspended.append((name, priority, steps))
+            pending = suspended
+            first_pass = False
+
+        for name, _, steps in pending:
+            self.stats[name].unfinished += 1
+            steps.close()
+        if not self.watchdog.send():
+            self.late += 1
+        return self.watchdog.sent
+
+    def close(self) -> None:
+        """
+        Stops the watchdog, for when the scheduler's game is over but the process goes on
+        """
+        self.watchdog.close()
+
+    def report(self) -> List[str]:
+        """
+        Returns one line per planner on how much of its budget it used, and one on the watchdog
+        """
+        lines = [str(stats) for stats in self.stats.values()]
+        lines.append(f"watchdog: {self.watchdog.fired} fallback(s) sent, {self.late} decision(s) too late")
+        return lines
@@ -0,0 +1,173 @@
+"""
+Per-turn game telemetry.
+
+Every turn adds one fixed-schema row to columns that are preallocated arrays. Given a path, rows are
+appended to it every flush_every turns, so a bot that is killed keeps most of its game, as CSV or
+JSON Lines, gzip-compressed if the path ends in .gz. tools.telemetry_merge combines the files of many
+games.
+"""
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import csv
+import gzip
+import json
+
+FORMAT_VERSION = 1
+
+# Rows recorded between appends to the file
+FLUSH_EVERY = 20
+
+# Column name and array typecode, in the order Telemetry.record takes them
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("turn", "I"),
+    ("money", "d"),
+    ("seeds", "I"),                 # seeds in our inventory
+    ("harvested", "I"),             # crops we carry
+    ("crops_planted", "I"),         # our crops that have shown up on the board so far
+    ("crops", "I"),                 # our crops on the board
+    ("crops_ready", "I"),           # of those, the ones that can be harvested
+    ("crops_lost", "I"),            # our crops that went away without us harvesting them so far
+    ("mode", "B"),                  # what the bot was doing when it decided the action
+    ("market_distance", "I"),
+    ("invalid_decisions", "I"),     # decisions the engine rejected in this turn's feedback
+    ("opponent_x", "i"),
+    ("opponent_y", "i"),
+)
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+
+
+def open_text(path: str, mode: str):
+    """
+    Opens a telemetry file for reading ("r"), writing ("w") or appending ("a") as text, through gzip if
+    path ends in .gz. Appending to a gzip file adds a member to it, which gzip readers read through.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", newline="")
+    return open(path, mode, newline="")
+
+
+class Telemetry:
+    def __init__(self, capacity: int = 256, labels: Optional[Dict[str, Dict[int, str]]] = None,
+                 path: Optional[str] = None, meta: Optional[Dict] = None, flush_every: int = FLUSH_EVERY) -> None:
+        """
+        :param capacity: Rows to allocate up front, more are added if the game runs longer
+        :param labels: Column name to a dict of value to the label written in its place, e.g. BotMode names
+        :param path: File the rows are appended to as they are recorded, if any, see flush
+        :param meta: Written in the header line of JSON Lines files, e.g. the loadout, ignored for CSV
+        :param flush_every: Rows to record between appends to path
+        """
+        self.capacity = capacity
+        self.labels = labels or {}
+        self.path = path
+        self.meta = meta
+        self.flush_every = flush_every
+        self.rows = 0
+        self.flushed = 0
+        self._started = False
+        self._columns = [array(code, bytes(array(code).itemsize * capacity)) for _, code in COLUMNS]
+
+    def record(self, *values) -> None:
+        """
+        Adds a row, and appends the rows not yet in the file to it every flush_every rows
+        :param values: One value per column, in COLUMNS order
+        """
+        row = self.rows
+        if row == self.capacity:
+            self._grow()
+        for column, value in zip(self._columns, values):
+            column[row] = value
+        self.rows = row + 1
+        if self.path is not None and self.rows - self.flushed >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Appends the rows recorded since the last flush to path. The first flush starts the file over
+        with its header, so call it at the end of the game too, even if no rows were recorded.
+        """
+        if self.path is None or (self._started and self.flushed == self.rows):
+            return
+        with open_text(self.path, "a" if self._started else "w") as f:
+            self._write_rows(f, self.path, self.flushed, header=not self._started, meta=self.meta)
+        self._started = True
+        self.flushed = self.rows
+
+    def _grow(self) -> None:
+        for column in self._columns:
+            column.frombytes(bytes(column.itemsize * self.capacity))
+        self.capacity *= 2
+
+    def column(self, name: str) -> array:
+        """
+        Returns the recorded values of a column
+        """
+        return self._columns[COLUMN_NAMES.index(name)][:self.rows]
+
+    def iter_rows(self, start: int = 0) -> Iterator[List]:
+        """
+        Yields the recorded rows with labels applied
+        :param start: First row to yield
+        """
+        columns = [column[start:self.rows] for column in self._columns]
+        labels = [self.labels.get(name) for name in COLUMN_NAMES]
+        for row in zip(*columns):
+            yield [value if label is None else label.get(value, value) for value, label in zip(row, labels)]
+
+    def write(self, path: str, meta: Optional[Dict] = None) -> None:
+        """
+        Writes all the rows to path, as JSON Lines if it ends in .jsonl or .jsonl.gz and as CSV otherwise
+        :param meta: Written in the header line of JSON Lines files, e.g. the loadout, ignored for CSV
+        """
+        with open_text(path, "w") as f:
+            self._write_rows(f, path, 0, header=True, meta=meta)
+
+    def _write_rows(self, f, path: str, start: int, header: bool, meta: Optional[Dict]) -> None:
+        if ".jsonl" in path:
+            if header:
+                f.write(json.dumps({"v": FORMAT_VERSION, "columns": COLUMN_NAMES, **(meta or {})}) + "\n")
+            for row in self.iter_rows(start):
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+        else:
+            writer = csv.writer(f)
+            if header:
+                writer.writerow(COLUMN_NAMES)
+            writer.writerows(self.iter_rows(start))
+
+
+def read_telemetry(path: str) -> Tuple[Dict, List[str], List[List]]:
+    """
+    Reads a file written by Telemetry. A file cut short, by a bot killed while appending to it, is
+    read up to its last complete row.
+    :return: (meta, column names, rows). CSV values are parsed back into numbers where they are numbers.
+    """
+    with open_text(path, "r") as f:
+        lines = _complete_lines(f)
+        if ".jsonl" in path:
+            meta = json.loads(lines[0])
+            return meta, meta["columns"], [json.loads(line) for line in lines[1:] if line.strip()]
+        reader = csv.reader(lines)
+        names = next(reader)
+        rows = [[_number(value) for value in row] for row in reader]
+        return {}, names, rows
+
+
+def _complete_lines(f) -> List[str]:
+    lines = []
+    try:
+        for line in f:
+            lines.append(line)
+    except EOFError:
+        pass
+    if lines and not lines[-1].endswith("\n"):
+        lines.pop()
+    return lines
+
+
+def _number(value: str):
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            continue
+    return value
@@ -0,0 +1,158 @@
+from typing import Dict, Iterable, List, Optional
+from api.constants import Constants
+from api.crop_index import IndexedCrop
+from model.game_state import GameState
+from model.item_type import ItemType
+from model.player import Player
+from model.position import Position
+
+constants = Constants()
+
+NEVER = 1 << 30
+
+
+def opponent_reach(opponent: Player) -> int:
+    """
+    Returns the most tiles the opponent could move in one turn, counting a coffee thermos it could still use
+    :param opponent: Opponent Player
+    :return: Movement per turn
+    """
+    movement = opponent.max_movement
+    if opponent.has_coffee_thermos or (opponent.item == ItemType.COFFEE_THERMOS and not opponent.used_item):
+        movement *= constants.COFFEE_THERMOS_MOVEMENT_MULTIPLIER
+    return movement
+
+
+class ThreatMap:
+    """
+    Earliest turn on which the opponent could harvest each tile.
+
+    The board has no obstacles, so the distance transform from the opponent is the Manhattan
+    distance. Each tile costs one lookup, in a table of turns indexed by distance, at its column's
+    distance plus its row's. Tiles under our scarecrow or inside the protection radius around guard
+    are never harvestable.
+
+    The grid follows the size of the tile map of the states it is updated with; width and height
+    are only the size it starts with.
+
+    Grids for positions we expect to see next can be built ahead of time with precompute, and compute
+    picks them up when the real positions match.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.turn = 0
+        self.turns: List[List[int]] = [[NEVER] * width for _ in range(height)]
+        self._precomputed: Dict[tuple, List[List[int]]] = {}
+        self.precomputed_hits = 0
+
+    def update(self, game_state: GameState, guard: Optional[Position] = None) -> None:
+        """
+        Recomputes the map for a new game state
+        :param game_state: GameState containing information for the game
+        :param guard: Where we will be standing, defaults to our current position
+        """
+        self._fit(game_state)
+        me = game_state.get_my_player()
+        opponent = game_state.get_opponent_player()
+        self.turn = game_state.turn
+        self.compute(opponent.position, opponent_reach(opponent), opponent.harvest_radius,
+                     me.position if guard is None else guard, me.protection_radius)
+        opponent_id = 2 if game_state.player_num == 1 else 1
+        for (x, y), tile in game_state.tile_map.special_tiles.items():
+            if tile.scarecrow_effect >= 0 and tile.has_scarecrow_effect(opponent_id):
+                self.turns[y][x] = NEVER
+
+    def precompute_update(self, game_state: GameState, turn: int, guard: Position, opponent_position: Position) -> None:
+        """
+        Precomputes the map update would build for a later state of this game
+        :param game_state: Current GameState, for the players' stats
+        :param turn: Turn of the expected state
+        :param guard: Where we expect to be
+        :param opponent_position: Where we expect the opponent to be
+        """
+        self._fit(game_state)
+        me = game_state.get_my_player()
+        opponent = game_state.get_opponent_player()
+        self.precompute(turn, opponent_position, opponent_reach(opponent), opponent.harvest_radius, guard,
+                        me.protection_radius)
+
+    def _fit(self, game_state: GameState) -> None:
+        tile_map = game_state.tile_map
+        if (tile_map.map_width, tile_map.map_height) != (self.width, self.height):
+            self.width, self.height = tile_map.map_width, tile_map.map_height
+            self.turns = [[NEVER] * self.width for _ in range(self.height)]
+            self._precomputed.clear()
+
+    def compute(self, source: Position, movement: int, harvest_radius: int, guard: Optional[Position] = None,
+                protection_radius: int = 0) -> None:
+        """
+        Fills the map for an opponent at source
+        :param source: Opponent position
+        :param movement: Tiles the opponent moves per turn
+        :param harvest_radius: Harvest radius of the opponent
+        :param guard: Position whose protection radius blocks harvesting, if any
+        :param protection_radius: Protection radius around guard
+        """
+        key = self._key(self.turn, source, movement, harvest_radius, guard, protection_radius)
+        turns = self._precomputed.pop(key, None)
+        if turns is None:
+            turns = self._grid(*key)
+        else:
+            self.precomputed_hits += 1
+        self.turns = turns
+        # Guesses for this turn or earlier can no longer match
+        for stale in [k for k in self._precomputed if k[0] <= self.turn]:
+            del self._precomputed[stale]
+
+    def precompute(self, turn: int, source: Position, movement: int, harvest_radius: int,
+                   guard: Optional[Position] = None, protection_radius: int = 0) -> None:
+        """
+        Builds the map for positions expected on a later update, takes the same arguments as compute
+        :param turn: Turn of the game state the guess is for
+        """
+        key = self._key(turn, source, movement, harvest_radius, guard, protection_radius)
+        if key not in self._precomputed:
+            self._precomputed[key] = self._grid(*key)
+
+    @staticmethod
+    def _key(turn: int, source: Position, movement: int, harvest_radius: int, guard: Optional[Position],
+             protection_radius: int) -> tuple:
+        guard_xy = None if guard is None or protection_radius < 0 else (guard.x, guard.y)
+        return turn, source.x, source.y, max(1, movement), harvest_radius, guard_xy, protection_radius
+
+    def _grid(self, turn: int, source_x: int, source_y: int, movement: int, harvest_radius: int,
+              guard_xy: Optional[tuple], protection_radius: int) -> List[List[int]]:
+        width, height = self.width, self.height
+        # Moving and harvesting happen on the same turn, so anything within movement + radius is reachable now
+        by_distance = [turn + max(0, (d - harvest_radius + movement - 1) // movement - 1) for d in range(width + height)]
+        columns = [abs(x - source_x) for x in range(width)]
+        turns = [[by_distance[dx + abs(y - source_y)] for dx in columns] for y in range(height)]
+        if guard_xy is not None:
+            guard_x, guard_y = guard_xy
+            for y in range(max(0, guard_y - protection_radius), min(height, guard_y + protection_radius + 1)):
+                span = protection_radius - abs(y - guard_y)
+                lo, hi = max(0, guard_x - span), min(width, guard_x + span + 1)
+                turns[y][lo:hi] = [NEVER] * (hi - lo)
+        return turns
+
+    def earliest_harvest(self, pos: Position) -> int:
+        """
+        Returns the earliest turn the opponent could harvest the tile, or NEVER
+        """
+        return self.turns[pos.y][pos.x]
+
+    def is_at_risk(self, crop: IndexedCrop, our_turn: int) -> bool:
+        """
+        Returns whether the opponent could harvest a crop before we get to it
+        :param crop: Crop to check
+        :param our_turn: Turn on which we would harvest it
+        """
+        return max(self.turns[crop.position.y][crop.position.x], crop.ready_turn) < our_turn
+
+    def safest_first(self, positions: Iterable[Position]) -> List[Position]:
+        """
+        Returns positions ordered from the one the opponent can reach last to the one it reaches first
+        """
+        return sorted(positions, key=lambda pos: -self.turns[pos.y][pos.x])
@@ -0,0 +1,28 @@
+"""
+Stable, seeded game states for the benchmarks. The same seed always produces the same JSON.
+"""
+from typing import Dict
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from tools.gamestate_generator import GameStateGenerator
+
+# Turn, and fraction of plantable tiles holding a crop, at each stage of a game
+DENSITIES = {
+    "early": (20, 0.02),
+    "mid": (90, 0.15),
+    "late": (150, 0.40),
+}
+
+LOADOUT = (ItemType.COFFEE_THERMOS, UpgradeType.LONGER_LEGS)
+
+
+def gamestate_dict(stage: str = "mid", seed: int = 27) -> Dict:
+    """
+    Returns a gamestate dict shaped like the ones the engine sends
+    :param stage: "early", "mid" or "late", controls the turn and crop density
+    :param seed: Random seed
+    :return: Dict ready for GameState
+    """
+    turn, density = DENSITIES[stage]
+    generator = GameStateGenerator(crop_density=density, p1_loadout=LOADOUT, p2_loadout=LOADOUT, seed=seed)
+    return generator.generate(turn)
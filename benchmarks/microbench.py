@@ -0,0 +1,244 @@
+"""
+Microbenchmarks for the model, the api helpers and the bot's decision phases.
+
+    python -m benchmarks.microbench                          # run everything
+    python -m benchmarks.microbench -k within_ --quick       # only matching benchmarks
+    python -m benchmarks.microbench --save baseline.json
+    python -m benchmarks.microbench --compare baseline.json --threshold 0.15
+
+Throughput is the best of several timed repeats. Allocation is the peak traced memory of a single
+call, measured in a separate tracemalloc pass so it does not skew the timings.
+"""
+from contextlib import redirect_stderr
+from typing import Callable, Dict, List, Optional
+from api import game_util
+from api.constants import Constants
+from api.crop_index import CropIndex, CropOwner
+from api.item_effects import EFFECT_RADIUS, ItemEffects
+from api.threat_map import ThreatMap
+from benchmarks.fixtures import DENSITIES, gamestate_dict
+from model.crop_type import CropType
+from model.decisions.buy_decision import BuyDecision
+from model.decisions.do_nothing_decision import DoNothingDecision
+from model.decisions.harvest_decision import HarvestDecision
+from model.decisions.move_decision import MoveDecision
+from model.decisions.plant_decision import PlantDecision
+from model.decisions.use_item_decision import UseItemDecision
+from model.game_state import GameState
+from model.item_type import ItemType
+from model.position import Position
+from model.tile_type import TileType
+from model.upgrade_type import UpgradeType
+from tools.decision_regression import OfflineGame
+import bot
+
+import argparse
+import copy
+import io
+import json
+import re
+import sys
+import time
+import tracemalloc
+
+constants = Constants()
+
+
+class Benchmark:
+    def __init__(self, name: str, func: Callable[[], object], setup: Optional[Callable[[], None]] = None) -> None:
+        """
+        :param name: Name used in reports and baselines
+        :param func: The operation to time
+        :param setup: Run before every call of func, outside of the timing
+        """
+        self.name = name
+        self.func = func
+        self.setup = setup
+
+    def time_once(self, number: int) -> float:
+        func, setup = self.func, self.setup
+        if setup is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            return time.perf_counter() - start
+        total = 0.0
+        for _ in range(number):
+            setup()
+            start = time.perf_counter()
+            func()
+            total += time.perf_counter() - start
+        return total
+
+    def ops_per_sec(self, min_time: float, repeats: int) -> float:
+        number = 1
+        while True:
+            elapsed = self.time_once(number)
+            if elapsed >= min_time / 10 or number >= 1 << 20:
+                break
+            number *= 4
+        number = max(1, int(number * (min_time / max(elapsed, 1e-9))))
+        best = min(self.time_once(number) for _ in range(repeats))
+        return number / best
+
+    def allocated_bytes(self) -> int:
+        if self.setup is not None:
+            self.setup()
+        tracemalloc.start()
+        try:
+            self.func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+def player_with(game_state: GameState, **attributes):
+    player = copy.copy(game_state.get_my_player())
+    for name, value in attributes.items():
+        setattr(player, name, value)
+    return player
+
+
+def own_crops(game_state: GameState) -> None:
+    """
+    Makes every crop on the board the bot's, so that harvesting has crops to route over
+    """
+    crop_index = bot.state.crop_index
+    crop_index.update(game_state)
+    crop_index.confirm_planted([crop.position for crop in crop_index.crops_of(CropOwner.OPPONENT)])
+
+
+def collect() -> List[Benchmark]:
+    benchmarks = []
+    states: Dict[str, GameState] = {}
+    for stage in DENSITIES:
+        state = gamestate_dict(stage)
+        text = json.dumps(state)
+        states[stage] = GameState(state)
+        benchmarks.append(Benchmark(f"game_state[{stage}]", lambda state=state: GameState(state)))
+        benchmarks.append(Benchmark(f"receive_gamestate[{stage}]", lambda text=text: GameState(json.loads(text))))
+
+    mid = states["mid"]
+    tile_map = mid.tile_map
+    for tile_type in (TileType.F_BAND_MID, TileType.F_BAND_OUTER):
+        for direction in (-1, 1):
+            benchmarks.append(Benchmark(f"fertility_band_level[{tile_type},{direction}]",
+                                        lambda t=tile_type, d=direction: tile_map.get_fertility_band_level(t, d)))
+
+    coffee = constants.COFFEE_THERMOS_MOVEMENT_MULTIPLIER
+    for speed in sorted({constants.MAX_MOVEMENT, constants.LONGER_LEGS_MAX_MOVEMENT,
+                         constants.MAX_MOVEMENT * coffee, constants.LONGER_LEGS_MAX_MOVEMENT * coffee}):
+        player = player_with(mid, max_movement=speed)
+        benchmarks.append(Benchmark(f"within_move_range[{speed}]",
+                                    lambda p=player: game_util.within_move_range(mid, p, p.position)))
+    for radius in sorted({constants.HARVEST_RADIUS, constants.SCYTHE_HARVEST_RADIUS}):
+        player = player_with(mid, harvest_radius=radius)
+        benchmarks.append(Benchmark(f"within_harvest_range[{radius}]",
+                                    lambda p=player: game_util.within_harvest_range(mid, p)))
+    for radius in sorted({constants.PLANT_RADIUS, constants.SEED_A_PULT_PLANT_RADIUS}):
+        player = player_with(mid, plant_radius=radius)
+        benchmarks.append(Benchmark(f"within_plant_range[{radius}]",
+                                    lambda p=player: game_util.within_plant_range(mid, p)))
+
+    crop_index = CropIndex()
+    crop_index.update(mid)
+    threat_map = ThreatMap(constants.BOARD_WIDTH, constants.BOARD_HEIGHT)
+    threat_map.update(mid)
+    effects = ItemEffects(constants.BOARD_WIDTH, constants.BOARD_HEIGHT)
+    for item in EFFECT_RADIUS:
+        def score_map(item=item):
+            effects.update(mid, crop_index, threat_map)
+            return effects.score_map(item)
+        benchmarks.append(Benchmark(f"item_score_map[{item}]", score_map))
+
+    a, b = Position(3, 17), Position(21, 40)
+    benchmarks.extend([
+        Benchmark("position_add", lambda: a + b),
+        Benchmark("position_sub", lambda: a - b),
+        Benchmark("position_mul", lambda: a * 3),
+        Benchmark("position_distance", lambda: a.distance(b)),
+        Benchmark("position_clamp_magnitude", lambda: (b - a).clamp_magnitude(10)),
+        Benchmark("position_hash", lambda: hash(a)),
+        Benchmark("position_eq", lambda: a == b),
+        Benchmark("position_set_build", lambda: {Position(x, y) for x in range(10) for y in range(10)}),
+    ])
+
+    positions = game_util.within_plant_range(mid, player_with(mid, plant_radius=constants.SEED_A_PULT_PLANT_RADIUS))
+    crops = [CropType.CORN] * len(positions)
+    decisions = {
+        "move": MoveDecision(Position(12, 30)),
+        "buy": BuyDecision([CropType.CORN, CropType.GRAPE, CropType.DUCHAM_FRUIT], [10, 5, 1]),
+        "harvest": HarvestDecision(positions),
+        "plant": PlantDecision(crops, positions),
+        "do_nothing": DoNothingDecision(),
+        "use_item": UseItemDecision(),
+    }
+    for name, decision in decisions.items():
+        benchmarks.append(Benchmark(f"engine_str[{name}]", decision.engine_str))
+    benchmarks.extend([
+        Benchmark("engine_str[position]", a.engine_str),
+        Benchmark("engine_str[item]", ItemType.COFFEE_THERMOS.engine_str),
+        Benchmark("engine_str[upgrade]", UpgradeType.LONGER_LEGS.engine_str),
+        Benchmark("engine_str[crop]", CropType.GOLDEN_CORN.engine_str),
+    ])
+
+    for stage, state in states.items():
+        game = OfflineGame(state)
+        for mode in bot.BotMode:
+            def setup(mode=mode, state=state):
+                bot.reset()
+                bot.state.mode = mode
+                if mode == bot.BotMode.HARVESTING:
+                    own_crops(state)
+            benchmarks.append(Benchmark(f"bot_move[{stage},{mode.name}]", lambda g=game: bot.get_move_decision(g), setup))
+            benchmarks.append(Benchmark(f"bot_action[{stage},{mode.name}]", lambda g=game: bot.get_action_decision(g), setup))
+    return benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the microbenchmarks")
+    parser.add_argument("-k", dest="pattern", help="Only run benchmarks whose name matches this regex")
+    parser.add_argument("--quick", action="store_true", help="Shorter runs, noisier numbers")
+    parser.add_argument("--save", help="Write the results as a baseline file")
+    parser.add_argument("--compare", help="Baseline file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Fail when throughput drops by more than this fraction of the baseline")
+    args = parser.parse_args()
+
+    min_time, repeats = (0.02, 3) if args.quick else (0.2, 5)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    with redirect_stderr(io.StringIO()):
+        benchmarks = collect()
+    for benchmark in benchmarks:
+        if args.pattern and not re.search(args.pattern, benchmark.name):
+            continue
+        with redirect_stderr(io.StringIO()):
+            ops = benchmark.ops_per_sec(min_time, repeats)
+            allocated = benchmark.allocated_bytes()
+        results[benchmark.name] = {"ops_per_sec": ops, "alloc_bytes": allocated}
+        line = f"{benchmark.name:<48} {ops:>14,.0f} ops/s {allocated / 1024:>10.1f} KiB"
+        previous = baseline.get(benchmark.name)
+        if previous:
+            change = ops / previous["ops_per_sec"] - 1
+            line += f" {change:+7.1%}"
+            if change < -args.threshold:
+                line += " REGRESSION"
+                regressions.append(benchmark.name)
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
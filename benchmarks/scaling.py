@@ -0,0 +1,60 @@
+"""
+How parsing and per-turn bookkeeping scale with board area and crop count.
+
+    python -m benchmarks.scaling --scales 1 4 16 100 --densities 0.02 0.15 0.4
+
+Boards are the default board scaled up in both directions so that area grows by each factor.
+"""
+from api.constants import Constants
+from api.crop_index import CropIndex
+from api.threat_map import ThreatMap
+from model.game_state import GameState
+from model.tile_type import TileType
+from tools.gamestate_generator import GameStateGenerator
+
+import argparse
+import json
+import math
+import time
+
+constants = Constants()
+
+
+def best_of(func, repeats: int) -> float:
+    best = math.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how the parse and decision paths scale with the board")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 4, 16, 100], help="Board area multipliers")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.02, 0.15, 0.4])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'width':>6} {'height':>6} {'density':>7} {'crops':>8} {'json MB':>8} "
+          f"{'parse ms':>9} {'band ms':>8} {'index ms':>9} {'threat ms':>9}")
+    for scale in args.scales:
+        width = int(constants.BOARD_WIDTH * math.sqrt(scale))
+        height = int(constants.BOARD_HEIGHT * math.sqrt(scale))
+        for density in args.densities:
+            generator = GameStateGenerator(width, height, density, band_row=height // 2, seed=args.seed)
+            text = generator.generate_text(90)
+            game_state = GameState(json.loads(text))
+            crops = len(game_state.tile_map.crop_tiles())
+            parse = best_of(lambda: GameState(json.loads(text)), args.repeats)
+            band = best_of(lambda: game_state.tile_map.get_fertility_band_level(TileType.F_BAND_INNER), args.repeats)
+            index = best_of(lambda: CropIndex().update(game_state), args.repeats)
+            threat_map = ThreatMap(width, height)
+            threat = best_of(lambda: threat_map.update(game_state), args.repeats)
+            print(f"{width:>6} {height:>6} {density:>7.2f} {crops:>8} {len(text) / 1e6:>8.1f} "
+                  f"{parse * 1000:>9.2f} {band * 1000:>8.3f} {index * 1000:>9.2f} {threat * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Startup benchmark: launches the bot the way the engine does and times how long the engine waits.
+
+    python -m benchmarks.startup                 # warm starts, config snapshot in place
+    python -m benchmarks.startup --cold          # remove the config snapshot before every start
+    python -m benchmarks.startup --runs 20 --bot path/to/bot.py
+
+Three times are reported for each start, all measured from process launch:
+    heartbeat   the first line the engine reads
+    handshake   heartbeat, item and upgrade all sent
+    decision    the move decision for the first game state, which is written as soon as the handshake is done
+"interpreter" is a bare python start, the floor for all of them.
+"""
+from typing import Dict, List
+from api import config
+from benchmarks.fixtures import gamestate_dict
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_start(command: List[str], first_state: str) -> Dict[str, float]:
+    """
+    Starts the bot once and times the handshake and the first decision
+    :param command: Command that runs the bot
+    :param first_state: Game state JSON line sent once the handshake is done
+    :return: Seconds from launch to each phase
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True, bufsize=1)
+    try:
+        times = {}
+        for phase in ("heartbeat", "item", "handshake"):
+            if not process.stdout.readline():
+                raise RuntimeError(f"bot exited before sending its {phase}")
+            times[phase] = time.perf_counter() - start
+        del times["item"]
+        process.stdin.write(first_state)
+        process.stdin.flush()
+        if not process.stdout.readline():
+            raise RuntimeError("bot exited before sending its first decision")
+        times["decision"] = time.perf_counter() - start
+        return times
+    finally:
+        process.kill()
+        process.wait()
+
+
+def time_interpreter() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the bot's startup")
+    parser.add_argument("--bot", default=os.path.join(ROOT, "bot.py"), help="Bot script to start")
+    parser.add_argument("--runs", type=int, default=10, help="Number of starts")
+    parser.add_argument("--cold", action="store_true", help="Remove the config snapshot before every start")
+    args = parser.parse_args()
+
+    state = gamestate_dict("early")
+    state["playerNum"] = 1
+    first_state = json.dumps(state) + "\n"
+    command = [sys.executable, "-u", args.bot]
+
+    results: Dict[str, List[float]] = {"interpreter": []}
+    for _ in range(args.runs):
+        if args.cold:
+            config.clear_cache(remove_snapshot=True)
+        results["interpreter"].append(time_interpreter())
+        for phase, seconds in time_start(command, first_state).items():
+            results.setdefault(phase, []).append(seconds)
+
+    print(f"{'phase':<12} {'min ms':>9} {'median ms':>10} {'max ms':>9}")
+    for phase, samples in results.items():
+        print(f"{phase:<12} {min(samples) * 1000:>9.1f} {statistics.median(samples) * 1000:>10.1f} "
+              f"{max(samples) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,21 @@
+from game import Game
+from api.params import VALUES, param
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+
+# Competitor TODO: choose an item and upgrade for your bot
+# These and the strategy parameters below can be overridden with MM27_<NAME> environment variables, see tools.sweep
+ITEM = ItemType[param("ITEM", "COFFEE_THERMOS")]
+UPGRADE = UpgradeType[param("UPGRADE", "LONGER_LEGS")]
+
+# Run as the bot, the heartbeat, item and upgrade go out before the rest of the bot is imported and set up:
+# the engine is waiting on them, and nothing below is needed before the first game state arrives.
+# The imports below this line are deliberately not at the top of the module (E402); keep them here.
+game = Game(ITEM, UPGRADE) if __name__ == "__main__" else None
+
 from enum import Enum
+from typing import Iterator, Optional
 from networking.io import Logger
-from game import Game
 from api import game_util
 from model.position import Position
 from model.decisions.move_decision import MoveDecision
@@ -9,20 +24,45 @@ from model.decisions.buy_decision import BuyDecision
 from model.decisions.harvest_decision import HarvestDecision
 from model.decisions.plant_decision import PlantDecision
 from model.decisions.do_nothing_decision import DoNothingDecision
+from model.decisions.use_item_decision import UseItemDecision
 from model.tile_type import TileType
-from model.item_type import ItemType
 from model.crop_type import CropType
-from model.upgrade_type import UpgradeType
 from model.game_state import GameState
 from model.player import Player
 from api.constants import Constants
-
+from api.crop_index import CropIndex, CropOwner
+from api.routing import HarvestRouter
+from api.threat_map import ThreatMap
+from api.opponent_model import OpponentModel
+from api.feedback import FeedbackStream, HarvestEvent, MoneyLedger, PlantEvent
+from api.scheduler import PlanningContext, TurnScheduler
+from api.item_effects import EFFECT_RADIUS, ItemEffects
+from api.planting import plan_planting
+from api.telemetry import Telemetry
+
+import atexit
 import random
 import math
+import os
+import time
 
 logger = Logger()
 constants = Constants()
 
+# Seconds of planning per phase, split across the planners registered in make_scheduler
+PLANNING_BUDGET = 0.05
+
+# No more buying seeds after this turn
+BUY_CUTOFF_TURN = param("BUY_CUTOFF_TURN", 170)
+# Head back to the market once the trip there would end after this turn
+RETURN_HORIZON_TURN = param("RETURN_HORIZON_TURN", 179)
+# Switch the target crop to golden corn once we have this much money
+GOLDEN_CORN_MONEY = param("GOLDEN_CORN_MONEY", 1000)
+# Use a rain totem, fertility idol, pesticide or scarecrow on an idle turn once it is worth this much crop value
+ITEM_MIN_SCORE = param("ITEM_MIN_SCORE", 100.0)
+# Hold on to the item while using it within this many turns would be worth more than using it now
+ITEM_HORIZON = param("ITEM_HORIZON", 3)
+
 
 class BotMode(Enum):
     MOVING_TO_BAND = 1
@@ -38,12 +78,54 @@ class BotState:
         self.has_visited_grocer = False
         self.waiting_for_plants = False
         self.target_crop = CropType.DUCHAM_FRUIT
-        self.planted_crops: dict[Position, int] = {}
+        self.crop_index = CropIndex()
+        self.threat_map = ThreatMap(constants.BOARD_WIDTH, constants.BOARD_HEIGHT)
+        self.opponent = OpponentModel()
+        self.item_effects = ItemEffects(constants.BOARD_WIDTH, constants.BOARD_HEIGHT)
+        self.feedback = FeedbackStream()
+        self.money = MoneyLedger(self.feedback)
+        self.feedback.subscribe(HarvestEvent, self.on_harvest)
+        self.feedback.subscribe(PlantEvent, self.on_plant)
         self.mode = BotMode.MOVING_TO_MARKET
 
-    def update_planted_crop_timers(self):
-        for position, timer in self.planted_crops.items():
-            self.planted_crops[position] = timer - 1
+    def on_harvest(self, event: HarvestEvent) -> None:
+        if event.harvester == CropOwner.ME:
+            self.crop_index.confirm_harvested(event.positions)
+        else:
+            self.crop_index.lose(event.positions)
+
+    def on_plant(self, event: PlantEvent) -> None:
+        if event.is_invalid:
+            self.crop_index.cancel_planted(event.positions)
+        else:
+            self.crop_index.confirm_planted(event.positions)
+
+    def observe(self, game_state: GameState) -> None:
+        for _ in self.observe_steps(game_state):
+            pass
+        for _ in self.threat_steps(game_state):
+            pass
+
+    def observe_steps(self, game_state: GameState) -> Iterator[None]:
+        """
+        Takes in the feedback, the crops and the opponent of a new game state, yielding between steps
+        """
+        self.feedback.consume(game_state)
+        self.crop_index.update(game_state)
+        yield
+        self.opponent.update(game_state)
+        if self.feedback.last_turn_invalid > 0:
+            logger.info(f"[Turn {game_state.turn}] {self.feedback.last_turn_invalid} invalid decision(s), "
+                        f"{self.feedback.invalid_decisions} this game")
+
+    def threat_steps(self, game_state: GameState) -> Iterator[None]:
+        """
+        Rebuilds the threat map and the item score maps once observe_steps is done, yielding between them
+        """
+        self.threat_map.update(game_state)
+        yield
+        if ITEM in EFFECT_RADIUS and not game_state.get_my_player().used_item:
+            self.item_effects.update(game_state, self.crop_index, self.threat_map)
 
 
 state: BotState = BotState()
@@ -126,31 +208,101 @@ def closest_market_position(pos: Position) -> Position:
     return target_pos
 
 
-def get_move_decision(game: Game) -> MoveDecision:
+ROUTING_BUDGET = 0.005
+
+
+def make_router() -> HarvestRouter:
+    """
+    Returns a harvest router whose tours end at the market by the turn the bot heads back there
+    """
+    return HarvestRouter(closest_market_position, RETURN_HORIZON_TURN, time_budget=ROUTING_BUDGET)
+
+
+router = make_router()
+
+
+def reset() -> None:
+    """
+    Starts the bot's module-level state over, for playing or replaying another game in the same process
+    """
+    global state, router
+    state = BotState()
+    router = make_router()
+    game_util.fertility_band_forecast.cache_clear()
+
+
+def get_move_decision(game: Game, observe: bool = True) -> MoveDecision:
     """
     Returns a move decision for the turn given the current game state.
 
     :param: game The object that contains the game state and other related information
+    :param: observe Whether to update the bot state from the game state first
     :returns: MoveDecision A location for the bot to move to this turn
     """
-    state.update_planted_crop_timers()
     game_state: GameState = game.get_game_state()
+    if observe:
+        state.observe(game_state)
+    current_mode = choose_move_mode(game_state)
+    if current_mode == BotMode.HARVESTING:
+        return route_move(game_state)
+    return travel_move(game, current_mode)
+
+
+def choose_move_mode(game_state: GameState) -> BotMode:
+    """
+    Updates the bot's mode for the move phase
+    :return: The mode the move is decided in, which the mode may already have moved on from
+    """
     my_player: Player = game_state.get_my_player()
     pos: Position = my_player.position
 
     logger.debug(
         f"[Turn {game_state.turn}] Feedback received from engine: {game_state.feedback}")
 
-    for _, timer in state.planted_crops.items():
-        if timer <= 0:
-            state.mode = BotMode.HARVESTING
+    next_crop = state.crop_index.next_to_mature(CropOwner.ME)
+    if next_crop is not None and next_crop.is_ready(game_state.turn):
+        state.mode = BotMode.HARVESTING
 
     current_mode = state.mode
-    logger.debug(f"Move stage mode: {current_mode}")
+    logger.debug(f"Move stage mode: {current_mode}, opponent looks like a {state.opponent.behavior()}")
 
     market_dist = closest_market_position(pos).distance(pos)
-    if market_dist / my_player.max_movement >= 179-game_state.turn:
+    if market_dist / my_player.max_movement >= RETURN_HORIZON_TURN-game_state.turn:
         state.mode=BotMode.MOVING_TO_MARKET
+    return current_mode
+
+
+def route_move(game_state: GameState) -> MoveDecision:
+    """
+    Returns the move toward the next stop of the harvest route
+    """
+    my_player: Player = game_state.get_my_player()
+    pos: Position = my_player.position
+    route = router.plan(pos, game_state.turn, state.crop_index.crops_of(CropOwner.ME),
+                        my_player.harvest_radius, my_player.max_movement,
+                        my_player.carring_capacity, len(my_player.harvested_inventory))
+    logger.debug(f"Harvest route: {route}")
+    if len(route.stops) > 0:
+        if route.stops[0].is_market():
+            state.mode = BotMode.MOVING_TO_MARKET
+        decision_pos = move_toward_tile(
+            pos, route.next_position(), my_player.max_movement)
+        return MoveDecision(decision_pos)
+    logger.debug(f"Error: In harvest mode with no crops ready")
+    if state.crop_index.next_to_mature(CropOwner.ME) is not None:
+        state.mode = BotMode.WAITING_FOR_PLANTS
+    else:
+        state.mode = BotMode.MOVING_TO_MARKET
+    return MoveDecision(pos)
+
+
+def travel_move(game: Game, current_mode: BotMode) -> MoveDecision:
+    """
+    Returns the move of every mode but harvesting: to the market, to the band, or out of the opponent's way
+    """
+    game_state: GameState = game.get_game_state()
+    my_player: Player = game_state.get_my_player()
+    pos: Position = my_player.position
 
     if current_mode == BotMode.MOVING_TO_MARKET:
         target_pos = closest_market_position(pos)
@@ -175,27 +327,15 @@ def get_move_decision(game: Game) -> MoveDecision:
         if decision_pos == target_pos and game_state.tile_map.get_tile(decision_pos).type.value>=TileType.F_BAND_OUTER.value:
             state.mode = BotMode.PLANTING
         return MoveDecision(decision_pos)
-    elif current_mode == BotMode.HARVESTING:
-        for position, timer in state.planted_crops.items():
-            if timer > 0:
-                continue
-            target_pos = position
-            decision_pos = move_toward_tile(
-                pos, target_pos, my_player.max_movement)
-            return MoveDecision(decision_pos)
-        logger.debug(f"Error: In harvest mode with no timers set to 0")
-        if len(state.planted_crops) > 0:
-            state.mode = BotState.WAITING_FOR_PLANTS
-        else:
-            state.mode = BotState.MOVING_TO_MARKET
-        return MoveDecision(pos)
     elif current_mode == BotMode.WAITING_FOR_PLANTS:
-        min_timer = 100
-        min_pos = pos
-        for position, timer in state.planted_crops.items():
-            if timer < min_timer:
-                min_timer = timer
-                min_pos = position
+        if ITEM in EFFECT_RADIUS and not my_player.used_item:
+            # Stand where the item is worth the most, it is used on the next idle action unless waiting pays
+            reachable = game_util.within_move_range(game_state, my_player, pos) + [pos]
+            item_turn, item_pos, score = state.item_effects.best_activation(ITEM, reachable, ITEM_HORIZON)
+            if item_pos is not None and item_turn == game_state.turn and score >= ITEM_MIN_SCORE:
+                return MoveDecision(item_pos)
+        next_crop = state.crop_index.next_to_mature(CropOwner.ME)
+        min_pos = next_crop.position if next_crop is not None else pos
         max_dist = 0
         max_pos = pos
         for loc in game_util.within_move_range(game_state,my_player,min_pos):
@@ -212,7 +352,7 @@ def get_move_decision(game: Game) -> MoveDecision:
         return MoveDecision(pos)
 
 
-def get_action_decision(game: Game) -> ActionDecision:
+def get_action_decision(game: Game, observe: bool = True) -> ActionDecision:
     """
     Returns an action decision for the turn given the current game state.
 
@@ -220,96 +360,297 @@ def get_action_decision(game: Game) -> ActionDecision:
     HarvestDecision, PlantDecision, or UseItemDecision.
 
     :param: game The object that contains the game state and other related information
+    :param: observe Whether to update the bot state from the game state first
     :returns: ActionDecision A decision for the bot to make this turn
     """
     game_state: GameState = game.get_game_state()
+    if observe:
+        state.observe(game_state)
+    current_mode = choose_action_mode(game_state)
+    if current_mode == BotMode.MOVING_TO_MARKET or current_mode == BotMode.MOVING_TO_BAND:
+        return DoNothingDecision()
+    if current_mode == BotMode.BUYING:
+        return buy_action(game_state)
+    elif current_mode == BotMode.PLANTING:
+        return plant_action(game)
+    else:
+        return harvest_action(game_state)
+
+
+def choose_action_mode(game_state: GameState) -> BotMode:
+    """
+    Updates the target crop for the action phase
+    :return: The mode the action is decided in
+    """
     logger.debug(
         f"[Turn {game_state.turn}] Feedback received from engine: {game_state.feedback}")
 
     my_player: Player = game_state.get_my_player()
-    pos: Position = my_player.position
     current_mode = state.mode
     logger.debug(f"Action stage mode: {current_mode}")
-    seed_inventory = []
-    for seed_type, count in my_player.seed_inventory.items():
-        seed_inventory.extend([seed_type] * count)
-    seeds = len(seed_inventory)
 
     if current_mode == BotMode.MOVING_TO_MARKET or current_mode == BotMode.MOVING_TO_BAND:
         logger.debug(f"Moving to market or band - No actions to take.")
-        return DoNothingDecision()
+        return current_mode
     # Let the crop of focus be the one we have a seed for, if not just choose a random crop
-    if my_player.money >= 1000:
+    if my_player.money >= GOLDEN_CORN_MONEY:
         state.target_crop = CropType.GOLDEN_CORN
         logger.debug(f"Crop of focus: {state.target_crop}")
+    return current_mode
 
-    if current_mode == BotMode.BUYING:
-        if game_state.turn > 170:
-            return DoNothingDecision()
+
+def buy_action(game_state: GameState) -> ActionDecision:
+    my_player: Player = game_state.get_my_player()
+    if game_state.turn > BUY_CUTOFF_TURN:
+        return DoNothingDecision()
+    state.mode = BotMode.MOVING_TO_BAND
+    return BuyDecision([state.target_crop], [min(my_player.carring_capacity,my_player.money // state.target_crop.get_seed_price())])
+
+
+def plant_action(game: Game) -> ActionDecision:
+    game_state: GameState = game.get_game_state()
+    my_player: Player = game_state.get_my_player()
+    seeds = sum(my_player.seed_inventory.values())
+    all_possible_plant_locations = game_util.within_plant_range(game_state,my_player)
+    logger.debug(f"how many locs: {len(all_possible_plant_locations)}")
+    possible_plant_locations = []
+    for loc in all_possible_plant_locations:
+        if not is_unobstructed(loc, game):
+            continue
+        possible_plant_locations.append(loc)
+    # Put each seed where it grows the most, preferring the tiles the opponent can reach last
+    possible_plant_locations = state.threat_map.safest_first(possible_plant_locations)
+    plan = plan_planting(my_player.seed_inventory, possible_plant_locations, game_state.tile_map, game_state.turn)
+    seeds_to_plant: list[CropType] = plan.crop_types
+    chosen_plant_locations: list[Position] = plan.positions
+    how_many_we_can_plant: int = len(plan)
+    logger.debug(f"How many we can plant: {how_many_we_can_plant}, {len(possible_plant_locations)}, {plan}")
+    state.crop_index.mark_planted(chosen_plant_locations)
+    if len(seeds_to_plant)==seeds:
+        state.mode = BotMode.WAITING_FOR_PLANTS
+    if how_many_we_can_plant==0:
         state.mode = BotMode.MOVING_TO_BAND
-        return BuyDecision([state.target_crop], [min(my_player.carring_capacity,my_player.money // state.target_crop.get_seed_price())])
-    elif current_mode == BotMode.PLANTING:
-        all_possible_plant_locations = game_util.within_plant_range(game_state,my_player)
-        logger.debug(f"how many locs: {len(all_possible_plant_locations)}")
-        possible_plant_locations = []
-        for loc in all_possible_plant_locations:
-            if not is_unobstructed(loc, game):
-                continue
-            possible_plant_locations.append(loc)
-        
-        seeds_to_plant: list[CropType] = []
-        chosen_plant_locations: list[Position] = []
-        how_many_we_can_plant: int = min(seeds, len(possible_plant_locations))
-        logger.debug(f"How many we can plant: {how_many_we_can_plant}, {len(possible_plant_locations)}")
-        for i in range(how_many_we_can_plant):
-            seeds_to_plant.append(seed_inventory[i])
-            chosen_plant_locations.append(possible_plant_locations[i])
-            state.planted_crops[pos] = seed_inventory[i].get_growth_time()+1
-        if len(seeds_to_plant)==seeds:
-            state.mode = BotMode.WAITING_FOR_PLANTS
-        if how_many_we_can_plant==0:
-            state.mode = BotMode.MOVING_TO_BAND
-            return DoNothingDecision()
-        logger.debug(f"Planting {len(seeds_to_plant)} seeds")
-        return PlantDecision(seeds_to_plant, chosen_plant_locations)
+        return DoNothingDecision()
+    logger.debug(f"Planting {len(seeds_to_plant)} seeds")
+    return PlantDecision(seeds_to_plant, chosen_plant_locations)
+
+
+def harvest_action(game_state: GameState) -> ActionDecision:
+    my_player: Player = game_state.get_my_player()
+    pos: Position = my_player.position
+    seeds = sum(my_player.seed_inventory.values())
+    possible_harvest_locations = state.crop_index.ready_within(pos, my_player.harvest_radius)
+    # The engine rejects a harvest that would go over the carrying capacity, keep our most valuable crops
+    room = max(0, my_player.carring_capacity - len(my_player.harvested_inventory))
+    if len(possible_harvest_locations) > room:
+        crops = state.crop_index.crops
+        possible_harvest_locations.sort(key=lambda loc: (crops[loc].owner != CropOwner.ME, -crops[loc].value))
+        del possible_harvest_locations[room:]
+    if len(possible_harvest_locations) == 0:
+        if ITEM in EFFECT_RADIUS and not my_player.used_item:
+            item_turn, _, score = state.item_effects.best_activation(ITEM, [pos], ITEM_HORIZON)
+            if item_turn == game_state.turn and score >= ITEM_MIN_SCORE:
+                logger.debug(f"Using {ITEM} for an estimated {score:.0f}")
+                return UseItemDecision()
+        logger.debug(f"No crops to harvest")
+        return DoNothingDecision()
     else:
-        all_possible_harvest_locations = game_util.within_harvest_range(game_state,my_player)
-        possible_harvest_locations = []
-        for loc in all_possible_harvest_locations:
-            if game_state.tile_map.get_tile(loc).is_harvestable_crop(logger):
-                possible_harvest_locations.append(loc)
-        if len(possible_harvest_locations) == 0:
-            logger.debug(f"No crops to harvest")
-            return DoNothingDecision()
-        else:
-            logger.debug(f"Harvesting {len(possible_harvest_locations)} crops")
-            del state.planted_crops[pos]
-            if len(state.planted_crops) == 0:
-                if seeds == 0:
-                    state.mode = BotMode.MOVING_TO_MARKET
-                else:
-                    state.mode = BotMode.PLANTING
-            return HarvestDecision(possible_harvest_locations)
+        logger.debug(f"Harvesting {len(possible_harvest_locations)} crops")
+        state.crop_index.discard(possible_harvest_locations)
+        if state.crop_index.count(CropOwner.ME) == 0:
+            if seeds == 0:
+                state.mode = BotMode.MOVING_TO_MARKET
+            else:
+                state.mode = BotMode.PLANTING
+        return HarvestDecision(possible_harvest_locations)
 
 
-def main():
+# Opponent positions speculate builds a threat map for after a move, besides the current one
+SPECULATED_OPPONENT_POSITIONS = 3
+
+
+def speculate(game_state: GameState, moved_to: Optional[Position]) -> Iterator[None]:
+    """
+    Precomputes what the next state will probably need while the engine works on it. Each yield is a
+    point where the next state can cut it short.
+    :param game_state: The state we just decided on
+    :param moved_to: Where we just moved, or None after an action decision, which ends the turn
+    """
+    if moved_to is None:
+        turn = game_state.turn + 1
+        guard = game_state.get_my_player().position
+        opponent_positions = [game_state.get_opponent_player().position]
+    else:
+        turn = game_state.turn
+        guard = moved_to
+        # The opponent moves before the next state comes in: try where the prediction grid puts it most
+        opponent_positions = state.opponent.likely_positions(1, SPECULATED_OPPONENT_POSITIONS)
+        opponent_positions.append(game_state.get_opponent_player().position)
+    # Planting on turn reads the band forecast of every turn the planted crops grow through
+    crop_types = [crop_type for crop_type, count in game_state.get_my_player().seed_inventory.items() if count > 0]
+    growth_time = max(crop_type.get_growth_time() for crop_type in crop_types + [state.target_crop])
+    for forecast_turn in range(turn, turn + growth_time + 1):
+        game_util.fertility_band_forecast(forecast_turn)
+        yield
+    for opponent_position in opponent_positions:
+        state.threat_map.precompute_update(game_state, turn, guard, opponent_position)
+        yield
+
+
+def make_telemetry(path: Optional[str] = None) -> Telemetry:
+    """
+    Returns the telemetry of a game, appended to path as the game goes if it is given
     """
-    Competitor TODO: choose an item and upgrade for your bot
+    return Telemetry(labels={"mode": {mode.value: mode.name for mode in BotMode}}, path=path,
+                     meta={"item": ITEM.name, "upgrade": UPGRADE.name})
+
+
+def record_telemetry(telemetry: Telemetry, game_state: GameState, mode: BotMode) -> None:
+    """
+    Adds the turn's row to telemetry, from the action phase's state once its decision has been made
+    :param mode: Mode the action was decided in
+    """
+    my_player = game_state.get_my_player()
+    opponent_pos = game_state.get_opponent_player().position
+    pos = my_player.position
+    crop_index = state.crop_index
+    telemetry.record(game_state.turn, my_player.money, sum(my_player.seed_inventory.values()),
+                     len(my_player.harvested_inventory), crop_index.planted[CropOwner.ME],
+                     crop_index.count(CropOwner.ME), len(crop_index.ready_crops(CropOwner.ME)),
+                     crop_index.lost[CropOwner.ME], mode.value, closest_market_position(pos).distance(pos),
+                     state.feedback.last_turn_invalid, opponent_pos.x, opponent_pos.y)
+
+
+def plan_observe(context: PlanningContext) -> Iterator[None]:
+    yield from state.observe_steps(context.game_state)
+
+
+def plan_threat(context: PlanningContext) -> Iterator[None]:
+    yield from state.threat_steps(context.game_state)
+
+
+def plan_move_mode(context: PlanningContext) -> Iterator[None]:
+    context.results["mode"] = choose_move_mode(context.game_state)
+    yield
+
+
+def plan_action_mode(context: PlanningContext) -> Iterator[None]:
+    context.results["mode"] = choose_action_mode(context.game_state)
+    yield
+
+
+def plan_route(context: PlanningContext) -> Iterator[None]:
+    if context.results["mode"] != BotMode.HARVESTING:
+        return
+    # Route improvement is the expensive part of a move, keep it inside this planner's share
+    router.time_budget = max(0.0, min(ROUTING_BUDGET, context.remaining()))
+    context.propose(route_move(context.game_state))
+    yield
+
+
+def plan_travel(context: PlanningContext) -> Iterator[None]:
+    if context.results["mode"] == BotMode.HARVESTING:
+        return
+    context.propose(travel_move(game, context.results["mode"]))
+    yield
+
+
+def plan_buy(context: PlanningContext) -> Iterator[None]:
+    if context.results["mode"] != BotMode.BUYING:
+        return
+    context.propose(buy_action(context.game_state))
+    yield
+
+
+def plan_plant(context: PlanningContext) -> Iterator[None]:
+    if context.results["mode"] != BotMode.PLANTING:
+        return
+    context.propose(plant_action(game))
+    yield
+
+
+def plan_harvest(context: PlanningContext) -> Iterator[None]:
+    if context.results["mode"] not in (BotMode.HARVESTING, BotMode.WAITING_FOR_PLANTS):
+        return
+    context.propose(harvest_action(context.game_state))
+    yield
+
+
+def make_scheduler(game: Game) -> TurnScheduler:
+    """
+    Returns the scheduler that runs the bot's planners each phase. Taking in the game state and picking
+    the mode are prerequisites, so every planner decides on an up to date state; then only the planner
+    for the mode proposes a decision. The watchdog sends the fallback at 80% of the engine's timeout,
+    leaving the rest for decoding the state and writing the decision.
     """
-    game = Game(ItemType.COFFEE_THERMOS, UpgradeType.LONGER_LEGS)
+    scheduler = TurnScheduler(PLANNING_BUDGET, constants.PLAYER_TIMEOUT / 1000 * 0.8, game.send_decision_string)
+    scheduler.require("move", "move_observe", plan_observe)
+    scheduler.require("move", "move_threat", plan_threat)
+    scheduler.require("move", "move_mode", plan_move_mode)
+    scheduler.register("move", "route", 4, plan_route)
+    scheduler.register("move", "travel", 1, plan_travel)
+    scheduler.require("action", "action_observe", plan_observe)
+    scheduler.require("action", "action_threat", plan_threat)
+    scheduler.require("action", "action_mode", plan_action_mode)
+    scheduler.register("action", "buy", 1, plan_buy)
+    scheduler.register("action", "plant", 2, plan_plant)
+    scheduler.register("action", "harvest", 2, plan_harvest)
+    return scheduler
+
+
+def main():
+    global game
+    if game is None:
+        game = Game(ITEM, UPGRADE)
+    # Set MM27_RECORD_DIR to record every game for tools.decision_regression
+    record_dir = os.environ.get("MM27_RECORD_DIR")
+    if record_dir:
+        from networking.recorder import GameRecorder
+
+        # The loadout and the strategy parameters go in the header so a replay runs under the same ones
+        game.recorder = GameRecorder(os.path.join(record_dir, f"game-{int(time.time())}-{os.getpid()}.jsonl.gz"),
+                                     header={"bot": "bot", "item": ITEM.name, "upgrade": UPGRADE.name,
+                                             "params": dict(VALUES)})
+    # Set MM27_PIPELINE to decode states on a background thread and precompute while waiting for them
+    if os.environ.get("MM27_PIPELINE"):
+        from networking.pipeline import StatePipeline
+
+        game.pipeline = StatePipeline().start()
+
+    # Set MM27_TELEMETRY_DIR to write a row per turn there as the game goes, see tools.telemetry_merge
+    telemetry = None
+    telemetry_dir = os.environ.get("MM27_TELEMETRY_DIR")
+    if telemetry_dir:
+        telemetry = make_telemetry(os.path.join(telemetry_dir, f"telemetry-{int(time.time())}-{os.getpid()}.jsonl.gz"))
+        atexit.register(telemetry.flush)
+
+    scheduler = make_scheduler(game)
 
     while (True):
         try:
             game.update_game()
         except IOError:
+            for line in scheduler.report():
+                logger.info(line)
             exit(-1)
-        game.send_move_decision(get_move_decision(game))
+        game_state = game.get_game_state()
+        # Staying put is always a valid move
+        move_decision = scheduler.run_phase("move", game_state, MoveDecision(game_state.get_my_player().position))
+        if game.pipeline is not None:
+            game.pipeline.schedule(speculate(game.get_game_state(), move_decision.pos))
 
         try:
             game.update_game()
         except IOError:
+            for line in scheduler.report():
+                logger.info(line)
             exit(-1)
-        game.send_action_decision(get_action_decision(game))
+        mode = state.mode
+        scheduler.run_phase("action", game.get_game_state(), DoNothingDecision())
+        if telemetry is not None:
+            record_telemetry(telemetry, game.get_game_state(), mode)
+        if game.pipeline is not None:
+            game.pipeline.schedule(speculate(game.get_game_state(), None))
 
 
 if __name__ == "__main__":
@@ -1,29 +1,56 @@
-from model.game_state import GameState
+from typing import TYPE_CHECKING
 from networking import io
 from model.item_type import ItemType
 from model import upgrade_type
-from model.decisions.move_decision import MoveDecision
-from model.decisions.action_decision import ActionDecision
+
+# Only needed for annotations: constructing a Game sends the heartbeat, and it should not wait for the model,
+# the config and the recorder to load
+if TYPE_CHECKING:
+    from model.game_state import GameState
+    from networking.recorder import GameRecorder
+    from networking.pipeline import StatePipeline
+    from model.decisions.move_decision import MoveDecision
+    from model.decisions.action_decision import ActionDecision
 
 
 class Game:
 
-    def __init__(self, item: ItemType, upgrade: upgrade_type):
+    def __init__(self, item: ItemType, upgrade: upgrade_type, recorder: 'GameRecorder' = None):
+        self.recorder = recorder
+        # Set to read and decode states on a background thread
+        self.pipeline: 'StatePipeline' = None
         io.send_heartbeat()
         self.send_item(item)
         self.send_upgrade(upgrade)
 
     def update_game(self) -> None:
-        self.game_state = io.receive_gamestate()
-
-    def get_game_state(self) -> GameState:
+        if self.pipeline is not None:
+            gamestate_dict, self.game_state = self.pipeline.get()
+            if self.recorder is not None:
+                self.recorder.record_state(gamestate_dict)
+            return
+        if self.recorder is None:
+            self.game_state = io.receive_gamestate()
+            return
+        from model.game_state import GameState
+
+        gamestate_dict = io.receive_gamestate_dict()
+        self.recorder.record_state(gamestate_dict)
+        self.game_state = GameState(gamestate_dict)
+
+    def get_game_state(self) -> 'GameState':
         return self.game_state
 
-    def send_move_decision(self, decision: MoveDecision) -> None:
-        io.send_string(decision.engine_str())
+    def send_move_decision(self, decision: 'MoveDecision') -> None:
+        self.send_decision_string(decision.engine_str())
+
+    def send_action_decision(self, decision: 'ActionDecision') -> None:
+        self.send_decision_string(decision.engine_str())
 
-    def send_action_decision(self, decision: ActionDecision) -> None:
-        io.send_string(decision.engine_str())
+    def send_decision_string(self, s: str) -> None:
+        if self.recorder is not None:
+            self.recorder.record_decision(s)
+        io.send_string(s)
 
     def send_item(self, item: ItemType) -> None:
         io.send_string(item.engine_str())
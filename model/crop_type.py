@@ -1,7 +1,6 @@
+from api.config import load_config
+
 from enum import Enum
-from pathlib import Path
-import os
-import configparser
 
 class CropType(Enum):
     GRAPE = 1
@@ -15,11 +14,7 @@ class CropType(Enum):
     NONE = 9
 
     def __init__(self, *args, **kwargs):
-        with open(Path(os.path.dirname(os.path.dirname(__file__))) / "resources" / "mm27.properties") as f:
-            file_content = '[dummy_section]\n' + f.read()
-        config_parser = configparser.RawConfigParser()
-        config_parser.read_string(file_content)
-        self.config = config_parser['dummy_section']
+        self.config = load_config()
 
     def __str__(self):
         return f"{self.name}"
@@ -3,24 +3,104 @@ from model.tile import Tile
 
 from model.position import Position
 
+from bisect import bisect_right
+
+
+def plain_tile_dict(tile_type: str) -> dict:
+    """
+    Returns the tile dict of a tile of the given type with no crop, no placed item and no item effect
+    """
+    return {'type': tile_type, 'crop': {'type': "NONE", 'growthTimer': 0, 'value': 0}, 'p1_item': "NONE",
+            'p2_item': "NONE", 'turnsLeftToGrow': 0, 'rainTotemEffect': -1, 'fertilityIdolEffect': -1,
+            'scarecrowEffect': -1}
+
 
 class TileMap:
+    """
+    Board stored sparsely: each row is a list of (start, end, TileType) runs, usually a single one
+    since fertility bands cover whole rows, and only tiles that differ from the plain tile of their
+    type (plain_tile_dict: no crop, placed item or item effect) get their own Tile. Plain tiles of a
+    type share one Tile object, so Tiles returned by get_tile must not be modified.
+    """
+
     def __init__(self, tilemap_dict) -> None:
         self.map_height = tilemap_dict['mapHeight']
         self.map_width = tilemap_dict['mapWidth']
-        self.tiles: list[list[Tile]] = []
-        for row_list in tilemap_dict['tiles']:
-            tile_row = []
-            for tile in row_list:
-                tile_row.append(Tile(tile))
-            self.tiles.append(tile_row)
+        self.row_spans: list[list[tuple[int, int, TileType]]] = []
+        self.special_tiles: dict[tuple[int, int], Tile] = {}
+        self.plain_tiles: dict[TileType, Tile] = {}
+        self._rows_by_type: dict[TileType, list[int]] = {}
+        self._tiles = None
+        plain_dicts: dict[str, dict] = {}
+        for y, row_list in enumerate(tilemap_dict['tiles']):
+            if not row_list:
+                self.row_spans.append([])
+                continue
+            first = row_list[0]['type']
+            types = [tile['type'] for tile in row_list]
+            if types.count(first) == len(types):
+                spans = [(0, len(types), TileType[first])]
+                plain = plain_dicts.get(first)
+                if plain is None:
+                    plain = plain_dicts[first] = plain_tile_dict(first)
+                specials = [x for x, tile in enumerate(row_list) if tile != plain]
+            else:
+                spans = self._runs(types)
+                for tile_type in set(types):
+                    if tile_type not in plain_dicts:
+                        plain_dicts[tile_type] = plain_tile_dict(tile_type)
+                specials = [x for x, tile in enumerate(row_list) if tile != plain_dicts[tile['type']]]
+            self.row_spans.append(spans)
+            self._rows_by_type.setdefault(spans[0][2], []).append(y)
+            for x in specials:
+                self.special_tiles[(x, y)] = Tile(row_list[x])
+
+    @staticmethod
+    def _runs(types: list) -> list:
+        spans = []
+        start = 0
+        for x in range(1, len(types) + 1):
+            if x == len(types) or types[x] != types[start]:
+                spans.append((start, x, TileType[types[start]]))
+                start = x
+        return spans
+
+    def get_tile_type_xy(self, x: int, y: int) -> TileType:
+        spans = self.row_spans[y]
+        if len(spans) == 1:
+            return spans[0][2]
+        return spans[bisect_right(spans, (x, self.map_width + 1)) - 1][2]
 
     def get_tile_xy(self, x: int, y: int) -> Tile:
-        return self.tiles[y][x]
+        tile = self.special_tiles.get((x, y))
+        if tile is not None:
+            return tile
+        tile_type = self.get_tile_type_xy(x, y)
+        tile = self.plain_tiles.get(tile_type)
+        if tile is None:
+            tile = Tile(plain_tile_dict(tile_type.name))
+            self.plain_tiles[tile_type] = tile
+        return tile
 
     def get_tile(self, pos: Position) -> Tile:
         return self.get_tile_xy(pos.x, pos.y)
 
+    def crop_tiles(self) -> list[tuple[int, int, Tile]]:
+        """
+        Returns (x, y, Tile) for every tile with a crop
+        """
+        return [(x, y, tile) for (x, y), tile in self.special_tiles.items() if tile.crop.type != "NONE"]
+
+    @property
+    def tiles(self) -> list[list[Tile]]:
+        """
+        Dense [y][x] grid of Tiles, built on first use. Prefer get_tile, crop_tiles and special_tiles,
+        which do not scale with board area.
+        """
+        if self._tiles is None:
+            self._tiles = [[self.get_tile_xy(x, y) for x in range(self.map_width)] for y in range(self.map_height)]
+        return self._tiles
+
     def valid_position(self, pos:Position) -> bool:
         return 0 <= pos.x < self.map_width and 0 <= pos.y < self.map_height
 
@@ -32,10 +112,7 @@ class TileMap:
         :param: search_direction: The direction to search in. -1 is from the bottom up, 1 is from the top down.
         :return: The level of the target_type in the fertility band.
         """
-        rows = list(enumerate(self.tiles))
-        if search_direction == -1:
-            rows.reverse()
-        for y, row in rows:
-            if row[0].type == target_type:
-                return y
-        return -1
+        rows = self._rows_by_type.get(target_type)
+        if not rows:
+            return -1
+        return rows[-1] if search_direction == -1 else rows[0]
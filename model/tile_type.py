@@ -1,3 +1,5 @@
+from api.config import load_config
+
 from enum import Enum
 
 class TileType(Enum):
@@ -13,4 +15,5 @@ class TileType(Enum):
         return f"{self.name}"
 
     def get_fertility(self) -> float:
-        return float(self.config[f"tiletype.{self.name.lower()}.fertility"])
+        # The properties file drops the first underscore: GREEN_GROCER is greengrocer, F_BAND_MID is fband_mid
+        return float(load_config()[f"tiletype.{self.name.lower().replace('_', '', 1)}.fertility"])
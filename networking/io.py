@@ -1,22 +1,28 @@
-from model.game_state import GameState
 import sys
 import json
 
 
 def receive_gamestate():
-    gamestate_bytes = sys.stdin.readline()
-    gamestate_dict = json.loads(gamestate_bytes)
-    a = GameState(gamestate_dict)
+    # Imported on first use so that sending the heartbeat does not wait for the model to load
+    from model.game_state import GameState
+
+    a = GameState(receive_gamestate_dict())
     return a
 
+def receive_gamestate_dict() -> dict:
+    gamestate_bytes = sys.stdin.readline()
+    if not gamestate_bytes:
+        raise IOError("the engine closed the connection")
+    return json.loads(gamestate_bytes)
+
 def readline() -> str:
     return sys.stdin.readline()
 
 def send_string(s: str):
-    print(s)
+    print(s, flush=True)
 
 def send_heartbeat():
-    print("heartbeat")
+    print("heartbeat", flush=True)
 
 
 class Logger:
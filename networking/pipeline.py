@@ -0,0 +1,84 @@
+"""
+Pipelined engine input.
+
+The serial loop blocks on stdin, decodes the state, decides and writes, one step after the other. With a
+StatePipeline a reader thread reads and decodes states into a bounded queue instead, and the main thread
+spends the time until the next state arrives on idle tasks: generators that precompute what the next
+decision is likely to need. Every yield in an idle task is a point where the wait can end, so a task
+should do a small amount of work between yields. Tasks still pending when a state arrives are dropped,
+since they were guesses about that state.
+"""
+from model.game_state import GameState
+from typing import Deque, Iterator, Optional, TextIO, Tuple
+
+from collections import deque
+import json
+import queue
+import sys
+import threading
+import time
+
+# Put on the queue when the engine closes stdin
+_EOF = object()
+
+
+class StatePipeline:
+    def __init__(self, stream: Optional[TextIO] = None, maxsize: int = 2) -> None:
+        """
+        :param stream: Where states are read from, defaults to stdin
+        :param maxsize: Decoded states the reader may get ahead by before it blocks
+        """
+        self.stream = sys.stdin if stream is None else stream
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._idle: Deque[Iterator[None]] = deque()
+        self._thread = threading.Thread(target=self._read, name="state-reader", daemon=True)
+        self.decode_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.idle_steps = 0
+        self.idle_dropped = 0
+
+    def start(self) -> "StatePipeline":
+        self._thread.start()
+        return self
+
+    def _read(self) -> None:
+        try:
+            for line in iter(self.stream.readline, ""):
+                start = time.perf_counter()
+                gamestate_dict = json.loads(line)
+                game_state = GameState(gamestate_dict)
+                self.decode_seconds += time.perf_counter() - start
+                self._queue.put((gamestate_dict, game_state))
+        except Exception as e:
+            # Raised again on the main thread by get, where the serial loop would have raised it
+            self._queue.put(e)
+            return
+        self._queue.put(_EOF)
+
+    def schedule(self, task: Iterator[None]) -> None:
+        """
+        Adds an idle task, run by get while no state is waiting
+        """
+        self._idle.append(task)
+
+    def get(self) -> Tuple[dict, GameState]:
+        """
+        Returns the next state, running idle tasks until it is decoded
+        :return: The state as sent by the engine, and decoded
+        """
+        start = time.perf_counter()
+        while self._idle and self._queue.empty():
+            try:
+                next(self._idle[0])
+                self.idle_steps += 1
+            except StopIteration:
+                self._idle.popleft()
+        self.idle_dropped += len(self._idle)
+        self._idle.clear()
+        item = self._queue.get()
+        self.wait_seconds += time.perf_counter() - start
+        if item is _EOF:
+            raise IOError("the engine closed the connection")
+        if isinstance(item, BaseException):
+            raise item
+        return item
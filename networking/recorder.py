@@ -0,0 +1,142 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import atexit
+import gzip
+import json
+import zlib
+
+FORMAT_VERSION = 1
+
+
+def make_patch(old, new):
+    """
+    Returns a patch turning old into new. Unchanged subtrees are left out, so a turn that only
+    touches a few tiles costs a few tiles.
+    :param old: Previous JSON value
+    :param new: Next JSON value
+    :return: ["=", value] to replace, ["d", changes, removed] for dicts or ["l", changes] for lists of equal length
+    """
+    if type(old) is dict and type(new) is dict:
+        changes = {}
+        for key, value in new.items():
+            if key not in old:
+                changes[key] = ["=", value]
+            elif old[key] != value:
+                changes[key] = make_patch(old[key], value)
+        removed = [key for key in old if key not in new]
+        return ["d", changes, removed]
+    if type(old) is list and type(new) is list and len(old) == len(new):
+        changes = {}
+        for i, (a, b) in enumerate(zip(old, new)):
+            if a != b:
+                changes[str(i)] = make_patch(a, b)
+        return ["l", changes]
+    return ["=", new]
+
+
+def apply_patch(old, patch):
+    """
+    Applies a patch from make_patch. Containers along changed paths are copied, everything else is
+    shared with old, which is never modified.
+    """
+    tag = patch[0]
+    if tag == "=":
+        return patch[1]
+    if tag == "d":
+        res = dict(old)
+        for key, sub in patch[1].items():
+            res[key] = apply_patch(old.get(key), sub)
+        for key in patch[2]:
+            res.pop(key, None)
+        return res
+    res = list(old)
+    for i, sub in patch[1].items():
+        res[int(i)] = apply_patch(old[int(i)], sub)
+    return res
+
+
+class GameRecorder:
+    """
+    Records every gamestate received and every decision sent to a gzip-compressed JSON Lines file.
+
+    States are stored as patches against the previous state, with a full keyframe every
+    keyframe_interval states. The stream is sync-flushed at every keyframe so a killed bot
+    loses at most one interval.
+    """
+
+    def __init__(self, path, keyframe_interval: int = 20, header: Optional[Dict] = None) -> None:
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self._file = gzip.open(path, "wt", compresslevel=6)
+        self._previous = None
+        self._states = 0
+        self._write({"v": FORMAT_VERSION, **(header or {})})
+        atexit.register(self.close)
+
+    def _write(self, record: Dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+
+    def record_state(self, gamestate_dict: Dict) -> None:
+        if self._previous is None or self._states % self.keyframe_interval == 0:
+            if self._previous is not None:
+                # GzipFile.flush does a Z_SYNC_FLUSH, so everything so far can be decompressed
+                self._file.flush()
+            self._write({"k": gamestate_dict})
+        else:
+            self._write({"d": make_patch(self._previous, gamestate_dict)})
+        self._previous = gamestate_dict
+        self._states += 1
+
+    def record_decision(self, engine_str: str) -> None:
+        self._write({"o": engine_str})
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_recording(path) -> Iterator[Tuple[str, object]]:
+    """
+    Streams a recording back
+    :param path: File written by GameRecorder
+    :return: Iterator of ("header", dict), ("state", gamestate dict) and ("decision", engine string)
+    """
+    state = None
+    with gzip.open(path, "rt") as f:
+        try:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "k" in record:
+                    state = record["k"]
+                    yield "state", state
+                elif "d" in record:
+                    state = apply_patch(state, record["d"])
+                    yield "state", state
+                elif "o" in record:
+                    yield "decision", record["o"]
+                else:
+                    yield "header", record
+        except (EOFError, zlib.error, json.JSONDecodeError):
+            # The bot was killed mid-write; everything up to the last full record is still good
+            return
+
+
+def load_turns(path) -> Tuple[Dict, List[Tuple[Dict, Optional[str]]]]:
+    """
+    Pairs each recorded state with the decision sent for it
+    :param path: File written by GameRecorder
+    :return: (header, list of (gamestate dict, engine string or None))
+    """
+    header: Dict = {}
+    turns: List[Tuple[Dict, Optional[str]]] = []
+    for kind, value in read_recording(path):
+        if kind == "header":
+            header = value
+        elif kind == "state":
+            turns.append((value, None))
+        elif turns and turns[-1][1] is None:
+            turns[-1] = (turns[-1][0], value)
+    return header, turns
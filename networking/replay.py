@@ -0,0 +1,272 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from model.game_state import GameState
+
+import argparse
+import json
+import mmap
+import os
+import re
+
+# A whole string (so brackets inside strings are skipped) or a single bracket
+TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+QUOTE, LBRACE, LBRACKET = ord('"'), ord('{'), ord('[')
+
+COLUMNS = {
+    "turn": "i",
+    "p1_money": "d",
+    "p2_money": "d",
+    "p1_x": "i",
+    "p1_y": "i",
+    "p2_x": "i",
+    "p2_y": "i",
+    "p1_seeds": "i",
+    "p2_seeds": "i",
+    "p1_harvested": "i",
+    "p2_harvested": "i",
+    "crops": "i",
+}
+
+
+def scan_spans(buf) -> List[Tuple[int, int]]:
+    """
+    Finds the byte span of every entry of a replay without decoding it. Handles a top-level array
+    of entries, JSON Lines, and an object holding the entries in its longest array.
+    :param buf: bytes or mmap of the whole file
+    :return: List of (start, end) offsets, one per entry
+    """
+    stack: List[int] = []
+    top: List[Tuple[int, int]] = []
+    elements: List[Tuple[int, int]] = []
+    root_start = 0
+    elem_start = 0
+    last_key = b""
+    arrays: List[Tuple[bytes, List[Tuple[int, int]]]] = []
+    current: Optional[List[Tuple[int, int]]] = None
+    for match in TOKEN.finditer(buf):
+        start = match.start()
+        char = buf[start]
+        if char == QUOTE:
+            if len(stack) == 1:
+                last_key = match.group()
+            continue
+        if char == LBRACE or char == LBRACKET:
+            stack.append(char)
+            depth = len(stack)
+            if depth == 1:
+                root_start = start
+            elif depth == 2:
+                if stack[0] == LBRACKET:
+                    elem_start = start
+                elif char == LBRACKET:
+                    current = []
+                    arrays.append((last_key, current))
+            elif depth == 3 and current is not None:
+                elem_start = start
+            continue
+        depth = len(stack)
+        if depth == 1:
+            top.append((root_start, start + 1))
+        elif depth == 2:
+            if stack[0] == LBRACKET:
+                elements.append((elem_start, start + 1))
+            else:
+                current = None
+        elif depth == 3 and current is not None:
+            current.append((elem_start, start + 1))
+        stack.pop()
+    if len(top) > 1:
+        # JSON Lines, one entry per top-level value
+        return top
+    if top and buf[top[0][0]] == LBRACKET:
+        return elements
+    if arrays:
+        return max(arrays, key=lambda entry: len(entry[1]))[1]
+    return top
+
+
+def _as_state_dict(entry: Dict) -> Optional[Dict]:
+    if "tileMap" in entry:
+        return entry
+    for value in entry.values():
+        if isinstance(value, dict) and "tileMap" in value:
+            return value
+    return None
+
+
+def _to_game_state(state: Dict, player_num: int) -> GameState:
+    # Replays store the full state, without the per-player fields the engine adds when sending it
+    state.setdefault("playerNum", player_num)
+    state.setdefault("feedback", "")
+    return GameState(state)
+
+
+class TurnColumns:
+    """
+    Per-turn summary of a replay, one compact array per column.
+    """
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, array] = {name: array(code) for name, code in COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return len(self.columns["turn"])
+
+    def __getitem__(self, name: str) -> array:
+        return self.columns[name]
+
+    def append(self, state: Dict) -> None:
+        columns = self.columns
+        columns["turn"].append(state["turn"])
+        for prefix in ("p1", "p2"):
+            player = state[prefix]
+            columns[f"{prefix}_money"].append(float(player["money"]))
+            columns[f"{prefix}_x"].append(player["position"]["x"])
+            columns[f"{prefix}_y"].append(player["position"]["y"])
+            columns[f"{prefix}_seeds"].append(sum(player["seedInventory"].values()))
+            columns[f"{prefix}_harvested"].append(len(player["harvestedInventory"]))
+        crops = 0
+        for row in state["tileMap"]["tiles"]:
+            for tile in row:
+                if tile["crop"]["type"] != "NONE":
+                    crops += 1
+        columns["crops"].append(crops)
+
+
+class ReplayReader:
+    """
+    Random access to the entries of a replay or engine log without reading it into memory.
+
+    The file is memory-mapped and scanned once for entry boundaries; after that any entry is
+    decoded on its own by slicing the map at its offsets. The offset index can be cached in a
+    sidecar file so reopening a replay skips the scan.
+    """
+
+    def __init__(self, path, cache_index: bool = False) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b""
+        self.spans = self._load_index(size) if cache_index else None
+        if self.spans is None:
+            self.spans = scan_spans(self._map)
+            if cache_index:
+                self._save_index(size)
+
+    def _index_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".idx")
+
+    def _load_index(self, size: int) -> Optional[List[Tuple[int, int]]]:
+        try:
+            with open(self._index_path()) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("size") != size or cached.get("mtime") != self.path.stat().st_mtime_ns:
+            return None
+        return [tuple(span) for span in cached["spans"]]
+
+    def _save_index(self, size: int) -> None:
+        with open(self._index_path(), "w") as f:
+            json.dump({"size": size, "mtime": self.path.stat().st_mtime_ns, "spans": self.spans}, f)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def raw(self, i: int) -> Dict:
+        """
+        Decodes a single entry
+        :param i: Entry number
+        :return: The entry as a dict
+        """
+        start, end = self.spans[i]
+        return json.loads(self._map[start:end])
+
+    def state_dict(self, i: int) -> Dict:
+        state = _as_state_dict(self.raw(i))
+        if state is None:
+            raise ValueError(f"Entry {i} of {self.path} is not a game state")
+        return state
+
+    def game_state(self, i: int, player_num: int = 1) -> GameState:
+        """
+        Builds the GameState of an entry as seen by the given player
+        :param i: Entry number
+        :param player_num: Player the state is for
+        :return: GameState
+        """
+        return _to_game_state(self.state_dict(i), player_num)
+
+    def game_states(self, player_num: int = 1) -> Iterator[GameState]:
+        for i in range(len(self)):
+            state = _as_state_dict(self.raw(i))
+            if state is not None:
+                yield _to_game_state(state, player_num)
+
+    def columns(self) -> TurnColumns:
+        """
+        Returns a columnar per-turn summary of every game state in the file
+        """
+        columns = TurnColumns()
+        for i in range(len(self)):
+            state = _as_state_dict(self.raw(i))
+            if state is not None:
+                columns.append(state)
+        return columns
+
+
+def summarize_replay(path) -> TurnColumns:
+    with ReplayReader(path) as reader:
+        return reader.columns()
+
+
+def load_directory(directory, pattern: str = "*.json", workers: Optional[int] = None) -> Dict[str, TurnColumns]:
+    """
+    Summarizes every replay in a directory in parallel
+    :param directory: Directory to search
+    :param pattern: Glob of replay file names
+    :param workers: Number of processes, defaults to the number of CPUs
+    :return: Dict of file name to TurnColumns
+    """
+    paths = sorted(str(path) for path in Path(directory).glob(pattern))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(paths, pool.map(summarize_replay, paths, chunksize=max(1, len(paths) // 64))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect MechMania replays and engine logs")
+    parser.add_argument("path", help="Replay file, or a directory of replays")
+    parser.add_argument("--turn", type=int, help="Print the raw entry with this index")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if os.path.isdir(args.path):
+        for name, columns in load_directory(args.path, workers=args.workers).items():
+            if len(columns) == 0:
+                print(f"{name}: no game states")
+                continue
+            print(f"{name}: {len(columns)} turns, final money "
+                  f"{columns['p1_money'][-1]:.0f} / {columns['p2_money'][-1]:.0f}")
+        return
+    with ReplayReader(args.path) as reader:
+        if args.turn is not None:
+            print(json.dumps(reader.raw(args.turn)))
+        else:
+            print(f"{args.path}: {len(reader)} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Long-lived bot server that plays many games at once.
+
+Every game the engine starts normally costs a fresh interpreter: the imports, the config and the bot's
+caches are all loaded again. The server loads them once per worker process and keeps them warm across
+games. The engine launches shim.py instead of bot.py, and the shim connects to the server and relays
+stdin and stdout over the connection (see networking.shim).
+
+An asyncio event loop owns all the connections. Every game is pinned to one worker process, the least
+busy one when the game starts, and its states are decided there one at a time. The bot keeps its
+state in module globals, so each game has its own BotState, HarvestRouter and TurnScheduler in its
+worker, and they are swapped into the bot module before each decision. If a worker has not answered by
+the engine's timeout, the server sends the same fallback the bot's own watchdog would.
+
+    python -m networking.server --listen /tmp/mm27-bot.sock --workers 8 --metrics metrics.jsonl
+
+Workers read ITEM, UPGRADE and the strategy parameters from the server's environment (see api.params),
+so every game on a server uses the same loadout. When a game ends its latency metrics are logged and
+appended to the --metrics file as one JSON line. With --telemetry-dir, each game's per-turn telemetry
+(see api.telemetry) is appended to a file there as the game goes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from api.constants import Constants
+from api.game_util import percentile
+from model.decisions.do_nothing_decision import DoNothingDecision
+from model.decisions.move_decision import MoveDecision
+from model.game_state import GameState
+from networking.io import Logger
+from networking.shim import DEFAULT_ADDRESS, ENV_ADDRESS, parse_address
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import stat
+import sys
+import time
+
+logger = Logger()
+constants = Constants()
+
+# Longest line the server reads, game states are well over asyncio's default of 64KiB
+LINE_LIMIT = 1 << 24
+
+# Games hosted by this worker process, by game id
+_games: Dict[int, "ServedGame"] = {}
+# Where this worker writes each game's telemetry, if anywhere
+_telemetry_dir: Optional[str] = None
+
+
+class ServedGame:
+    """
+    Stands in for Game in a worker process: one game's bot state, with decisions returned to the server
+    instead of printed.
+    """
+
+    def __init__(self, bot, game_id: int) -> None:
+        self.game_state: Optional[GameState] = None
+        self.state = bot.BotState()
+        self.router = bot.make_router()
+        self.scheduler = bot.make_scheduler(self)
+        self.telemetry = None
+        if _telemetry_dir:
+            name = f"telemetry-{int(time.time())}-{os.getpid()}-{game_id}.jsonl.gz"
+            self.telemetry = bot.make_telemetry(os.path.join(_telemetry_dir, name))
+
+    def get_game_state(self) -> GameState:
+        return self.game_state
+
+    def send_decision_string(self, s: str) -> None:
+        # run_phase returns the decision, there is nowhere else to send it
+        pass
+
+
+def _init_worker(quiet: bool, telemetry_dir: Optional[str]) -> None:
+    global _telemetry_dir
+    _telemetry_dir = telemetry_dir
+    if quiet:
+        sys.stderr = open(os.devnull, "w")
+    # Loads the model, the config and the bot once for all the games this worker will host
+    import bot  # noqa: F401
+
+
+def _loadout() -> Tuple[str, str]:
+    import bot
+
+    return bot.ITEM.engine_str(), bot.UPGRADE.engine_str()
+
+
+def _decide(game_id: int, phase: str, line: bytes) -> Tuple[str, float]:
+    """
+    Decides one phase of a game, in a worker process
+    :param game_id: Game the state belongs to, its bot state is created on its first state
+    :param phase: "move" or "action"
+    :param line: Game state as sent by the engine
+    :return: The decision's engine string and the seconds it took
+    """
+    import bot
+
+    start = time.perf_counter()
+    served = _games.get(game_id)
+    if served is None:
+        served = _games[game_id] = ServedGame(bot, game_id)
+    served.game_state = GameState(json.loads(line))
+    bot.state, bot.router, bot.game = served.state, served.router, served
+    if phase == "move":
+        fallback = MoveDecision(served.game_state.get_my_player().position)
+    else:
+        fallback = DoNothingDecision()
+    mode = served.state.mode
+    decision = served.scheduler.run_phase(phase, served.game_state, fallback)
+    if phase == "action" and served.telemetry is not None:
+        bot.record_telemetry(served.telemetry, served.game_state, mode)
+    return decision.engine_str(), time.perf_counter() - start
+
+
+def _end_game(game_id: int) -> List[str]:
+    """
+    Drops a finished game's bot state and writes the rest of its telemetry, in a worker process
+    :return: The game's scheduler report
+    """
+    served = _games.pop(game_id, None)
+    if served is None:
+        return []
+    if served.telemetry is not None:
+        served.telemetry.flush()
+    served.scheduler.close()
+    return served.scheduler.report()
+
+
+def fallback_decision(phase: str, line: bytes) -> str:
+    """
+    Returns the decision the bot's watchdog would send for a state, staying put or doing nothing
+    """
+    if phase == "action":
+        return DoNothingDecision().engine_str()
+    return MoveDecision(GameState(json.loads(line)).get_my_player().position).engine_str()
+
+
+class GameMetrics:
+    def __init__(self, game_id: int, worker: int) -> None:
+        self.game_id = game_id
+        self.worker = worker
+        self.started = time.time()
+        # Seconds from reading a state to writing its decision
+        self.latencies: List[float] = []
+        # Seconds the worker spent deciding, the rest of the latency is queueing and I/O
+        self.compute: List[float] = []
+        self.fallbacks = 0
+        self.errors = 0
+        self.planners: List[str] = []
+
+    def summary(self) -> Dict:
+        count = max(1, len(self.latencies))
+        return {
+            "game": self.game_id,
+            "worker": self.worker,
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "decisions": len(self.latencies),
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+            "latency_mean_ms": sum(self.latencies) / count * 1000,
+            "latency_p50_ms": percentile(self.latencies, 0.5) * 1000,
+            "latency_p95_ms": percentile(self.latencies, 0.95) * 1000,
+            "latency_max_ms": max(self.latencies, default=0.0) * 1000,
+            "compute_mean_ms": sum(self.compute) / max(1, len(self.compute)) * 1000,
+            "planners": self.planners,
+        }
+
+    def __str__(self) -> str:
+        return (f"game {self.game_id} on worker {self.worker}: {len(self.latencies)} decisions, "
+                f"p50 {percentile(self.latencies, 0.5) * 1000:.2f}ms p95 {percentile(self.latencies, 0.95) * 1000:.2f}ms "
+                f"max {max(self.latencies, default=0.0) * 1000:.2f}ms, {self.fallbacks} fallback(s), {self.errors} error(s)")
+
+
+def _discard(future: asyncio.Future) -> None:
+    # The decision came too late and a fallback was sent, only keep the exception from being reported
+    if not future.cancelled():
+        future.exception()
+
+
+class BotServer:
+    def __init__(self, workers: int, timeout: float, metrics_path: Optional[str] = None, quiet: bool = False,
+                 telemetry_dir: Optional[str] = None) -> None:
+        """
+        :param workers: Worker processes deciding games
+        :param timeout: Seconds after a state arrives at which the fallback is sent
+        :param metrics_path: File each finished game's metrics are appended to as a JSON line
+        :param quiet: Discard the bot's log lines in the workers
+        :param telemetry_dir: Directory the workers write each game's telemetry to, see api.telemetry
+        """
+        self.timeout = timeout
+        self.metrics_path = metrics_path
+        self.pools = [ProcessPoolExecutor(1, initializer=_init_worker, initargs=(quiet, telemetry_dir)) for _ in range(workers)]
+        # Games in progress on each worker
+        self.load = [0] * workers
+        self.games: Dict[int, GameMetrics] = {}
+        self.finished = 0
+        self.handshake: List[bytes] = []
+        self._ids = itertools.count(1)
+
+    async def start(self, spec: str) -> asyncio.AbstractServer:
+        """
+        Starts the workers and listens for shims
+        :param spec: Unix socket path, or host:port
+        """
+        loop = asyncio.get_running_loop()
+        # Every worker has loaded the bot before the first game connects
+        loadouts = await asyncio.gather(*(loop.run_in_executor(pool, _loadout) for pool in self.pools))
+        self.handshake = [b"heartbeat\n"] + [f"{s}\n".encode() for s in loadouts[0]]
+        family, address = parse_address(spec)
+        if family == socket.AF_INET:
+            return await asyncio.start_server(self.play, *address, limit=LINE_LIMIT)
+        if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+            # Left behind by a server that did not shut down cleanly
+            os.unlink(address)
+        return await asyncio.start_unix_server(self.play, address, limit=LINE_LIMIT)
+
+    async def play(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Plays one game over a shim's connection
+        """
+        loop = asyncio.get_running_loop()
+        game_id = next(self._ids)
+        worker = min(range(len(self.pools)), key=self.load.__getitem__)
+        pool = self.pools[worker]
+        self.load[worker] += 1
+        metrics = self.games[game_id] = GameMetrics(game_id, worker)
+        try:
+            writer.writelines(self.handshake)
+            await writer.drain()
+            # Each turn has a move phase and then an action phase
+            for index in itertools.count():
+                line = await reader.readline()
+                if not line:
+                    break
+                received = time.perf_counter()
+                phase = "move" if index % 2 == 0 else "action"
+                pending = loop.run_in_executor(pool, _decide, game_id, phase, line)
+                try:
+                    decision, compute = await asyncio.wait_for(asyncio.shield(pending), self.timeout)
+                    metrics.compute.append(compute)
+                except asyncio.TimeoutError:
+                    metrics.fallbacks += 1
+                    pending.add_done_callback(_discard)
+                    decision = fallback_decision(phase, line)
+                except Exception as e:
+                    logger.info(f"game {game_id}: {phase} decision failed: {e!r}")
+                    metrics.errors += 1
+                    decision = fallback_decision(phase, line)
+                writer.write(decision.encode() + b"\n")
+                await writer.drain()
+                metrics.latencies.append(time.perf_counter() - received)
+        except ConnectionError:
+            pass
+        except ValueError as e:
+            logger.info(f"game {game_id}: could not read a state: {e}")
+        finally:
+            self.load[worker] -= 1
+            del self.games[game_id]
+            writer.close()
+            try:
+                metrics.planners = await loop.run_in_executor(pool, _end_game, game_id)
+            except Exception as e:
+                logger.info(f"game {game_id}: could not end game on worker {worker}: {e!r}")
+            self.finished += 1
+            self.report(metrics)
+
+    def report(self, metrics: GameMetrics) -> None:
+        logger.info(str(metrics))
+        if self.metrics_path:
+            with open(self.metrics_path, "a") as f:
+                f.write(json.dumps(metrics.summary()) + "\n")
+
+    def close(self) -> None:
+        for pool in self.pools:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def serve(spec: str, server: BotServer) -> None:
+    listener = await server.start(spec)
+    logger.info(f"Serving on {spec} with {len(server.pools)} worker(s)")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+        logger.info(f"{server.finished} game(s) played")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many games in one long-lived process, through shim.py")
+    parser.add_argument("--listen", default=os.environ.get(ENV_ADDRESS, DEFAULT_ADDRESS),
+                        help=f"Unix socket path or host:port (default: ${ENV_ADDRESS} or {DEFAULT_ADDRESS})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes deciding games")
+    parser.add_argument("--timeout", type=float, default=constants.PLAYER_TIMEOUT / 1000 * 0.8,
+                        help="Seconds after a state arrives at which the fallback decision is sent")
+    parser.add_argument("--metrics", help="Append each finished game's latency metrics to this file as JSON lines")
+    parser.add_argument("--quiet", action="store_true", help="Discard the bot's log lines")
+    parser.add_argument("--telemetry-dir", help="Write each game's per-turn telemetry to this directory")
+    args = parser.parse_args()
+
+    server = BotServer(args.workers, args.timeout, args.metrics, args.quiet, args.telemetry_dir)
+    try:
+        asyncio.run(serve(args.listen, server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Stdio shim for networking.server.
+
+The engine launches shim.py in place of bot.py. It connects to a running bot server and copies lines
+both ways: game states from stdin to the server, and the handshake and decisions from the server to
+stdout. If no server is listening, it runs bot.py in its own place so the game is still played.
+
+The server address is taken from MM27_SERVER: a Unix socket path, or host:port for TCP.
+
+This runs before every game, so it only uses the standard library and imports nothing from the bot.
+"""
+import os
+import socket
+import sys
+import threading
+
+ENV_ADDRESS = "MM27_SERVER"
+DEFAULT_ADDRESS = "/tmp/mm27-bot.sock"
+
+
+def parse_address(spec: str):
+    """
+    Returns the socket family and address for a server address
+    :param spec: Unix socket path, or host:port
+    :return: (family, address) as socket.socket and connect take them
+    """
+    host, _, port = spec.rpartition(":")
+    if host and port.isdigit():
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, spec
+
+
+def connect(spec: str) -> socket.socket:
+    family, address = parse_address(spec)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def _from_stdin(sock: socket.socket) -> None:
+    try:
+        for line in sys.stdin.buffer:
+            sock.sendall(line)
+        # The engine is done, let the server end the game
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+def relay(sock: socket.socket) -> None:
+    """
+    Copies stdin to sock and sock to stdout until the server closes the connection
+    """
+    # A daemon thread, so that a server that hangs up is not left waiting on the engine
+    threading.Thread(target=_from_stdin, args=(sock,), name="shim-writer", daemon=True).start()
+    out = sys.stdout.buffer
+    for line in sock.makefile("rb"):
+        out.write(line)
+        out.flush()
+
+
+def main():
+    spec = os.environ.get(ENV_ADDRESS, DEFAULT_ADDRESS)
+    try:
+        sock = connect(spec)
+    except OSError:
+        print(f"info: no bot server at {spec}, running bot.py", file=sys.stderr, flush=True)
+        bot = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bot.py")
+        os.execv(sys.executable, [sys.executable, bot])
+    with sock:
+        relay(sock)
+
+
+if __name__ == "__main__":
+    main()
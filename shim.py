@@ -0,0 +1,5 @@
+from networking.shim import main
+
+# Give this to the engine in place of bot.py to play the game on a running networking.server
+if __name__ == "__main__":
+    main()
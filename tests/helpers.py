@@ -0,0 +1,48 @@
+"""
+Small hand-built game states for the tests.
+"""
+from typing import Dict, Iterable, Tuple
+
+
+def tile_dict(tile_type: str = "SOIL", crop: str = "NONE", growth_timer: int = 0, value: float = 0,
+              scarecrow_effect: int = -1) -> Dict:
+    return {"type": tile_type, "crop": {"type": crop, "growthTimer": growth_timer, "value": value},
+            "p1_item": "NONE", "p2_item": "NONE", "turnsLeftToGrow": growth_timer, "rainTotemEffect": -1,
+            "fertilityIdolEffect": -1, "scarecrowEffect": scarecrow_effect}
+
+
+def player_dict(name: str, x: int, y: int, **overrides) -> Dict:
+    player = {"name": name, "position": {"x": x, "y": y}, "upgrade": "LONGER_LEGS", "item": "COFFEE_THERMOS",
+              "money": 300, "seedInventory": {"CORN": 3}, "harvestedInventory": [], "discount": 0,
+              "protectionRadius": 2, "harvestRadius": 1, "plantRadius": 1, "carryingCapacity": 30,
+              "maxMovement": 10, "doubleDropChance": 0, "usedItem": False, "hasDeliveryDrone": False,
+              "hasCoffeeThermos": False, "itemTimeExpired": False}
+    player.update(overrides)
+    return player
+
+
+def row_type(y: int) -> str:
+    if y == 0:
+        return "GREEN_GROCER"
+    if y < 3:
+        return "GRASS"
+    if y == 20:
+        return "F_BAND_MID"
+    if 18 <= y <= 22:
+        return "F_BAND_OUTER"
+    return "SOIL"
+
+
+def gamestate_dict(turn: int = 10, width: int = 30, height: int = 50,
+                   crops: Iterable[Tuple[int, int, str, int, float]] = (), me: Tuple[int, int] = (5, 5),
+                   opponent: Tuple[int, int] = (20, 30), feedback: str = "") -> Dict:
+    """
+    Returns a gamestate dict with the fertility band around row 20
+    :param crops: (x, y, crop type, growth timer, value) per crop
+    """
+    rows = [[tile_dict(row_type(y)) for _ in range(width)] for y in range(height)]
+    for x, y, crop, growth_timer, value in crops:
+        rows[y][x] = tile_dict(rows[y][x]["type"], crop, growth_timer, value)
+    return {"turn": turn, "p1": player_dict("a", *me), "p2": player_dict("b", *opponent),
+            "tileMap": {"mapHeight": height, "mapWidth": width, "tiles": rows}, "playerNum": 1,
+            "feedback": feedback}
@@ -0,0 +1,81 @@
+from api.crop_index import PLANTED_WINDOW, CropIndex, CropOwner
+from api.feedback import parse_feedback
+from helpers import gamestate_dict
+from model.game_state import GameState
+from model.position import Position
+
+
+def test_planted_tiles_become_ours():
+    index = CropIndex()
+    index.update(GameState(gamestate_dict(turn=1)))
+    index.mark_planted([Position(3, 20)])
+    index.update(GameState(gamestate_dict(turn=2, crops=[(3, 20, "CORN", 5, 1), (9, 20, "CORN", 5, 1)])))
+    assert {crop.position for crop in index.crops_of(CropOwner.ME)} == {Position(3, 20)}
+    assert {crop.position for crop in index.crops_of(CropOwner.OPPONENT)} == {Position(9, 20)}
+    assert index.planted[CropOwner.ME] == 1
+
+
+def test_plantings_expire_after_the_window():
+    index = CropIndex()
+    index.update(GameState(gamestate_dict(turn=1)))
+    index.mark_planted([Position(3, 20)])
+    turn = 2 + PLANTED_WINDOW
+    index.update(GameState(gamestate_dict(turn=turn, crops=[(3, 20, "CORN", 5, 1)])))
+    assert index.count(CropOwner.ME) == 0
+
+
+def test_confirmed_plantings_claim_existing_crops():
+    index = CropIndex()
+    index.update(GameState(gamestate_dict(turn=1, crops=[(3, 20, "CORN", 5, 1)])))
+    assert index.count(CropOwner.OPPONENT) == 1
+    index.confirm_planted([Position(3, 20)])
+    assert index.count(CropOwner.ME) == 1
+    assert index.planted[CropOwner.ME] == 1
+
+
+def test_discarded_crops_are_not_lost():
+    index = CropIndex()
+    index.mark_planted([Position(3, 20), Position(4, 20)])
+    index.update(GameState(gamestate_dict(turn=1, crops=[(3, 20, "CORN", 0, 1), (4, 20, "CORN", 0, 1)])))
+    index.discard([Position(3, 20)])
+    index.update(GameState(gamestate_dict(turn=2)))
+    assert index.lost[CropOwner.ME] == 1
+    assert index.count(CropOwner.ME) == 0
+
+
+def test_opponent_harvests_count_as_lost():
+    index = CropIndex()
+    index.mark_planted([Position(3, 20), Position(4, 20)])
+    index.update(GameState(gamestate_dict(turn=1, crops=[(3, 20, "CORN", 0, 1), (4, 20, "CORN", 0, 1)])))
+    for event in parse_feedback("Opponent harvested CORN at (3, 20)\nHarvested CORN at (4, 20)", 1):
+        if event.harvester == CropOwner.ME:
+            index.confirm_harvested(event.positions)
+        else:
+            index.lose(event.positions)
+    assert index.lost[CropOwner.ME] == 1
+    assert index.count(CropOwner.ME) == 0
+
+
+def test_failed_harvests_keep_their_owner():
+    index = CropIndex()
+    index.mark_planted([Position(3, 20)])
+    index.update(GameState(gamestate_dict(turn=1, crops=[(3, 20, "CORN", 0, 1)])))
+    index.discard([Position(3, 20)])
+    assert index.count(CropOwner.ME) == 0
+    index.update(GameState(gamestate_dict(turn=2, crops=[(3, 20, "CORN", 0, 1)])))
+    assert index.count(CropOwner.ME) == 1
+    assert index.count(CropOwner.OPPONENT) == 0
+    assert index.next_to_mature(CropOwner.ME).position == Position(3, 20)
+    assert index.planted == {CropOwner.ME: 1, CropOwner.OPPONENT: 0}
+    assert index.lost[CropOwner.ME] == 0
+
+
+def test_confirmed_harvests_are_not_lost():
+    index = CropIndex()
+    index.mark_planted([Position(3, 20)])
+    index.update(GameState(gamestate_dict(turn=1, crops=[(3, 20, "CORN", 0, 1)])))
+    index.discard([Position(3, 20)])
+    index.confirm_harvested([Position(3, 20)])
+    index.update(GameState(gamestate_dict(turn=2)))
+    assert index.count(CropOwner.ME) == 0
+    assert index.lost[CropOwner.ME] == 0
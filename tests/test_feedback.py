@@ -0,0 +1,63 @@
+from api.crop_index import CropOwner
+from api.feedback import (BuyEvent, BuyFailedEvent, FeedbackStream, HarvestEvent, InvalidDecisionEvent, MoneyLedger,
+                          PlantEvent, PlantFailedEvent, SaleEvent, UnknownEvent, parse_feedback)
+from helpers import gamestate_dict
+from model.crop_type import CropType
+from model.game_state import GameState
+from model.position import Position
+
+
+def test_failures_match_before_successes():
+    events = parse_feedback(["Failed to plant CORN at (3, 20)", "Planted CORN at (3, 20)",
+                             "Unable to buy 5 GRAPE, not enough money", "Bought 5 GRAPE",
+                             "Invalid harvest at (1, 1)", "Something else happened"], 7)
+    assert [type(event) for event in events] == [PlantFailedEvent, PlantEvent, BuyFailedEvent, BuyEvent,
+                                                InvalidDecisionEvent, UnknownEvent]
+    assert [event.is_invalid for event in events] == [True, False, True, False, True, False]
+    assert all(event.turn == 7 for event in events)
+
+
+def test_positions_and_crops_are_extracted():
+    event, = parse_feedback("Harvested GOLDEN_CORN at (3, 20) and corn at x=4, y=21", 1)
+    assert isinstance(event, HarvestEvent)
+    assert event.positions == [Position(3, 20), Position(4, 21)]
+    assert event.crop_types == [CropType.GOLDEN_CORN, CropType.CORN]
+    assert event.harvester == CropOwner.ME
+    event, = parse_feedback("Opponent harvested PEANUT at (5, 6)", 1)
+    assert event.harvester == CropOwner.OPPONENT
+
+
+def test_buy_quantities():
+    stream = FeedbackStream()
+    ledger = MoneyLedger(stream)
+    events = parse_feedback("Bought 4 CORN\nPurchased 2 GRAPE\nFailed to buy 9 CORN", 2)
+    assert [(event.crop_type, event.quantity) for event in events] == [(CropType.CORN, 4), (CropType.GRAPE, 2),
+                                                                      (CropType.CORN, 9)]
+    stream.dispatch(events)
+    assert ledger.seeds_bought == {CropType.CORN: 4, CropType.GRAPE: 2}
+    assert ledger.spent == 4 * CropType.CORN.get_seed_price() + 2 * CropType.GRAPE.get_seed_price()
+    sale, = parse_feedback("Sold 3 crops for 41.5", 2)
+    assert isinstance(sale, SaleEvent) and sale.amount == 41.5
+
+
+def test_invalid_decisions_are_counted():
+    stream = FeedbackStream()
+    stream.dispatch(parse_feedback("Failed to plant CORN at (3, 20)\nInvalid move\nPlanted CORN at (4, 20)", 1))
+    assert stream.last_turn_invalid == 2
+    stream.dispatch(parse_feedback("Bought 4 CORN", 2))
+    assert stream.last_turn_invalid == 0
+    assert stream.invalid_decisions == 2
+    assert stream.invalid_by_type == {"PlantFailedEvent": 1, "InvalidDecisionEvent": 1}
+
+
+def test_feedback_is_dispatched_once_per_turn():
+    stream = FeedbackStream()
+    harvests = []
+    stream.subscribe(HarvestEvent, harvests.append)
+    game_state = GameState(gamestate_dict(turn=3, feedback="Harvested CORN at (3, 20)"))
+    assert len(stream.consume(game_state)) == 1
+    assert stream.consume(game_state) == []
+    assert len(harvests) == 1
+    # The same message on a later turn is a new event
+    assert len(stream.consume(GameState(gamestate_dict(turn=4, feedback="Harvested CORN at (3, 20)")))) == 1
+    assert len(harvests) == 2
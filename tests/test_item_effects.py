@@ -0,0 +1,103 @@
+from api import game_util
+from api.constants import Constants
+from api.crop_index import CropIndex
+from api.item_effects import EFFECT_RADIUS, ItemEffects, radius_mask
+from api.threat_map import ThreatMap
+from helpers import gamestate_dict
+from model.crop_type import CropType
+from model.game_state import GameState
+from model.item_type import ItemType
+from model.position import Position
+from model.tile_type import TileType
+
+import math
+
+constants = Constants()
+TURN = 10
+
+
+def effects_for(ours=(), theirs=(), me=(0, 49), opponent=(29, 49)):
+    """
+    Returns ItemEffects for a state with our crops and the opponent's, each (x, y, growth timer, value)
+    """
+    crops = [(x, y, "CORN", timer, value) for x, y, timer, value in list(ours) + list(theirs)]
+    game_state = GameState(gamestate_dict(turn=TURN, crops=crops, me=me, opponent=opponent))
+    crop_index = CropIndex()
+    crop_index.turn = TURN
+    crop_index.mark_planted([Position(x, y) for x, y, _, _ in ours])
+    crop_index.update(game_state)
+    threat_map = ThreatMap(30, 50)
+    threat_map.update(game_state)
+    effects = ItemEffects(30, 50)
+    effects.update(game_state, crop_index, threat_map)
+    return effects
+
+
+def footprint(grid):
+    return {Position(x, y) for y, row in enumerate(grid) for x, score in enumerate(row) if score != 0}
+
+
+def test_radii_come_from_the_constants():
+    assert EFFECT_RADIUS == {ItemType.RAIN_TOTEM: constants.RAIN_TOTEM_EFFECT_RADIUS,
+                             ItemType.FERTILITY_IDOL: constants.FERTILITY_IDOL_EFFECT_RADIUS,
+                             ItemType.PESTICIDE: constants.PESTICIDE_EFFECT_RADIUS,
+                             ItemType.SCARECROW: constants.SCARECROW_EFFECT_RADIUS}
+    for radius in range(5):
+        cells = {(dx, dy) for dy, span in radius_mask(radius) for dx in range(-span, span + 1)}
+        assert cells == {(dx, dy) for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)
+                         if abs(dx) + abs(dy) <= radius}
+
+
+def test_each_item_scores_the_tiles_within_its_radius():
+    crop = Position(12, 20)
+    cases = {
+        ItemType.RAIN_TOTEM: effects_for(ours=[(12, 20, 6, 1)]),
+        ItemType.FERTILITY_IDOL: effects_for(ours=[(12, 20, 6, 1)]),
+        ItemType.PESTICIDE: effects_for(theirs=[(12, 20, 6, 10)]),
+        # Ready in 6 turns, with the opponent next to it and us too far away to protect it
+        ItemType.SCARECROW: effects_for(ours=[(12, 20, 6, 1)], opponent=(10, 20)),
+    }
+    for item, effects in cases.items():
+        radius = EFFECT_RADIUS[item]
+        assert footprint(effects.score_map(item)) == {Position(x, y) for x in range(30) for y in range(50)
+                                                      if abs(x - crop.x) + abs(y - crop.y) <= radius}, item
+
+
+def test_weights():
+    per_turn = game_util.crop_value_per_turn(CropType.CORN, TileType.F_BAND_MID.get_fertility())
+    effects = effects_for(ours=[(12, 20, 6, 1)])
+    grid = effects.score_map(ItemType.RAIN_TOTEM)
+    saved = 6 - math.ceil(6 / constants.RAIN_TOTEM_GROWTH_MULTIPLIER)
+    assert abs(grid[20][12] - saved * per_turn) < 1e-9
+    # Our own crops count against a pesticide
+    assert effects.score_map(ItemType.PESTICIDE)[20][12] == -constants.PESTICIDE_CROP_VALUE_DECREASE
+    # Nothing is at risk while we stand next to it
+    guarded = effects_for(ours=[(12, 20, 6, 1)], me=(12, 21))
+    assert footprint(guarded.score_map(ItemType.SCARECROW)) == set()
+
+
+def test_activation_covers_the_most_value():
+    effects = effects_for(theirs=[(5, 20, 8, 10), (6, 20, 8, 10), (20, 20, 8, 10)], ours=[(7, 20, 8, 10)])
+    turn, pos, score = effects.best_activation(ItemType.PESTICIDE)
+    # Both of the opponent's crops on the left, without reaching ours
+    assert pos in (Position(5, 20), Position(6, 19), Position(6, 21)) and turn == TURN
+    assert abs(score - 2 * constants.PESTICIDE_CROP_VALUE_DECREASE * 10) < 1e-9
+    # Next to our crop the two cancel out, the lone crop on the right is worth more
+    turn, pos, _ = effects.best_activation(ItemType.PESTICIDE, [Position(7, 20), Position(20, 20)])
+    assert pos == Position(20, 20)
+    assert effects.best_activation(ItemType.PESTICIDE, []) == (TURN, None, -math.inf)
+
+
+def test_activation_waits_while_it_pays():
+    effects = effects_for(theirs=[(12, 20, 5, 10)], ours=[(3, 20, 5, 10)])
+    # The opponent's crop grows until it is ready on turn 15, so the pesticide is worth the most then
+    turn, pos, score = effects.best_activation(ItemType.PESTICIDE, horizon=3)
+    assert turn == TURN + 3 and pos.distance(Position(12, 20)) <= constants.PESTICIDE_EFFECT_RADIUS
+    now = effects.score_map(ItemType.PESTICIDE)[pos.y][pos.x]
+    per_turn = game_util.crop_value_per_turn(CropType.CORN, TileType.F_BAND_MID.get_fertility())
+    assert abs(score - now - 3 * per_turn * constants.PESTICIDE_CROP_VALUE_DECREASE) < 1e-9
+    turn, _, _ = effects.best_activation(ItemType.PESTICIDE, horizon=8)
+    assert turn == TURN + 5
+    # Growth items are worth the most right away
+    turn, pos, _ = effects.best_activation(ItemType.RAIN_TOTEM, horizon=3)
+    assert turn == TURN and pos.distance(Position(3, 20)) <= constants.RAIN_TOTEM_EFFECT_RADIUS
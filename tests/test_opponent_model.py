@@ -0,0 +1,70 @@
+from api.opponent_model import OpponentBehavior, OpponentHistory, OpponentModel
+from helpers import gamestate_dict, player_dict
+from model.game_state import GameState
+from model.position import Position
+
+
+def play(model, moves, me=(5, 5), farming=False):
+    """
+    Updates model with the opponent at each of moves in turn, changing its seeds every turn if farming
+    """
+    for turn, opponent in enumerate(moves, 1):
+        state = gamestate_dict(turn=turn, me=me, opponent=opponent)
+        if farming:
+            state["p2"] = player_dict("b", *opponent, seedInventory={"CORN": turn % 2})
+        model.update(GameState(state))
+
+
+def test_history_wraps_around():
+    history = OpponentHistory(capacity=4)
+    for turn in range(1, 7):
+        history.append(turn, Position(turn, 2 * turn), 10.0 * turn, turn, 0, turn == 6)
+    assert history.size == 4
+    assert [history.position(age) for age in range(4)] == [Position(x, 2 * x) for x in (6, 5, 4, 3)]
+    assert [history.turns[history.index(age)] for age in range(4)] == [6, 5, 4, 3]
+    assert history.used_item[history.index(0)] and not history.used_item[history.index(1)]
+    # Ages past the capacity wrap around the buffer
+    assert history.index(4) == history.index(0)
+
+
+def test_repeated_turns_are_recorded_once():
+    model = OpponentModel()
+    play(model, [(20, 30), (20, 30)])
+    model.update(GameState(gamestate_dict(turn=2, opponent=(25, 30))))
+    assert model.history.size == 2
+    assert model.history.position() == Position(20, 30)
+
+
+def test_classifies_behavior():
+    model = OpponentModel()
+    play(model, [(20, 30)] * 2)
+    assert model.behavior() == OpponentBehavior.UNKNOWN
+    play(model, [(20, 30)] * 8)
+    assert model.behavior() == OpponentBehavior.IDLE
+
+    chaser = OpponentModel()
+    play(chaser, [(25, 45), (20, 38), (15, 30), (10, 22), (7, 14), (5, 8), (5, 6), (6, 5)])
+    assert chaser.behavior() == OpponentBehavior.CHASER
+
+    farmer = OpponentModel()
+    play(farmer, [(20 + turn % 2, 30) for turn in range(8)], farming=True)
+    assert farmer.behavior() == OpponentBehavior.FARMER
+
+
+def test_prediction_grids_are_distributions():
+    model = OpponentModel()
+    assert model.likely_positions(1, 3) == []
+    play(model, [(25, 45), (20, 38), (15, 30), (10, 22), (7, 14)])
+    horizon = model.predict_horizon(3)
+    assert len(horizon) == 3
+    for k, grid in enumerate(horizon, 1):
+        assert len(grid) == 50 and all(len(row) == 30 for row in grid)
+        assert abs(sum(map(sum, grid)) - 1) < 1e-9
+        assert grid == model.predict(k)
+    grid = model.predict(1)
+    likely = model.likely_positions(1, 3)
+    assert len(likely) == 3
+    assert [grid[pos.y][pos.x] for pos in likely] == sorted((grid[pos.y][pos.x] for pos in likely), reverse=True)
+    assert max(map(max, grid)) == grid[likely[0].y][likely[0].x]
+    # A chaser is mostly expected on its way to us
+    assert likely[0].distance(Position(5, 5)) < Position(7, 14).distance(Position(5, 5))
@@ -0,0 +1,76 @@
+from api import game_util
+from api.planting import FIXED_TYPES, growth_values, plan_planting
+from helpers import gamestate_dict
+from model.crop_type import CropType
+from model.position import Position
+from model.tile_map import TileMap
+
+import itertools
+import random
+
+CROPS = [crop_type for crop_type in CropType if crop_type != CropType.NONE]
+
+
+def pair_value(crop_type, pos, tile_map, values):
+    tile_type = tile_map.get_tile_type_xy(pos.x, pos.y)
+    if tile_type in FIXED_TYPES:
+        return crop_type.get_growth_time() * game_util.crop_value_per_turn(crop_type, tile_type.get_fertility())
+    return values[crop_type][pos.y]
+
+
+def brute_force(counts, positions, tile_map, turn):
+    types = [crop_type for crop_type, count in counts.items() if count > 0]
+    values = growth_values(types, {pos.y for pos in positions}, turn)
+    best = 0.0
+    for assignment in itertools.product([None] + types, repeat=len(positions)):
+        if any(assignment.count(crop_type) > counts[crop_type] for crop_type in types):
+            continue
+        best = max(best, sum(pair_value(crop_type, pos, tile_map, values)
+                             for crop_type, pos in zip(assignment, positions) if crop_type is not None))
+    return best
+
+
+def random_case(seed, max_tiles, max_types):
+    rng = random.Random(seed)
+    turn = rng.randint(1, 150)
+    tile_map = TileMap(gamestate_dict(turn=turn)["tileMap"])
+    positions = [Position(rng.randint(0, 29), y) for y in rng.sample(range(1, 50), rng.randint(1, max_tiles))]
+    counts = {crop_type: rng.randint(0, 3) for crop_type in rng.sample(CROPS, rng.randint(1, max_types))}
+    return counts, positions, tile_map, turn
+
+
+def check_case(counts, positions, tile_map, turn):
+    plan = plan_planting(dict(counts), positions, tile_map, turn)
+    assert abs(plan.value - brute_force(counts, positions, tile_map, turn)) < 1e-6
+    assert len(set(plan.positions)) == len(plan.positions)
+    for crop_type in counts:
+        assert plan.crop_types.count(crop_type) <= counts[crop_type]
+
+
+def test_plan_matches_brute_force_on_small_cases():
+    for seed in range(1000):
+        check_case(*random_case(seed, 6, 3))
+    for seed in range(1000):
+        check_case(*random_case(seed, 4, 4))
+
+
+def test_plan_changes_which_types_are_planted():
+    # More seeds than tiles, and the best plan leaves out a type that taking the best pair first plants
+    for seed in (1532, 1640, 1906):
+        check_case(*random_case(seed, 4, 4))
+    check_case(*random_case(2392, 6, 3))
+    counts, positions, tile_map, turn = random_case(1532, 4, 4)
+    assert (turn, len(positions)) == (46, 3)
+    assert counts == {CropType.CORN: 2, CropType.QUADROTRITICALE: 3, CropType.PEANUT: 1, CropType.POTATO: 0}
+    assert abs(plan_planting(counts, positions, tile_map, turn).value - 12.81) < 0.01
+
+
+def test_plan_value_is_what_its_seeds_grow_to():
+    turn = 40
+    tile_map = TileMap(gamestate_dict(turn=turn)["tileMap"])
+    positions = [Position(4, 1), Position(4, 18), Position(4, 20), Position(4, 30)]
+    plan = plan_planting({CropType.CORN: 2, CropType.GRAPE: 1}, positions, tile_map, turn)
+    values = growth_values(plan.crop_types, {pos.y for pos in positions}, turn)
+    assert len(plan) == 3
+    assert abs(plan.value - sum(pair_value(crop_type, pos, tile_map, values)
+                                for crop_type, pos in zip(plan.crop_types, plan.positions))) < 1e-9
@@ -0,0 +1,36 @@
+from helpers import gamestate_dict
+from networking.recorder import GameRecorder, apply_patch, load_turns, make_patch
+
+import copy
+
+
+def test_patches_round_trip():
+    old = {"a": 1, "b": [1, 2, {"c": 3}], "d": {"e": [1]}, "gone": None}
+    new = {"a": 2, "b": [1, 2, {"c": 4}], "d": {"e": [1, 2]}, "added": "x"}
+    before = copy.deepcopy(old)
+    assert apply_patch(old, make_patch(old, new)) == new
+    assert old == before
+    assert make_patch(new, new) == ["d", {}, []]
+
+
+def test_recorded_states_and_decisions_load_back(tmp_path):
+    path = tmp_path / "game.jsonl.gz"
+    header = {"bot": "bot", "item": "PESTICIDE", "upgrade": "SCYTHE", "params": {"BUY_CUTOFF_TURN": 150}}
+    recorder = GameRecorder(path, keyframe_interval=3, header=header)
+    states = []
+    crops = []
+    for turn in range(1, 9):
+        crops.append((turn, 20, "CORN", 5, float(turn)))
+        state = gamestate_dict(turn=turn, crops=crops, me=(turn, 5), feedback="" if turn % 2 else "Bought 1 CORN")
+        if turn == 5:
+            del state["feedback"]
+        states.append(state)
+        recorder.record_state(state)
+        # Some states go unanswered, as when the bot was too slow
+        if turn != 4:
+            recorder.record_decision(f"move {turn} 5")
+    recorder.close()
+    loaded_header, turns = load_turns(path)
+    assert loaded_header == {"v": 1, **header}
+    assert [state for state, _ in turns] == states
+    assert [decision for _, decision in turns] == [None if turn == 4 else f"move {turn} 5" for turn in range(1, 9)]
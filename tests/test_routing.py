@@ -0,0 +1,86 @@
+from api.crop_index import CropOwner, IndexedCrop
+from api.routing import HarvestRouter, build_sites, travel_turns
+from model.crop_type import CropType
+from model.position import Position
+
+import random
+import time
+
+
+def market(position: Position) -> Position:
+    return Position(position.x, 0)
+
+
+def random_crops(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    cells = rng.sample([(x, y) for x in range(30) for y in range(3, 50)], count)
+    return [IndexedCrop(Position(x, y), CropType.CORN, CropOwner.ME, rng.randint(5, 30), rng.randint(1, 9))
+            for x, y in cells]
+
+
+def distance(a: Position, b: Position) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+def test_sites_cover_every_crop_once():
+    crops = random_crops(120)
+    for radius in (0, 1, 3):
+        sites = build_sites(crops, radius)
+        covered = [crop for site in sites for crop in site.crops]
+        assert sorted(id(crop) for crop in covered) == sorted(id(crop) for crop in crops)
+        for site in sites:
+            assert all(distance(site.position, crop.position) <= radius for crop in site.crops)
+
+
+def test_sites_stop_at_the_deadline_with_the_earliest_crops():
+    crops = random_crops(120)
+    sites = build_sites(crops, 2, deadline=time.perf_counter() - 1)
+    assert len(sites) == 1
+    assert sites[0].ready_turn <= min(crop.ready_turn for crop in crops) + 1
+
+
+def test_route_is_walkable():
+    crops = random_crops(60)
+    start, turn, max_movement, capacity = Position(15, 0), 1, 10, 12
+    route = HarvestRouter(market, 180, time_budget=0.02).plan(start, turn, crops, 2, max_movement, capacity)
+    assert route.stops and route.stops[-1].is_market()
+    harvested = set()
+    pos, t, load = start, turn - 1, 0
+    for stop in route.stops:
+        assert stop.turn >= t + travel_turns(pos, stop.position, max_movement)
+        if stop.is_market():
+            assert stop.position == market(pos)
+            load = 0
+        else:
+            assert all(crop.ready_turn <= stop.turn for crop in stop.site.crops)
+            assert all(distance(stop.position, crop.position) <= 2 for crop in stop.site.crops)
+            assert harvested.isdisjoint(id(crop) for crop in stop.site.crops)
+            harvested.update(id(crop) for crop in stop.site.crops)
+            load += stop.site.load
+            assert load <= capacity
+        pos, t = stop.position, stop.turn
+    assert route.finish_turn == t
+
+
+def test_plan_keeps_to_its_budget_at_a_large_radius():
+    crops = random_crops(200)
+    router = HarvestRouter(market, 180, time_budget=0.005)
+    started = time.perf_counter()
+    route = router.plan(Position(15, 0), 1, crops, 5, 10, 30)
+    # The budget bounds the search; what is left is scheduling the tour that was kept
+    assert time.perf_counter() - started < 0.05
+    assert route.stops and route.value > 0
+
+
+def test_full_load_does_not_detour_for_a_site_it_skips():
+    near = IndexedCrop(Position(15, 5), CropType.CORN, CropOwner.ME, 1, 5)
+    later = IndexedCrop(Position(16, 5), CropType.CORN, CropOwner.ME, 2, 5)
+    far = [IndexedCrop(Position(15, y), CropType.CORN, CropOwner.ME, 19, 5) for y in (45, 46)]
+    order = [build_sites([near], 1)[0], build_sites(far, 1)[0], build_sites([later], 1)[0]]
+    router = HarvestRouter(market, 20)
+    # Carrying capacity 2: reaching the far site means emptying the load first, but it could not be
+    # sold in time anyway, so the tour goes straight on to the next site
+    route = router._schedule(order, (Position(15, 0), 1, 10, 2, 0), build=True)
+    assert [(stop.position, stop.is_market()) for stop in route.stops] == [
+        (Position(15, 5), False), (Position(16, 5), False), (Position(16, 0), True)]
+    assert route.value == 10
@@ -0,0 +1,140 @@
+from typing import List, Optional
+from api.scheduler import TurnScheduler
+from helpers import gamestate_dict
+from model.decisions.do_nothing_decision import DoNothingDecision
+from model.decisions.move_decision import MoveDecision
+from model.game_state import GameState
+from model.position import Position
+from tools.decision_regression import OfflineGame
+
+import time
+
+
+def make_scheduler(budget: float = 0.05, sent: Optional[List[str]] = None) -> TurnScheduler:
+    return TurnScheduler(budget, 5.0, (lambda s: None) if sent is None else sent.append)
+
+
+def test_prerequisites_finish_before_planners_start():
+    sent = []
+    scheduler = make_scheduler(sent=sent)
+    events = []
+
+    def observe(context):
+        for step in range(3):
+            events.append(f"observe{step}")
+            yield
+
+    def threat(context):
+        events.append("threat")
+        context.results["ready"] = True
+        yield
+
+    def decide(context):
+        events.append(f"decide:{context.results.get('ready')}")
+        context.propose(MoveDecision(Position(1, 1)))
+        yield
+        events.append("decide_more")
+
+    scheduler.require("move", "observe", observe)
+    scheduler.require("move", "threat", threat)
+    scheduler.register("move", "decide", 1, decide)
+    try:
+        decision = scheduler.run_phase("move", None, MoveDecision(Position(0, 0)))
+    finally:
+        scheduler.close()
+    assert events == ["observe0", "observe1", "observe2", "threat", "decide:True", "decide_more"]
+    assert decision.pos == Position(1, 1)
+    assert sent == ["move 1 1"]
+
+
+def test_prerequisites_outlast_the_budget_and_planners_still_propose():
+    scheduler = make_scheduler(budget=0.01)
+    events = []
+
+    def observe(context):
+        time.sleep(0.02)
+        yield
+        events.append("observed")
+
+    def planner(name, x):
+        def plan(context):
+            events.append(name)
+            context.propose(MoveDecision(Position(x, 0)))
+            yield
+            events.append(f"{name}_more")
+        return plan
+
+    scheduler.require("move", "observe", observe)
+    scheduler.register("move", "first", 1, planner("first", 1))
+    scheduler.register("move", "second", 1, planner("second", 2))
+    try:
+        decision = scheduler.run_phase("move", None, MoveDecision(Position(0, 0)))
+    finally:
+        scheduler.close()
+    # Observation is never cut short; each planner gets its first step and is closed after it
+    assert events == ["observed", "first", "second"]
+    assert decision.pos == Position(2, 0)
+    assert scheduler.stats["observe"].unfinished == 0
+    assert scheduler.stats["first"].unfinished == 1 and scheduler.stats["second"].unfinished == 1
+
+
+def test_planners_share_the_budget_left():
+    scheduler = make_scheduler(budget=0.02)
+    steps = {"slow": 0, "quick": 0}
+
+    def slow(context):
+        while True:
+            steps["slow"] += 1
+            time.sleep(0.001)
+            yield
+
+    def quick(context):
+        steps["quick"] += 1
+        context.propose(DoNothingDecision())
+        yield
+
+    scheduler.register("action", "slow", 3, slow)
+    scheduler.register("action", "quick", 1, quick)
+    try:
+        started = time.monotonic()
+        decision = scheduler.run_phase("action", None, DoNothingDecision())
+        elapsed = time.monotonic() - started
+    finally:
+        scheduler.close()
+    assert isinstance(decision, DoNothingDecision)
+    assert steps["quick"] == 1 and steps["slow"] > 1
+    assert scheduler.stats["slow"].unfinished == 1 and scheduler.stats["quick"].unfinished == 0
+    assert elapsed < 0.1
+
+
+def test_bot_scheduler_decides_like_the_serial_bot():
+    import bot
+
+    class Served(OfflineGame):
+        def send_decision_string(self, s: str) -> None:
+            pass
+
+    states = [GameState(gamestate_dict(turn=turn, me=(15, 0))) for turn in (1, 2)]
+    serial = []
+    bot.reset()
+    for game_state in states:
+        game = OfflineGame(game_state)
+        serial.append(bot.get_move_decision(game).engine_str())
+        serial.append(bot.get_action_decision(game).engine_str())
+
+    bot.reset()
+    scheduled = []
+    bot.game = Served(states[0])
+    scheduler = bot.make_scheduler(bot.game)
+    try:
+        for game_state in states:
+            bot.game.game_state = game_state
+            fallback = MoveDecision(game_state.get_my_player().position)
+            scheduled.append(scheduler.run_phase("move", game_state, fallback).engine_str())
+            scheduled.append(scheduler.run_phase("action", game_state, DoNothingDecision()).engine_str())
+    finally:
+        scheduler.close()
+        bot.game = None
+        bot.reset()
+    assert scheduled == serial
+    assert scheduler.stats["move_observe"].phases == 2
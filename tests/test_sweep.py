@@ -0,0 +1,27 @@
+from api.config import ENV_PROPERTIES
+from tools.sweep import check_params
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_unknown_and_mistyped_params_are_rejected():
+    known = {"ITEM": "COFFEE_THERMOS", "BUY_CUTOFF_TURN": 170, "ITEM_MIN_SCORE": 100.0}
+    assert check_params({"BUY_CUTOFF_TURN": [150, 160], "ITEM_MIN_SCORE": [50, 75.5]}, known) == []
+    errors = check_params({"BUY_CUTOF_TURN": [150], "ITEM_MIN_SCORE": ["high"], "ITEM": ["SCARECROW"]}, known)
+    assert len(errors) == 3
+    assert errors[0].startswith("unknown parameter BUY_CUTOF_TURN")
+
+
+def test_bot_reads_the_properties_file_it_is_given(tmp_path):
+    with open(os.path.join(ROOT, "resources", "mm27.properties")) as f:
+        properties = f.read().replace("board.width = 30", "board.width = 24")
+    path = tmp_path / "narrow.properties"
+    path.write_text(properties)
+    env = dict(os.environ, **{ENV_PROPERTIES: str(path)})
+    code = "from api.constants import Constants; print(Constants().BOARD_WIDTH)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.stdout.strip() == "24"
@@ -0,0 +1,47 @@
+from api.telemetry import COLUMN_NAMES, Telemetry, read_telemetry
+
+import gzip
+
+
+def row(turn: int, money: float = 100.0):
+    return [turn, money, 70000, 3, 4, 5, 6, 7, 1, 8, 0, -1, 49]
+
+
+def test_rows_are_appended_every_flush_every_rows(tmp_path):
+    path = str(tmp_path / "game.jsonl.gz")
+    telemetry = Telemetry(capacity=4, labels={"mode": {1: "BUYING"}}, path=path, meta={"item": "SCARECROW"},
+                          flush_every=3)
+    for turn in range(1, 8):
+        telemetry.record(*row(turn))
+    # Turns 1 to 6 are on disk before the game ends
+    meta, names, rows = read_telemetry(path)
+    assert meta["item"] == "SCARECROW" and names == COLUMN_NAMES
+    assert [r[0] for r in rows] == [1, 2, 3, 4, 5, 6]
+    telemetry.flush()
+    _, _, rows = read_telemetry(path)
+    assert [r[0] for r in rows] == list(range(1, 8))
+    assert rows[0][2] == 70000 and rows[0][8] == "BUYING" and rows[0][11] == -1
+
+
+def test_csv_is_appended_with_one_header(tmp_path):
+    path = str(tmp_path / "game.csv")
+    telemetry = Telemetry(path=path, flush_every=2)
+    for turn in range(1, 6):
+        telemetry.record(*row(turn, money=turn * 1.5))
+    telemetry.flush()
+    _, names, rows = read_telemetry(path)
+    assert names == COLUMN_NAMES
+    assert [r[1] for r in rows] == [1.5, 3.0, 4.5, 6.0, 7.5]
+
+
+def test_a_file_cut_short_is_read_to_its_last_complete_row(tmp_path):
+    path = str(tmp_path / "game.jsonl.gz")
+    telemetry = Telemetry(path=path, flush_every=2)
+    for turn in range(1, 5):
+        telemetry.record(*row(turn))
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data + gzip.compress(b'[5,100.0,1')[:-8])
+    _, _, rows = read_telemetry(path)
+    assert [r[0] for r in rows] == [1, 2, 3, 4]
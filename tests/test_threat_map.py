@@ -0,0 +1,19 @@
+from api.threat_map import NEVER, ThreatMap
+from helpers import gamestate_dict
+from model.game_state import GameState
+from model.position import Position
+
+
+def test_grid_follows_the_tile_map():
+    threat_map = ThreatMap(30, 50)
+    threat_map.update(GameState(gamestate_dict(turn=3, width=12, height=8, me=(0, 0), opponent=(6, 4))))
+    assert (threat_map.width, threat_map.height) == (12, 8)
+    assert len(threat_map.turns) == 8 and all(len(row) == 12 for row in threat_map.turns)
+    assert threat_map.earliest_harvest(Position(11, 7)) == 3
+
+
+def test_guard_blocks_harvesting():
+    threat_map = ThreatMap(30, 50)
+    threat_map.update(GameState(gamestate_dict(turn=3, me=(5, 5), opponent=(6, 5))))
+    assert threat_map.earliest_harvest(Position(5, 7)) == NEVER
+    assert threat_map.earliest_harvest(Position(5, 8)) == 3
@@ -0,0 +1,39 @@
+from api.threat_map import NEVER, ThreatMap
+from helpers import gamestate_dict, tile_dict
+from model.game_state import GameState
+from model.position import Position
+from model.tile_map import TileMap
+
+
+def scarecrow_board(cells):
+    state = gamestate_dict(turn=5, me=(0, 45), opponent=(2, 20))
+    rows = state["tileMap"]["tiles"]
+    for x, y in cells:
+        rows[y][x] = tile_dict(rows[y][x]["type"], scarecrow_effect=0)
+    return state
+
+
+def test_plain_tiles_are_not_special():
+    tile_map = TileMap(gamestate_dict(crops=[(3, 20, "CORN", 5, 1)])["tileMap"])
+    assert set(tile_map.special_tiles) == {(3, 20)}
+    assert tile_map.get_tile_xy(4, 20).crop.type == "NONE"
+
+
+def test_item_effect_tiles_are_special_even_first_in_their_row():
+    # Our scarecrow (scarecrowEffect 0, placed by player 1) covers a whole row but its last tile, and the
+    # first SOIL tile of the board
+    cells = [(x, 20) for x in range(29)] + [(0, 3)]
+    tile_map = TileMap(scarecrow_board(cells)["tileMap"])
+    assert set(tile_map.special_tiles) == set(cells)
+    assert tile_map.get_tile_xy(0, 20).scarecrow_effect == 0
+    assert tile_map.get_tile_xy(29, 20).scarecrow_effect == -1
+    assert tile_map.get_tile_xy(1, 3).scarecrow_effect == -1
+
+
+def test_scarecrow_tiles_are_never_threatened():
+    game_state = GameState(scarecrow_board([(0, 20), (1, 20), (0, 21)]))
+    threat_map = ThreatMap(30, 50)
+    threat_map.update(game_state)
+    for x, y in ((0, 20), (1, 20), (0, 21)):
+        assert threat_map.earliest_harvest(Position(x, y)) == NEVER
+    assert threat_map.earliest_harvest(Position(2, 20)) == 5
@@ -0,0 +1,144 @@
+"""
+Replays recorded games through a bot offline and reports decision diffs and decision latency.
+
+Record games by running the bot with MM27_RECORD_DIR set, then:
+
+    python -m tools.decision_regression recordings/ --save-baseline baseline.json
+    python -m tools.decision_regression recordings/ --baseline baseline.json
+
+Without a baseline the decisions are compared against the ones sent during the recorded game.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr
+from pathlib import Path
+from typing import Dict, List, Optional
+from api.game_util import percentile
+from api.params import env_for
+from model.game_state import GameState
+from networking.recorder import load_turns
+
+import argparse
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+
+class OfflineGame:
+    """
+    Stands in for Game when there is no engine on the other end.
+    """
+
+    def __init__(self, game_state: GameState) -> None:
+        self.game_state = game_state
+
+    def get_game_state(self) -> GameState:
+        return self.game_state
+
+
+def replay_recording(path: str, bot_module: str = "bot") -> Dict:
+    """
+    Feeds one recording through a fresh bot state, alternating move and action phases. The item, upgrade
+    and strategy parameters in the recording's header are set in the environment first, and the bot is
+    imported, or reloaded if it already was, to read them.
+    :param path: Recording written by GameRecorder
+    :param bot_module: Module with get_move_decision, get_action_decision and reset
+    :return: Dict with the new decisions, the recorded ones and per-decision latencies in seconds
+    """
+    header, turns = load_turns(path)
+    os.environ.update(env_for(header.get("params", {})))
+    if bot_module in sys.modules:
+        bot = importlib.reload(sys.modules[bot_module])
+    else:
+        bot = importlib.import_module(bot_module)
+    bot.reset()
+    random.seed(0)
+    decisions, recorded, latencies = [], [], []
+    with redirect_stderr(io.StringIO()):
+        for i, (gamestate_dict, sent) in enumerate(turns):
+            game = OfflineGame(GameState(gamestate_dict))
+            decide = bot.get_move_decision if i % 2 == 0 else bot.get_action_decision
+            start = time.perf_counter()
+            decision = decide(game)
+            latencies.append(time.perf_counter() - start)
+            decisions.append(decision.engine_str())
+            recorded.append(sent)
+    return {"path": path, "decisions": decisions, "recorded": recorded, "latencies": latencies}
+
+
+def _replay(job) -> Dict:
+    return replay_recording(*job)
+
+
+def compare(result: Dict, reference: Optional[Dict], latency_threshold: float) -> Dict:
+    """
+    Compares a replay result against a baseline entry, or against the recorded decisions if there is none
+    :return: Dict with the differing decisions and whether latency regressed
+    """
+    expected = reference["decisions"] if reference else result["recorded"]
+    diffs = []
+    for i, (want, got) in enumerate(zip(expected, result["decisions"])):
+        if want is not None and want != got:
+            diffs.append({"index": i, "phase": "move" if i % 2 == 0 else "action", "expected": want, "got": got})
+    mean = sum(result["latencies"]) / max(1, len(result["latencies"]))
+    p95 = percentile(result["latencies"], 0.95)
+    regressed = reference is not None and (mean > reference["latency_mean"] * latency_threshold or
+                                           p95 > reference["latency_p95"] * latency_threshold)
+    return {"diffs": diffs, "latency_mean": mean, "latency_p95": p95, "latency_regressed": regressed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded games through a bot and look for regressions")
+    parser.add_argument("corpus", help="Directory of recordings")
+    parser.add_argument("--bot", default="bot", help="Bot module to test")
+    parser.add_argument("--pattern", default="*.jsonl.gz")
+    parser.add_argument("--baseline", help="Baseline file to compare against")
+    parser.add_argument("--save-baseline", help="Write the results as a new baseline")
+    parser.add_argument("--latency-threshold", type=float, default=1.5,
+                        help="Fail when mean or p95 latency grows by more than this factor")
+    parser.add_argument("--allow-diffs", action="store_true", help="Do not fail on decision diffs")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    paths = sorted(str(path) for path in Path(args.corpus).glob(args.pattern))
+    # A process per recording, so nothing a replay leaves behind in the bot's modules reaches the next one
+    with ProcessPoolExecutor(max_workers=args.workers, max_tasks_per_child=1) as pool:
+        results = list(pool.map(_replay, [(path, args.bot) for path in paths]))
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failed = False
+    total_diffs = 0
+    all_latencies: List[float] = []
+    new_baseline = {}
+    for result in results:
+        name = Path(result["path"]).name
+        report = compare(result, baseline.get(name), args.latency_threshold)
+        total_diffs += len(report["diffs"])
+        all_latencies.extend(result["latencies"])
+        new_baseline[name] = {"decisions": result["decisions"], "latency_mean": report["latency_mean"],
+                              "latency_p95": report["latency_p95"]}
+        status = "LATENCY REGRESSION" if report["latency_regressed"] else "ok"
+        print(f"{name}: {len(result['decisions'])} decisions, {len(report['diffs'])} diffs, "
+              f"mean {report['latency_mean'] * 1000:.3f}ms p95 {report['latency_p95'] * 1000:.3f}ms {status}")
+        for diff in report["diffs"][:5]:
+            print(f"    #{diff['index']} {diff['phase']}: expected {diff['expected']!r} got {diff['got']!r}")
+        failed = failed or report["latency_regressed"] or (bool(report["diffs"]) and not args.allow_diffs)
+
+    print(f"{len(results)} games, {len(all_latencies)} decisions, {total_diffs} diffs, "
+          f"p50 {percentile(all_latencies, 0.5) * 1000:.3f}ms p95 {percentile(all_latencies, 0.95) * 1000:.3f}ms")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(new_baseline, f)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Seeded generator of synthetic gamestates in the engine's JSON format, for load and scaling tests.
+
+    python -m tools.gamestate_generator out.jsonl --count 1000 --width 300 --height 500 --density 0.2
+
+States are written as text straight from pre-serialized tile templates: rows without crops or
+item effects are a single cached string, and crop positions are drawn with geometric skips, so
+the cost grows with the number of crops rather than with board area.
+"""
+from typing import Dict, Optional, Tuple
+from api.constants import Constants
+from api.game_util import tile_type_on_turn
+from model.crop_type import CropType
+from model.item_type import ItemType
+from model.position import Position
+from model.tile_type import TileType
+from model.upgrade_type import UpgradeType
+
+import argparse
+import json
+import math
+import random
+
+constants = Constants()
+
+TILE_TEMPLATE = ('{"type":"%s","crop":{"type":"%s","growthTimer":%d,"value":%s},"p1_item":"%s","p2_item":"%s",'
+                 '"turnsLeftToGrow":%d,"rainTotemEffect":%d,"fertilityIdolEffect":%d,"scarecrowEffect":%d}')
+
+ITEM_RADIUS = {
+    ItemType.RAIN_TOTEM: constants.RAIN_TOTEM_EFFECT_RADIUS,
+    ItemType.FERTILITY_IDOL: constants.FERTILITY_IDOL_EFFECT_RADIUS,
+    ItemType.SCARECROW: constants.SCARECROW_EFFECT_RADIUS,
+}
+PLACED_ITEMS = list(ITEM_RADIUS)
+
+
+def band_type(row: int, band_row: int) -> TileType:
+    """
+    Returns the tile type of a row when the inner fertility band is on band_row
+    """
+    offset = abs(row - band_row)
+    if offset < (constants.FBAND_INNER_HEIGHT + 1) // 2:
+        return TileType.F_BAND_INNER
+    offset -= (constants.FBAND_INNER_HEIGHT + 1) // 2
+    if offset < constants.FBAND_MID_HEIGHT:
+        return TileType.F_BAND_MID
+    if offset < constants.FBAND_MID_HEIGHT + constants.FBAND_OUTER_HEIGHT:
+        return TileType.F_BAND_OUTER
+    return TileType.SOIL if row > band_row else TileType.ARID
+
+
+def player_dict(name: str, position: Position, item: ItemType, upgrade: UpgradeType, rng: random.Random,
+                used_item: bool = False) -> Dict:
+    """
+    Builds a player whose stats match its upgrade
+    """
+    return {
+        "name": name,
+        "position": {"x": position.x, "y": position.y},
+        "upgrade": upgrade.name,
+        "item": item.name,
+        "money": rng.randrange(0, 2000),
+        "seedInventory": {crop.name: rng.randrange(0, 5) for crop in CropType if crop != CropType.NONE},
+        "harvestedInventory": [],
+        "discount": constants.GREEN_GROCER_LOYALTY_CARD_DISCOUNT if upgrade == UpgradeType.LOYALTY_CARD else 0,
+        "protectionRadius": constants.SPYGLASS_PROTECTION_RADIUS if upgrade == UpgradeType.SPYGLASS
+        else constants.PROTECTION_RADIUS,
+        "harvestRadius": constants.SCYTHE_HARVEST_RADIUS if upgrade == UpgradeType.SCYTHE else constants.HARVEST_RADIUS,
+        "plantRadius": constants.SEED_A_PULT_PLANT_RADIUS if upgrade == UpgradeType.SEED_A_PULT
+        else constants.PLANT_RADIUS,
+        "carryingCapacity": constants.BACKPACK_CARRYING_CAPACITY if upgrade == UpgradeType.BACKPACK
+        else constants.CARRYING_CAPACITY,
+        "maxMovement": constants.LONGER_LEGS_MAX_MOVEMENT if upgrade == UpgradeType.LONGER_LEGS
+        else constants.MAX_MOVEMENT,
+        "doubleDropChance": constants.RABBITS_FOOT_DOUBLE_DROP_CHANCE if upgrade == UpgradeType.RABBITS_FOOT else 0,
+        "usedItem": used_item,
+        "hasDeliveryDrone": item == ItemType.DELIVERY_DRONE,
+        "hasCoffeeThermos": used_item and item == ItemType.COFFEE_THERMOS,
+        "itemTimeExpired": False,
+    }
+
+
+class GameStateGenerator:
+    """
+    Produces valid, seeded gamestates. Each call to generate_text draws a fresh board from the same
+    random stream, so a generator with a given seed always yields the same sequence.
+    """
+
+    def __init__(self, width: int = constants.BOARD_WIDTH, height: int = constants.BOARD_HEIGHT,
+                 crop_density: float = 0.1, band_row: Optional[int] = None, item_effects: int = 0,
+                 p1_loadout: Optional[Tuple[ItemType, UpgradeType]] = None,
+                 p2_loadout: Optional[Tuple[ItemType, UpgradeType]] = None, seed: int = 0) -> None:
+        """
+        :param width: Board width
+        :param height: Board height
+        :param crop_density: Fraction of plantable tiles holding a crop
+        :param band_row: Row of the inner fertility band, or None to place the band from the turn
+        :param item_effects: Number of placed items (rain totem, fertility idol, scarecrow) on the board
+        :param p1_loadout: (item, upgrade) of player 1, random if None
+        :param p2_loadout: (item, upgrade) of player 2, random if None
+        :param seed: Random seed
+        """
+        self.width = width
+        self.height = height
+        self.crop_density = crop_density
+        self.band_row = band_row
+        self.item_effects = item_effects
+        self.p1_loadout = p1_loadout
+        self.p2_loadout = p2_loadout
+        self.rng = random.Random(seed)
+        self.crops = [crop for crop in CropType if crop != CropType.NONE]
+        self._empty_tiles: Dict[TileType, str] = {}
+        self._empty_rows: Dict[TileType, str] = {}
+
+    def _empty_tile(self, tile_type: TileType) -> str:
+        tile = self._empty_tiles.get(tile_type)
+        if tile is None:
+            tile = TILE_TEMPLATE % (tile_type.name, "NONE", 0, 0, "NONE", "NONE", 0, -1, -1, -1)
+            self._empty_tiles[tile_type] = tile
+            self._empty_rows[tile_type] = "[" + ",".join([tile] * self.width) + "]"
+        return tile
+
+    def row_type(self, y: int, turn: int) -> TileType:
+        if y == 0:
+            return TileType.GREEN_GROCER
+        if y < constants.GRASS_ROWS:
+            return TileType.GRASS
+        if self.band_row is not None:
+            return band_type(y, self.band_row)
+        return tile_type_on_turn(turn, None, Position(0, y))
+
+    def _loadout(self, loadout: Optional[Tuple[ItemType, UpgradeType]]) -> Tuple[ItemType, UpgradeType]:
+        if loadout is not None:
+            return loadout
+        items = [item for item in ItemType if item != ItemType.NONE]
+        upgrades = [upgrade for upgrade in UpgradeType if upgrade != UpgradeType.NONE]
+        return self.rng.choice(items), self.rng.choice(upgrades)
+
+    def _crop_cells(self) -> Dict[Tuple[int, int], Tuple[str, int, float]]:
+        """
+        Picks crop tiles by skipping a geometrically distributed number of tiles between crops
+        """
+        rng, density = self.rng, self.crop_density
+        first = constants.GRASS_ROWS * self.width
+        area = self.width * self.height
+        cells: Dict[Tuple[int, int], Tuple[str, int, float]] = {}
+        if density <= 0:
+            return cells
+        log_miss = math.log(1 - density) if density < 1 else None
+        i = first - 1
+        while True:
+            i += 1 if log_miss is None else 1 + int(math.log(1 - rng.random()) / log_miss)
+            if i >= area:
+                return cells
+            crop = rng.choice(self.crops)
+            timer = rng.randrange(0, crop.get_growth_time() + 1)
+            value = round(crop.get_growth_value() * rng.random(), 2)
+            cells[(i % self.width, i // self.width)] = (crop.name, timer, value)
+
+    def _effect_cells(self) -> Dict[Tuple[int, int], list]:
+        # [rain totem, fertility idol, scarecrow, p1 item, p2 item] per affected tile
+        cells: Dict[Tuple[int, int], list] = {}
+        for _ in range(self.item_effects):
+            item = self.rng.choice(PLACED_ITEMS)
+            owner = self.rng.randrange(2)
+            cx, cy = self.rng.randrange(self.width), self.rng.randrange(constants.GRASS_ROWS, self.height)
+            radius = ITEM_RADIUS[item]
+            field = PLACED_ITEMS.index(item)
+            for y in range(max(0, cy - radius), min(self.height, cy + radius + 1)):
+                span = radius - abs(y - cy)
+                for x in range(max(0, cx - span), min(self.width, cx + span + 1)):
+                    cells.setdefault((x, y), [-1, -1, -1, "NONE", "NONE"])[field] = owner
+            cells.setdefault((cx, cy), [-1, -1, -1, "NONE", "NONE"])[3 + owner] = item.name
+        return cells
+
+    def generate_text(self, turn: int = 90) -> str:
+        """
+        Returns one gamestate as a JSON string
+        :param turn: Turn of the state, also places the fertility band when band_row is None
+        """
+        rng = self.rng
+        crops = self._crop_cells()
+        effects = self._effect_cells()
+        special_rows: Dict[int, set] = {}
+        for (x, y) in crops:
+            special_rows.setdefault(y, set()).add(x)
+        for (x, y) in effects:
+            special_rows.setdefault(y, set()).add(x)
+        rows = []
+        for y in range(self.height):
+            tile_type = self.row_type(y, turn)
+            empty = self._empty_tile(tile_type)
+            if y not in special_rows:
+                rows.append(self._empty_rows[tile_type])
+                continue
+            row = [empty] * self.width
+            for x in special_rows[y]:
+                crop = crops.get((x, y))
+                effect = effects.get((x, y))
+                name, timer, value = crop if crop is not None else ("NONE", 0, 0)
+                rain, idol, scarecrow, p1_item, p2_item = effect if effect is not None else (-1, -1, -1, "NONE", "NONE")
+                row[x] = TILE_TEMPLATE % (tile_type.name, name, timer, value, p1_item, p2_item, timer, rain, idol,
+                                          scarecrow)
+            rows.append("[" + ",".join(row) + "]")
+
+        p1_item, p1_upgrade = self._loadout(self.p1_loadout)
+        p2_item, p2_upgrade = self._loadout(self.p2_loadout)
+        p1 = player_dict("gen_p1", Position(rng.randrange(self.width), rng.randrange(self.height)), p1_item, p1_upgrade,
+                         rng, rng.random() < 0.5)
+        p2 = player_dict("gen_p2", Position(rng.randrange(self.width), rng.randrange(self.height)), p2_item, p2_upgrade,
+                         rng, rng.random() < 0.5)
+        return ('{"turn":%d,"p1":%s,"p2":%s,"tileMap":{"mapHeight":%d,"mapWidth":%d,"tiles":[%s]},'
+                '"playerNum":1,"feedback":""}') % (turn, json.dumps(p1), json.dumps(p2), self.height, self.width,
+                                                    ",".join(rows))
+
+    def generate(self, turn: int = 90) -> Dict:
+        """
+        Returns one gamestate as a dict ready for GameState
+        """
+        return json.loads(self.generate_text(turn))
+
+    def stream(self, path, count: int, first_turn: int = 1) -> None:
+        """
+        Writes count states to a JSON Lines file, one turn apart
+        """
+        with open(path, "w") as f:
+            for i in range(count):
+                f.write(self.generate_text(first_turn + i))
+                f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic gamestates")
+    parser.add_argument("path", help="JSON Lines file to write")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--width", type=int, default=constants.BOARD_WIDTH)
+    parser.add_argument("--height", type=int, default=constants.BOARD_HEIGHT)
+    parser.add_argument("--density", type=float, default=0.1, help="Fraction of plantable tiles with a crop")
+    parser.add_argument("--band-row", type=int, default=None, help="Row of the inner fertility band")
+    parser.add_argument("--item-effects", type=int, default=0, help="Number of placed items on the board")
+    parser.add_argument("--p1", help="ITEM,UPGRADE of player 1")
+    parser.add_argument("--p2", help="ITEM,UPGRADE of player 2")
+    parser.add_argument("--first-turn", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    def loadout(text):
+        if text is None:
+            return None
+        item, upgrade = text.split(",")
+        return ItemType[item.strip().upper()], UpgradeType[upgrade.strip().upper()]
+
+    generator = GameStateGenerator(args.width, args.height, args.density, args.band_row, args.item_effects,
+                                   loadout(args.p1), loadout(args.p2), args.seed)
+    generator.stream(args.path, args.count, args.first_turn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Sweeps loadouts and strategy parameters by playing real games, dropping poor configurations early.
+
+Every combination of the chosen items, upgrades and parameter values is a configuration. Each round,
+every surviving configuration plays more games against the opponents under each properties file,
+and only the best 1/eta by mean score move on (successive halving), so most of the budget goes to
+the configurations that look promising.
+
+Games are run by an engine command given as a template. {bot}, {opponent}, {properties}, {replay}
+and {seed} are filled in per game, and our bot must be player 1:
+
+    python -m tools.sweep --engine "java -jar engine.jar {bot} {opponent} {properties} {replay}" \\
+        --opponent dummy.py --param BUY_CUTOFF_TURN=150:180:10 --param GOLDEN_CORN_MONEY=500,1000 \\
+        --items COFFEE_THERMOS,SCARECROW --games 2 --eta 3 --out sweep.csv
+
+Configurations reach the bot through MM27_* environment variables, see api.params, and so does the
+properties file of the game (MM27_PROPERTIES), so the bots play under the rules the engine enforces.
+Parameters the bot does not read are rejected before any game is played. The score of a game is read
+from its replay: our final money minus the opponent's, or 1/0.5/0 with --metric win.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from api.config import ENV_PROPERTIES, parse_properties
+from api.params import DEFAULTS, env_for
+from model.item_type import ItemType
+from model.upgrade_type import UpgradeType
+from networking.replay import summarize_replay
+
+import argparse
+import csv
+import importlib.util
+import math
+import os
+import shlex
+import shutil
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Trial(NamedTuple):
+    config: int
+    env: Dict[str, str]
+    opponent: str
+    properties: str
+    seed: int
+
+
+class Settings(NamedTuple):
+    engine: str
+    bot: str
+    metric: str
+    timeout: float
+
+
+class Standing:
+    def __init__(self, values: Dict[str, object]) -> None:
+        """
+        :param values: Parameter name to value, including ITEM and UPGRADE
+        """
+        self.values = values
+        self.scores: List[float] = []
+        self.failures = 0
+        self.rounds = 0
+
+    def mean(self) -> float:
+        return statistics.fmean(self.scores) if self.scores else -math.inf
+
+    def win_rate(self) -> float:
+        return sum(score > 0 for score in self.scores) / len(self.scores) if self.scores else 0.0
+
+
+def parse_values(spec: str) -> List[object]:
+    """
+    Parses a parameter range: "a,b,c" for a list, "start:stop:step" for an inclusive range
+    :param spec: Range as given on the command line
+    :return: List of ints, floats or strings
+    """
+    if ":" in spec:
+        start, stop, step = (float(part) if "." in part else int(part) for part in spec.split(":"))
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        if isinstance(start, float) or isinstance(step, float):
+            # Drop the float error that accumulates over the range
+            return [round(start + i * step, 9) for i in range(count)]
+        return [start + i * step for i in range(count)]
+    values = []
+    for part in spec.split(","):
+        for cast in (int, float, str):
+            try:
+                values.append(cast(part))
+                break
+            except ValueError:
+                continue
+    return values
+
+
+def parse_names(spec: str, enum) -> List[str]:
+    if spec == "all":
+        return [member.name for member in enum]
+    return [enum[name.strip()].name for name in spec.split(",")]
+
+
+def build_configs(items: List[str], upgrades: List[str], params: Dict[str, List[object]]) -> List[Dict[str, object]]:
+    names = ["ITEM", "UPGRADE"] + list(params)
+    return [dict(zip(names, values)) for values in product(items, upgrades, *params.values())]
+
+
+def bot_params(bot: str) -> Dict[str, object]:
+    """
+    Returns the strategy parameters a bot reads and their defaults, by importing it without playing
+    :param bot: Path of the bot's file
+    """
+    spec = importlib.util.spec_from_file_location("swept_bot", bot)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+    return dict(DEFAULTS)
+
+
+def check_params(params: Dict[str, List[object]], known: Dict[str, object]) -> List[str]:
+    """
+    Returns what is wrong with the swept parameters: names the bot does not read, and values it
+    cannot convert to the type of the parameter's default
+    """
+    errors = []
+    for name, values in params.items():
+        if name in ("ITEM", "UPGRADE"):
+            errors.append(f"{name} is swept with --{name.lower()}s, not --param")
+        elif name not in known:
+            errors.append(f"unknown parameter {name}, the bot reads {', '.join(sorted(set(known) - {'ITEM', 'UPGRADE'}))}")
+        else:
+            for value in values:
+                try:
+                    type(known[name])(str(value))
+                except ValueError:
+                    errors.append(f"{name}={value} is not of type {type(known[name]).__name__}")
+    return errors
+
+
+def replay_name(properties: str) -> str:
+    return parse_properties(properties).get("replayfile.name", "game.json")
+
+
+def run_trial(trial: Trial, settings: Settings) -> Optional[float]:
+    """
+    Plays one game in a scratch directory
+    :return: The game's score, or None if the engine failed or left no replay
+    """
+    workdir = tempfile.mkdtemp(prefix="mm27-sweep-")
+    try:
+        replay = os.path.join(workdir, replay_name(trial.properties))
+        fields = {"bot": settings.bot, "opponent": trial.opponent, "properties": trial.properties,
+                  "replay": replay, "seed": trial.seed}
+        command = [token.format(**fields) for token in shlex.split(settings.engine)]
+        env = dict(os.environ)
+        env.update(trial.env)
+        env[ENV_PROPERTIES] = trial.properties
+        try:
+            subprocess.run(command, cwd=workdir, env=env, timeout=settings.timeout,
+                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            columns = summarize_replay(replay)
+        except (OSError, ValueError, subprocess.SubprocessError):
+            return None
+        if len(columns) == 0:
+            return None
+        margin = columns["p1_money"][-1] - columns["p2_money"][-1]
+        if settings.metric == "win":
+            return 1.0 if margin > 0 else 0.5 if margin == 0 else 0.0
+        return margin
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_trial(args: Tuple[Trial, Settings]) -> Optional[float]:
+    return run_trial(*args)
+
+
+def successive_halving(standings: List[Standing], matchups: List[Tuple[str, str]], games: int, eta: int,
+                       rounds: int, settings: Settings, pool: ProcessPoolExecutor) -> None:
+    """
+    Plays rounds of games, keeping the best 1/eta of the configurations after each one
+    :param standings: One per configuration, updated in place
+    :param matchups: (opponent, properties) pairs, cycled through
+    :param games: Games per configuration in the first round, multiplied by eta every round
+    :param eta: Reduction factor
+    :param rounds: Most rounds to play
+    """
+    alive = list(range(len(standings)))
+    for round_number in range(rounds):
+        if round_number > 0 and len(alive) <= 1:
+            break
+        round_games = games * eta ** round_number
+        trials = []
+        for config in alive:
+            standing = standings[config]
+            played = len(standing.scores) + standing.failures
+            env = env_for(standing.values)
+            for game in range(played, played + round_games):
+                opponent, properties = matchups[game % len(matchups)]
+                trials.append(Trial(config, env, opponent, properties, game))
+        print(f"round {round_number + 1}: {len(alive)} configuration(s), {round_games} game(s) each", flush=True)
+        for trial, score in zip(trials, pool.map(_run_trial, [(trial, settings) for trial in trials])):
+            standing = standings[trial.config]
+            if score is None:
+                standing.failures += 1
+            else:
+                standing.scores.append(score)
+        for config in alive:
+            standings[config].rounds = round_number + 1
+        alive.sort(key=lambda config: standings[config].mean(), reverse=True)
+        alive = alive[:max(1, math.ceil(len(alive) / eta))]
+
+
+def ranked(standings: List[Standing]) -> List[Standing]:
+    return sorted(standings, key=lambda standing: (standing.rounds, standing.mean()), reverse=True)
+
+
+def write_table(path: str, standings: List[Standing]) -> None:
+    names = list(standings[0].values)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank"] + names + ["rounds", "games", "failures", "mean_score", "win_rate"])
+        for rank, standing in enumerate(standings, 1):
+            writer.writerow([rank] + [standing.values[name] for name in names] +
+                            [standing.rounds, len(standing.scores), standing.failures,
+                             f"{standing.mean():.2f}", f"{standing.win_rate():.3f}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep loadouts and strategy parameters with successive halving")
+    parser.add_argument("--engine", required=True,
+                        help="Command that plays one game, with {bot} {opponent} {properties} {replay} {seed} fields")
+    parser.add_argument("--bot", default=os.path.join(ROOT, "bot.py"), help="Bot being tuned, passed as {bot}")
+    parser.add_argument("--opponent", action="append", help="Opponent bot, may be repeated (default: dummy.py)")
+    parser.add_argument("--properties", action="append",
+                        help="mm27.properties variant, may be repeated (default: resources/mm27.properties)")
+    parser.add_argument("--items", default="all", help="Comma separated ItemType names, or all")
+    parser.add_argument("--upgrades", default="all", help="Comma separated UpgradeType names, or all")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUES",
+                        help="Strategy parameter range, e.g. BUY_CUTOFF_TURN=150:180:10 or GOLDEN_CORN_MONEY=500,1000")
+    parser.add_argument("--games", type=int, default=1, help="Games per configuration in the first round")
+    parser.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta configurations after each round")
+    parser.add_argument("--rounds", type=int, default=None, help="Most rounds to play (default: until one is left)")
+    parser.add_argument("--metric", choices=("margin", "win"), default="margin")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds before a game is counted as failed")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default="sweep.csv", help="Where to write the ranked table")
+    parser.add_argument("--top", type=int, default=20, help="Rows of the table to print")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the size of the sweep")
+    args = parser.parse_args()
+
+    params = {}
+    for spec in args.param:
+        name, _, values = spec.partition("=")
+        params[name.strip().upper()] = parse_values(values)
+    errors = check_params(params, bot_params(os.path.abspath(args.bot)))
+    if errors:
+        parser.error("; ".join(errors))
+    configs = build_configs(parse_names(args.items, ItemType), parse_names(args.upgrades, UpgradeType), params)
+    opponents = [os.path.abspath(path) for path in args.opponent or [os.path.join(ROOT, "dummy.py")]]
+    properties = [os.path.abspath(path) for path in args.properties or [os.path.join(ROOT, "resources", "mm27.properties")]]
+    matchups = list(product(opponents, properties))
+    rounds = args.rounds or max(1, math.ceil(math.log(len(configs), args.eta)) + 1)
+
+    alive, total = len(configs), 0
+    for round_number in range(rounds):
+        if round_number > 0 and alive <= 1:
+            break
+        total += alive * args.games * args.eta ** round_number
+        alive = max(1, math.ceil(alive / args.eta))
+    print(f"{len(configs)} configuration(s), {len(matchups)} matchup(s), at most {rounds} round(s), "
+          f"{total} game(s) at most")
+    if args.dry_run:
+        return
+
+    standings = [Standing(values) for values in configs]
+    settings = Settings(args.engine, os.path.abspath(args.bot), args.metric, args.timeout)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        successive_halving(standings, matchups, args.games, args.eta, rounds, settings, pool)
+
+    table = ranked(standings)
+    write_table(args.out, table)
+    names = list(configs[0])
+    print(" ".join(f"{name:>16}" for name in names) + f" {'rounds':>6} {'games':>5} {'mean':>10} {'win':>6}")
+    for standing in table[:args.top]:
+        print(" ".join(f"{str(standing.values[name]):>16}" for name in names) +
+              f" {standing.rounds:>6} {len(standing.scores):>5} {standing.mean():>10.1f} {standing.win_rate():>6.1%}")
+    print(f"Wrote {len(table)} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
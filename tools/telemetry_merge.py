@@ -0,0 +1,133 @@
+"""
+Merges the per-turn telemetry of many games into one table and shows where money is made and lost.
+
+Write telemetry by running the bot with MM27_TELEMETRY_DIR set (or networking.server with
+--telemetry-dir), then:
+
+    python -m tools.telemetry_merge telemetry/ --out merged.csv.gz --by mode
+
+Every row of the merged table starts with a game column, the name of the file it came from. With --by,
+turns are grouped by a column's value. Each group shows the money gained from one of its turns to the
+next turn, the crops lost over the same turns and the decisions the engine rejected.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+from api.telemetry import open_text, read_telemetry
+
+import argparse
+import csv
+import os
+
+
+class Group:
+    def __init__(self, key) -> None:
+        self.key = key
+        self.turns = 0
+        self.games = set()
+        self.money = 0.0
+        self.crops_lost = 0
+        self.invalid_decisions = 0
+
+    def row(self) -> List:
+        return [self.key, self.turns, len(self.games), round(self.money, 2), round(self.money / max(1, self.turns), 3),
+                self.crops_lost, self.invalid_decisions]
+
+
+GROUP_HEADER = ["turns", "games", "money", "money_per_turn", "crops_lost", "invalid_decisions"]
+
+
+def game_name(path: str) -> str:
+    name = os.path.basename(path)
+    for suffix in (".gz", ".jsonl", ".csv"):
+        name = name[:-len(suffix)] if name.endswith(suffix) else name
+    return name
+
+
+def _read(path: str) -> Tuple[str, List[str], List[List]]:
+    _, names, rows = read_telemetry(path)
+    return game_name(path), names, rows
+
+
+def merge(games: List[Tuple[str, List[str], List[List]]]) -> Tuple[List[str], List[List]]:
+    """
+    Puts the rows of every game in one table. Files with other columns are lined up by column name.
+    :param games: (game name, column names, rows) per game
+    :return: (column names, rows), "game" is the first column
+    """
+    names: List[str] = []
+    for _, columns, _ in games:
+        names.extend(name for name in columns if name not in names)
+    merged = []
+    for game, columns, rows in games:
+        if columns == names:
+            merged.extend([game] + row for row in rows)
+            continue
+        index = [columns.index(name) if name in columns else None for name in names]
+        merged.extend([game] + ["" if i is None else row[i] for i in index] for row in rows)
+    return ["game"] + names, merged
+
+
+def summarize(games: List[Tuple[str, List[str], List[List]]], by: str) -> List[Group]:
+    """
+    Groups every game's turns by a column, crediting each turn with what changed until the next one
+    :return: Groups, most money gained first
+    """
+    groups: Dict[object, Group] = {}
+    for game, columns, rows in games:
+        if by not in columns:
+            continue
+        key, money, lost, invalid = (columns.index(name) for name in (by, "money", "crops_lost", "invalid_decisions"))
+        for row, following in zip(rows, rows[1:] + [None]):
+            group = groups.get(row[key])
+            if group is None:
+                group = groups[row[key]] = Group(row[key])
+            group.turns += 1
+            group.games.add(game)
+            group.invalid_decisions += row[invalid]
+            if following is not None:
+                group.money += following[money] - row[money]
+                group.crops_lost += following[lost] - row[lost]
+    return sorted(groups.values(), key=lambda group: group.money, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge per-turn telemetry files and summarize them")
+    parser.add_argument("inputs", nargs="+", help="Telemetry files, or directories of them")
+    parser.add_argument("--pattern", default="telemetry-*", help="Files to take from directories")
+    parser.add_argument("--out", help="Write the merged table here, CSV, gzip-compressed if it ends in .gz")
+    parser.add_argument("--by", default="mode", help="Column to group turns by in the summary")
+    parser.add_argument("--summary-out", help="Also write the summary table here as CSV")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    paths = []
+    for spec in args.inputs:
+        path = Path(spec)
+        paths.extend(sorted(str(p) for p in path.glob(args.pattern)) if path.is_dir() else [spec])
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        games = list(pool.map(_read, paths, chunksize=max(1, len(paths) // 64)))
+    print(f"{len(games)} game(s), {sum(len(rows) for _, _, rows in games)} turn(s)")
+
+    if args.out:
+        names, rows = merge(games)
+        with open_text(args.out, "w") as f:
+            writer = csv.writer(f)
+            writer.writerow(names)
+            writer.writerows(rows)
+        print(f"Wrote {len(rows)} rows to {args.out}")
+
+    groups = summarize(games, args.by)
+    print(f"{args.by:>20} {'turns':>8} {'games':>6} {'money':>12} {'per turn':>9} {'lost':>6} {'invalid':>7}")
+    for group in groups:
+        key, turns, count, money, per_turn, lost, invalid = group.row()
+        print(f"{str(key):>20} {turns:>8} {count:>6} {money:>12.1f} {per_turn:>9.2f} {lost:>6} {invalid:>7}")
+    if args.summary_out:
+        with open_text(args.summary_out, "w") as f:
+            writer = csv.writer(f)
+            writer.writerow([args.by] + GROUP_HEADER)
+            writer.writerows(group.row() for group in groups)
+
+
+if __name__ == "__main__":
+    main()